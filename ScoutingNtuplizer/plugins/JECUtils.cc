@@ -42,6 +42,56 @@ namespace jec {
     return false;
   }
 
+  RunIntervals RunIntervals::parse(const std::vector<std::string>& entries) {
+    struct Row { long long lo, hi; std::string file; };
+    std::vector<Row> rows;
+    rows.reserve(entries.size());
+
+    auto trim = [](const std::string& s) {
+      auto wsfront = std::find_if_not(s.begin(), s.end(), ::isspace);
+      auto wsback  = std::find_if_not(s.rbegin(), s.rend(), ::isspace).base();
+      return (wsfront < wsback ? std::string(wsfront, wsback) : std::string());
+    };
+
+    for (const auto& entry : entries) {
+      const auto p1 = entry.find(':');
+      if (p1 == std::string::npos) continue;
+      const auto p2 = entry.find(':', p1 + 1);
+      if (p2 == std::string::npos) continue;
+
+      const std::string sMin = trim(entry.substr(0, p1));
+      const std::string sMax = trim(entry.substr(p1 + 1, p2 - (p1 + 1)));
+      Row r{0, std::numeric_limits<long long>::max(), trim(entry.substr(p2 + 1))};
+      try {
+        if (!(sMin.empty() || sMin == "-1")) r.lo = std::stoll(sMin);
+        if (!(sMax.empty() || sMax == "-1")) r.hi = std::stoll(sMax);
+      } catch (const std::exception& e) {
+        continue;  // same policy as pickResidualForRun: skip malformed entries
+      }
+      rows.push_back(std::move(r));
+    }
+
+    // stable: for (invalid) overlapping input the first listed entry still wins
+    std::stable_sort(rows.begin(), rows.end(), [](const Row& a, const Row& b) { return a.lo < b.lo; });
+
+    RunIntervals out;
+    out.lo.reserve(rows.size()); out.hi.reserve(rows.size()); out.files.reserve(rows.size());
+    for (auto& r : rows) {
+      out.lo.push_back(r.lo);
+      out.hi.push_back(r.hi);
+      out.files.push_back(std::move(r.file));
+    }
+    return out;
+  }
+
+  const std::string* RunIntervals::find(unsigned int run) const {
+    const long long r = static_cast<long long>(run);
+    auto it = std::upper_bound(lo.begin(), lo.end(), r);
+    if (it == lo.begin()) return nullptr;
+    const size_t i = std::distance(lo.begin(), it) - 1;
+    return (r < hi[i]) ? &files[i] : nullptr;
+  }
+
   std::unique_ptr<FactorizedJetCorrector>
   buildTxtCorrector(const std::vector<std::string>& baseTxtFiles,
                     const std::string& residualTxtIfAny) {
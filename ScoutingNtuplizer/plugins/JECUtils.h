@@ -21,6 +21,17 @@ namespace jec {
   bool pickResidualForRun(const std::vector<std::string>& residualMap,
                           unsigned int run, std::string& outFile);
 
+  /// Run ranges parsed once and sorted by min run (python side: jec_utils.RunIntervalIndex.to_vstring()),
+  /// so the per-event lookup is a binary search instead of re-parsing every "min:max:file" string.
+  struct RunIntervals {
+    std::vector<long long>   lo, hi;   // [lo, hi); open ends stored as 0 / max()
+    std::vector<std::string> files;
+
+    static RunIntervals parse(const std::vector<std::string>& entries);
+    const std::string*  find(unsigned int run) const;   // nullptr if no range covers 'run'
+    bool                empty() const { return files.empty(); }
+  };
+
   /// Build a TXT-based corrector from base files (L1/L2/L3) and optional residual file.
   std::unique_ptr<FactorizedJetCorrector>
   buildTxtCorrector(const std::vector<std::string>& baseTxtFiles,
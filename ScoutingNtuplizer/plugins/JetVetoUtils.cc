@@ -1,6 +1,10 @@
 #include "DijetScoutingRun3NTupleMaker/ScoutingNtuplizer/plugins/JetVetoUtils.h"
 #include <TFile.h>
+#include <TH2F.h>
 #include <TKey.h>
+#include <cstdint>
+#include <cstring>
+#include <fstream>
 #include "FWCore/MessageLogger/interface/MessageLogger.h"
 
 namespace jetveto {
@@ -109,6 +113,54 @@ std::unique_ptr<TH2> loadTH2FromRoot(const std::string& path)
   return out;
 }
 
+std::unique_ptr<TH2> loadTH2FromGrid(const std::string& path)
+{
+  // Layout: see jetveto_grid.py (little-endian, 80-byte header, 40-byte map records)
+  std::ifstream in(path, std::ios::binary);
+  char head[80];
+  if (!in.read(head, sizeof(head)) || std::memcmp(head, "JVGRID01", 8) != 0) {
+    edm::LogWarning("JetVeto") << "Not a veto grid: " << path;
+    return nullptr;
+  }
+  uint32_t version = 0, nmaps = 0, neta = 0, nphi = 0;
+  std::memcpy(&version, head + 8,  4);
+  std::memcpy(&nmaps,   head + 12, 4);
+  std::memcpy(&neta,    head + 16, 4);
+  std::memcpy(&nphi,    head + 20, 4);
+  if (version != 2 || nmaps == 0 || neta == 0 || nphi == 0) {
+    edm::LogWarning("JetVeto") << "Unsupported veto grid (version " << version << "): " << path;
+    return nullptr;
+  }
+
+  uint32_t pick = 0;
+  std::string pickName;
+  for (uint32_t i = 0; i < nmaps; ++i) {
+    char rec[40];
+    if (!in.read(rec, sizeof(rec))) { edm::LogWarning("JetVeto") << "Truncated veto grid: " << path; return nullptr; }
+    const std::string name(rec, strnlen(rec, 32));
+    if (i == 0 || name == "jetvetomap") { pick = i; pickName = name; }
+  }
+
+  std::vector<double> etaEdges(neta + 1), phiEdges(nphi + 1);
+  std::vector<unsigned char> mask(static_cast<size_t>(neta) * nphi);
+  in.read(reinterpret_cast<char*>(etaEdges.data()), etaEdges.size() * sizeof(double));
+  in.read(reinterpret_cast<char*>(phiEdges.data()), phiEdges.size() * sizeof(double));
+  in.seekg(static_cast<std::streamoff>(pick) * mask.size(), std::ios::cur);
+  if (!in.read(reinterpret_cast<char*>(mask.data()), mask.size())) {
+    edm::LogWarning("JetVeto") << "Truncated veto grid: " << path;
+    return nullptr;
+  }
+
+  std::unique_ptr<TH2> out(new TH2F("jetVetoMap_mem", pickName.c_str(),
+                                    neta, etaEdges.data(), nphi, phiEdges.data()));
+  out->SetDirectory(nullptr);
+  for (uint32_t i = 0; i < neta; ++i)
+    for (uint32_t j = 0; j < nphi; ++j)
+      out->SetBinContent(i + 1, j + 1, mask[static_cast<size_t>(i) * nphi + j] ? 0.0 : 1.0);
+  edm::LogInfo("JetVeto") << "Using map '" << pickName << "' from grid " << path;
+  return out;
+}
+
 void ensureVetoMapReady(bool enabled,
                         const std::vector<std::string>& entries,
                         unsigned run,
@@ -124,9 +176,11 @@ void ensureVetoMapReady(bool enabled,
     mapOut.reset();
     if (file.size()>=5 && file.substr(file.size()-5)==".root") {
       mapOut = loadTH2FromRoot(file);
+    } else if (file.size()>=6 && file.substr(file.size()-6)==".vgrid") {
+      mapOut = loadTH2FromGrid(file);
     } else {
-      // JSON (correctionlib) can be added here if needed.
-      edm::LogInfo("JetVeto") << "JSON veto map given (" << file << "); JSON evaluation not enabled.";
+      // JSON (correctionlib): compile it with python/configs/jetveto_grid.py, the config then passes the .vgrid
+      edm::LogInfo("JetVeto") << "JSON veto map given (" << file << "); JSON evaluation not enabled (compile it to .vgrid).";
     }
     cacheKey = key;
     edm::LogInfo("JetVeto") << "Loaded veto map from: " << file;
@@ -17,6 +17,10 @@ namespace jetveto {
   // Load a TH2 from a ROOT file; prefers JERC's "jetvetomap" by name.
   std::unique_ptr<TH2> loadTH2FromRoot(const std::string& path);
 
+  // Load one map of a compiled '.vgrid' (python/configs/jetveto_grid.py) as a TH2 in the
+  // flagFromMap convention (1 = GOOD, 0 = BAD); prefers "jetvetomap". Covers JSON sources too.
+  std::unique_ptr<TH2> loadTH2FromGrid(const std::string& path);
+
   // Ensure proper veto map is loaded for this run (no-op if disabled or no files).
   void ensureVetoMapReady(bool enabled,
                           const std::vector<std::string>& entries,
@@ -31,6 +31,53 @@ ScoutingTreeMakerRun3::ScoutingTreeMakerRun3(const edm::ParameterSet& iConfig)
   extTag_                =  iConfig.getParameter<edm::InputTag>("l1GtSrc");
   l1GtUtils_             =  new l1t::L1TGlobalUtil(iConfig, consumesCollector(), *this, algTag_, extTag_, l1t::UseEventSetupIn::Event);
 
+  //----- Trigger output: "names" (vector<string>/vector<bool>), "bits" (fixed-width masks) or "both"
+  triggerOutput_         =  iConfig.getParameter<std::string>("triggerOutput");
+  triggerAlias_          =  iConfig.getParameter<vector<string>>("triggerAlias");
+  if (triggerOutput_ != "names" && triggerOutput_ != "bits" && triggerOutput_ != "both") {
+    throw cms::Exception("Configuration") << "triggerOutput must be 'names', 'bits' or 'both' (got '" << triggerOutput_ << "')";
+  }
+  writeTriggerNames_     =  triggerOutput_ != "bits";
+  writeTriggerBits_      =  triggerOutput_ != "names";
+  triggerTiming_         =  iConfig.getParameter<bool>("triggerTiming");
+
+  //----- Output tree: compression of every branch, auto-flush and initial basket size
+  outputCompressionAlgorithm_ = iConfig.getParameter<std::string>("outputCompressionAlgorithm");
+  outputCompressionLevel_     = iConfig.getParameter<int>("outputCompressionLevel");
+  outputAutoFlush_            = iConfig.getParameter<long long>("outputAutoFlush");
+  outputBasketSize_           = iConfig.getParameter<int>("outputBasketSize");
+  if (!outputCompressionAlgorithm_.empty()) {
+    using Alg = ROOT::RCompressionSetting::EAlgorithm;
+    const std::map<std::string, Alg::EValues> algorithms = {
+      {"ZLIB", Alg::kZLIB}, {"LZMA", Alg::kLZMA}, {"LZ4", Alg::kLZ4}, {"ZSTD", Alg::kZSTD}};
+    auto it = algorithms.find(outputCompressionAlgorithm_);
+    if (it == algorithms.end()) {
+      throw cms::Exception("Configuration") << "outputCompressionAlgorithm must be '', 'ZLIB', 'LZMA', 'LZ4' or 'ZSTD' (got '"
+                                            << outputCompressionAlgorithm_ << "')";
+    }
+    outputCompressionSettings_ = ROOT::CompressionSettings(it->second, outputCompressionLevel_);
+  }
+
+  //----- Output layout: vector<T> jet branches, nJet-counted arrays of the leading outputMaxJets jets, or an RNTuple
+  outputLayout_          =  iConfig.getParameter<std::string>("outputLayout");
+  outputMaxJets_         =  iConfig.getParameter<unsigned>("outputMaxJets");
+  if (outputLayout_ != "vector" && outputLayout_ != "flat" && outputLayout_ != "rntuple") {
+    throw cms::Exception("Configuration") << "outputLayout must be 'vector', 'flat' or 'rntuple' (got '" << outputLayout_ << "')";
+  }
+  if (outputLayout_ == "flat" && outputMaxJets_ == 0) {
+    throw cms::Exception("Configuration") << "outputLayout 'flat' needs outputMaxJets > 0 (size of the jet arrays)";
+  }
+
+  //----- HLT bit b is the b-th distinct triggerSelection prefix; L1 bit b is l1Seeds_[b]
+  for (size_t i = 0; i < vtriggerSelection_.size(); ++i) {
+    const std::string& sel = vtriggerSelection_[i];
+    if (std::find(hltBitNames_.begin(), hltBitNames_.end(), sel) != hltBitNames_.end()) continue;
+    hltBitNames_.push_back(sel);
+    hltBitAlias_.push_back(i < triggerAlias_.size() ? triggerAlias_[i] : sel);
+  }
+  hltBits_.assign(std::max<size_t>(1, (hltBitNames_.size() + 63) / 64), 0);
+  l1Bits_.assign(std::max<size_t>(1, (l1Seeds_.size() + 63) / 64), 0);
+
   //----- JEC:: JEC config -------
   applyJEC_              =  iConfig.getParameter<bool>("applyJEC");
   jecMode_               =  iConfig.getParameter<std::string>("jecMode");
@@ -41,6 +88,7 @@ ScoutingTreeMakerRun3::ScoutingTreeMakerRun3(const edm::ParameterSet& iConfig)
   //----- JEC:: TXT-mode: per-run residual override
   jecResidualByRun_      =  iConfig.getParameter<bool>("jecResidualByRun");
   jecResidualMap_        =  iConfig.getParameter<std::vector<std::string>>("jecResidualMap");
+  jecResidualIntervals_  =  jec::RunIntervals::parse(jecResidualMap_);
   jecResidualCurrent_.clear();
 
   //----- JEC:: JEC Uncertainty config -------
@@ -130,94 +178,237 @@ void ScoutingTreeMakerRun3::beginJob()
   triggerPassHisto_ = fs_->make<TH1F>("TriggerPass", "TriggerPass", 1, 0, 1);
   triggerPassHisto_->GetXaxis()->SetCanExtend(kTRUE);
 
-  //----- Form tree branches -------
-  outTree_ = fs_->make<TTree>("events","events");
-  outTree_->SetAutoSave(0); //----- Stop ROOT from writing backup cycles
-  outTree_->SetAutoFlush(-20*1024*1024);   // flush/optimize every ~20 MB
+  //----- Form tree branches (RNTuple fields for outputLayout 'rntuple') -------
+  if (outputLayout_ == "rntuple") {
+    outTree_ = nullptr;
+    ntupleModel_ = rntuple::RNTupleModel::Create();
+  } else {
+    outTree_ = fs_->make<TTree>("events","events");
+    outTree_->SetAutoSave(0); //----- Stop ROOT from writing backup cycles
+    outTree_->SetAutoFlush(outputAutoFlush_);   // flush/optimize every N bytes (< 0) or entries (> 0)
+    if (outputLayout_ == "flat") outTree_->Branch("nJet", &nJet_, "nJet/I");
+  }
 
-  outTree_->Branch("isData"                ,&isData_             ,"isData_/I"             );
-  outTree_->Branch("runNo"                 ,&run_                ,"run_/I"                );
-  outTree_->Branch("evtNo"                 ,&evt_                ,"evt_/L"                );
-  outTree_->Branch("lumi"                  ,&lumi_               ,"lumi_/I"               );
-  outTree_->Branch("nvtx"                  ,&nVtx_               ,"nVtx_/I"               );
-  outTree_->Branch("rho"                   ,&rho_                ,"rho_/F"                );
-  outTree_->Branch("met"                   ,&met_                ,"met_/F"                );
-  outTree_->Branch("metphi"                ,&metphi_             ,"metphi_/F"             );
+  bookScalar("isData"                ,isData_              ,"isData_/I"             );
+  bookScalar("runNo"                 ,run_                 ,"run_/I"                );
+  bookScalar("evtNo"                 ,evt_                 ,"evt_/L"                );
+  bookScalar("lumi"                  ,lumi_                ,"lumi_/I"               );
+  bookScalar("nvtx"                  ,nVtx_                ,"nVtx_/I"               );
+  bookScalar("rho"                   ,rho_                 ,"rho_/F"                );
+  bookScalar("met"                   ,met_                 ,"met_/F"                );
+  bookScalar("metphi"                ,metphi_              ,"metphi_/F"             );
 
   //----- Experimental MET Significance Branches
-  outTree_->Branch("sumEt"                 ,&sumEt_              ,"sumEt_/F"              );
-  outTree_->Branch("metSig"                ,&metSig_             ,"metSig_/F"             );
-  outTree_->Branch("metOverSumEt"          ,&metOverSumEt_       ,"metOverSumEt_/F"       );
-  outTree_->Branch("unclusteredEnFrac"     ,&unclusteredEnFrac_  ,"unclusteredEnFrac_/F"  );
-  outTree_->Branch("minDPhiMetJet2"        ,&minDPhiMetJet2_     ,"minDPhiMetJet2_/F"     );
-  outTree_->Branch("minDPhiMetJet4"        ,&minDPhiMetJet4_     ,"minDPhiMetJet4_/F"     );
+  bookScalar("sumEt"                 ,sumEt_               ,"sumEt_/F"              );
+  bookScalar("metSig"                ,metSig_              ,"metSig_/F"             );
+  bookScalar("metOverSumEt"          ,metOverSumEt_        ,"metOverSumEt_/F"       );
+  bookScalar("unclusteredEnFrac"     ,unclusteredEnFrac_   ,"unclusteredEnFrac_/F"  );
+  bookScalar("minDPhiMetJet2"        ,minDPhiMetJet2_      ,"minDPhiMetJet2_/F"     );
+  bookScalar("minDPhiMetJet4"        ,minDPhiMetJet4_      ,"minDPhiMetJet4_/F"     );
   //-------------------------------
 
-  outTree_->Branch("nPFJets"               ,&nPFJets_            ,"nPFJets_/I"            );
-  outTree_->Branch("htAK4"                 ,&htAK4_              ,"htAK4_/F"              );
-  outTree_->Branch("mjjAK4"                ,&mjjAK4_             ,"mjjAK4_/F"             );
-  outTree_->Branch("dEtajjAK4"             ,&dEtajjAK4_          ,"dEtajjAK4_/F"          );
-  outTree_->Branch("dPhijjAK4"             ,&dPhijjAK4_          ,"dPhijjAK4_/F"          );
-  outTree_->Branch("jetPtAK4"              ,"vector<float>"      ,&ptAK4_                 );
-  outTree_->Branch("jetRawPtAK4"           ,"vector<float>"      ,&rawPtAK4_              );
-  outTree_->Branch("jetEtaAK4"             ,"vector<float>"      ,&etaAK4_                );
-  outTree_->Branch("jetPhiAK4"             ,"vector<float>"      ,&phiAK4_                );
-  outTree_->Branch("jetMassAK4"            ,"vector<float>"      ,&massAK4_               );
-  outTree_->Branch("jetEnergyAK4"          ,"vector<float>"      ,&energyAK4_             );
-  outTree_->Branch("jetAreaAK4"            ,"vector<float>"      ,&areaAK4_               );
-  outTree_->Branch("jetChfAK4"             ,"vector<float>"      ,&chfAK4_                );
-  outTree_->Branch("jetNhfAK4"             ,"vector<float>"      ,&nhfAK4_                );
-  outTree_->Branch("jetPhfAK4"             ,"vector<float>"      ,&phfAK4_                );
-  outTree_->Branch("jetMufAK4"             ,"vector<float>"      ,&mufAK4_                );
-  outTree_->Branch("jetElfAK4"             ,"vector<float>"      ,&elfAK4_                );
-  outTree_->Branch("jetHf_hfAK4"           ,"vector<float>"      ,&hf_hfAK4_              );
-  outTree_->Branch("jetHf_emfAK4"          ,"vector<float>"      ,&hf_emfAK4_             );
-  outTree_->Branch("jetHofAK4"             ,"vector<float>"      ,&hofAK4_                );
-  outTree_->Branch("idTAK4"                ,"vector<int>"        ,&idTAK4_                );
-  outTree_->Branch("idLAK4"                ,"vector<int>"        ,&idLAK4_                );
-  outTree_->Branch("chHadMultAK4"          ,"vector<int>"        ,&chHadMultAK4_          );
-  outTree_->Branch("neHadMultAK4"          ,"vector<int>"        ,&neHadMultAK4_          );
-  outTree_->Branch("phoMultAK4"            ,"vector<int>"        ,&phoMultAK4_            );
-  outTree_->Branch("elMultAK4"             ,"vector<int>"        ,&elMultAK4_             );
-  outTree_->Branch("muMultAK4"             ,"vector<int>"        ,&muMultAK4_             );
-  outTree_->Branch("hfHadMultAK4"          ,"vector<int>"        ,&hfHadMultAK4_          );
-  outTree_->Branch("hfEmMultAK4"           ,"vector<int>"        ,&hfEmMultAK4_           );
-  outTree_->Branch("jetJECFactorAK4"       ,"vector<float>"      ,&jecFactorAK4_          );
-  outTree_->Branch("jetJECUncRelAK4"       ,"vector<float>"      ,&jecRelUncAK4_          );
-  outTree_->Branch("jetJECUpFactorAK4"     ,"vector<float>"      ,&jecUpFactorAK4_        );
-  outTree_->Branch("jetJECDownFactorAK4"   ,"vector<float>"      ,&jecDownFactorAK4_      );
-  outTree_->Branch("jetRapidityAK4"        ,"vector<float>"      ,&jetRapidityAK4_        );
+  bookScalar("nPFJets"               ,nPFJets_             ,"nPFJets_/I"            );
+  bookScalar("htAK4"                 ,htAK4_               ,"htAK4_/F"              );
+  bookScalar("mjjAK4"                ,mjjAK4_              ,"mjjAK4_/F"             );
+  bookScalar("dEtajjAK4"             ,dEtajjAK4_           ,"dEtajjAK4_/F"          );
+  bookScalar("dPhijjAK4"             ,dPhijjAK4_           ,"dPhijjAK4_/F"          );
+  bookVector("jetPtAK4"              ,"vector<float>"      ,ptAK4_                 , true );
+  bookVector("jetRawPtAK4"           ,"vector<float>"      ,rawPtAK4_              , true );
+  bookVector("jetEtaAK4"             ,"vector<float>"      ,etaAK4_                , true );
+  bookVector("jetPhiAK4"             ,"vector<float>"      ,phiAK4_                , true );
+  bookVector("jetMassAK4"            ,"vector<float>"      ,massAK4_               , true );
+  bookVector("jetEnergyAK4"          ,"vector<float>"      ,energyAK4_             , true );
+  bookVector("jetAreaAK4"            ,"vector<float>"      ,areaAK4_               , true );
+  bookVector("jetChfAK4"             ,"vector<float>"      ,chfAK4_                , true );
+  bookVector("jetNhfAK4"             ,"vector<float>"      ,nhfAK4_                , true );
+  bookVector("jetPhfAK4"             ,"vector<float>"      ,phfAK4_                , true );
+  bookVector("jetMufAK4"             ,"vector<float>"      ,mufAK4_                , true );
+  bookVector("jetElfAK4"             ,"vector<float>"      ,elfAK4_                , true );
+  bookVector("jetHf_hfAK4"           ,"vector<float>"      ,hf_hfAK4_              , true );
+  bookVector("jetHf_emfAK4"          ,"vector<float>"      ,hf_emfAK4_             , true );
+  bookVector("jetHofAK4"             ,"vector<float>"      ,hofAK4_                , true );
+  bookVector("idTAK4"                ,"vector<int>"        ,idTAK4_                , true );
+  bookVector("idLAK4"                ,"vector<int>"        ,idLAK4_                , true );
+  bookVector("chHadMultAK4"          ,"vector<int>"        ,chHadMultAK4_          , true );
+  bookVector("neHadMultAK4"          ,"vector<int>"        ,neHadMultAK4_          , true );
+  bookVector("phoMultAK4"            ,"vector<int>"        ,phoMultAK4_            , true );
+  bookVector("elMultAK4"             ,"vector<int>"        ,elMultAK4_             , true );
+  bookVector("muMultAK4"             ,"vector<int>"        ,muMultAK4_             , true );
+  bookVector("hfHadMultAK4"          ,"vector<int>"        ,hfHadMultAK4_          , true );
+  bookVector("hfEmMultAK4"           ,"vector<int>"        ,hfEmMultAK4_           , true );
+  bookVector("jetJECFactorAK4"       ,"vector<float>"      ,jecFactorAK4_          , true );
+  bookVector("jetJECUncRelAK4"       ,"vector<float>"      ,jecRelUncAK4_          , true );
+  bookVector("jetJECUpFactorAK4"     ,"vector<float>"      ,jecUpFactorAK4_        , true );
+  bookVector("jetJECDownFactorAK4"   ,"vector<float>"      ,jecDownFactorAK4_      , true );
+  bookVector("jetRapidityAK4"        ,"vector<float>"      ,jetRapidityAK4_        , true );
 
   //----- Jet veto map products (no event filtering is applied)
-  outTree_->Branch("jetVetoMapAK4"         ,"vector<int>"        ,&jetVetoMapAK4_         );
-  outTree_->Branch("nJetInVetoMap"         ,&nJetInVetoMap_      ,"nJetInVetoMap_/I"      );
+  bookVector("jetVetoMapAK4"         ,"vector<int>"        ,jetVetoMapAK4_         , true );
+  bookScalar("nJetInVetoMap"         ,nJetInVetoMap_       ,"nJetInVetoMap_/I"      );
 
   //----- Calculated Charged and Neutral EM Energies and Fractions
-  outTree_->Branch("jetChEmEAK4"           ,"vector<float>"      ,&chEmEAK4_              );
-  outTree_->Branch("jetNeEmEAK4"           ,"vector<float>"      ,&neEmEAK4_              );
-  outTree_->Branch("jetChEmFAK4"           ,"vector<float>"      ,&chEmFAK4_              );
-  outTree_->Branch("jetNeEmFAK4"           ,"vector<float>"      ,&neEmFAK4_              );
+  bookVector("jetChEmEAK4"           ,"vector<float>"      ,chEmEAK4_              , true );
+  bookVector("jetNeEmEAK4"           ,"vector<float>"      ,neEmEAK4_              , true );
+  bookVector("jetChEmFAK4"           ,"vector<float>"      ,chEmFAK4_              , true );
+  bookVector("jetNeEmFAK4"           ,"vector<float>"      ,neEmFAK4_              , true );
 
   //----- Trigger
-  outTree_->Branch("triggerResult"         ,"vector<bool>"       ,&triggerResult_         );
-  outTree_->Branch("triggerName"           ,"vector<string>"     ,&triggerName_           );
+  if (writeTriggerNames_) {
+    bookVector("triggerResult"         ,"vector<bool>"       ,triggerResult_         , false);
+    bookVector("triggerName"           ,"vector<string>"     ,triggerName_           , false);
+
+    //----- L1 branches
+    bookVector("l1Result"              ,"vector<bool>"       ,l1Result_              , false);
+    bookVector("l1Name"                ,"vector<string>"     ,l1Name_                , false);
+  }
+
+  //----- Trigger bits: 64 paths per word, bit b is word b/64, bit b%64 (see triggerBitMap)
+  if (writeTriggerBits_) {
+    bookWords("hltBits", hltBits_);
+    if (doL1_) bookWords("l1Bits", l1Bits_);
+
+    //----- bit -> name table, stored once per file: one "kind bit name alias" line per bit
+    std::ostringstream table;
+    table << "# kind bit name alias\n";
+    for (size_t b = 0; b < hltBitNames_.size(); ++b) {
+      table << "HLT " << b << ' ' << hltBitNames_[b] << ' ' << hltBitAlias_[b] << '\n';
+    }
+    if (doL1_) {
+      for (size_t b = 0; b < l1Seeds_.size(); ++b) {
+        table << "L1 " << b << ' ' << l1Seeds_[b] << ' ' << l1Seeds_[b] << '\n';
+      }
+    }
+    fs_->make<TNamed>("triggerBitMap", table.str().c_str());
+  }
 
-  //----- L1 branches
-  outTree_->Branch("l1Result"              ,"vector<bool>"       ,&l1Result_              );
-  outTree_->Branch("l1Name"                ,"vector<string>"     ,&l1Name_                );
+  configureOutputTree();
 
 } //----- beginJob End
 
 
+//----- Basket size and compression of every booked branch (outputProfile_); for 'rntuple' the
+//----- writer gets the compression and, for a byte auto-flush, the cluster size (no basket size)
+void ScoutingTreeMakerRun3::configureOutputTree()
+{
+  if (ntupleModel_) {
+    rntuple::RNTupleWriteOptions options;
+    if (outputCompressionSettings_ >= 0) options.SetCompression(outputCompressionSettings_);
+    if (outputAutoFlush_ < 0) options.SetApproxZippedClusterSize(static_cast<std::size_t>(-outputAutoFlush_));
+    ntupleWriter_ = rntuple::RNTupleWriter::Append(std::move(ntupleModel_), "events", fs_->file(), options);
+  } else {
+    if (outputBasketSize_ > 0) outTree_->SetBasketSize("*", outputBasketSize_);
+    if (outputCompressionSettings_ >= 0) {
+      TIter next(outTree_->GetListOfBranches());
+      while (TBranch* br = static_cast<TBranch*>(next())) br->SetCompressionSettings(outputCompressionSettings_);
+    }
+  }
+  edm::LogInfo("Output") << "events " << outputLayout_
+                         << (outputLayout_ == "flat" ? " (" + std::to_string(outputMaxJets_) + " jets)" : std::string())
+                         << ": compression "
+                         << (outputCompressionAlgorithm_.empty() ? std::string("file default")
+                                                                 : outputCompressionAlgorithm_ + " " + std::to_string(outputCompressionLevel_))
+                         << ", auto-flush " << outputAutoFlush_ << ", basket size "
+                         << (outputBasketSize_ > 0 ? std::to_string(outputBasketSize_) : std::string("default"));
+}
+
+
+//----- One event-level column: a TTree leaf, or an RNTuple field refreshed from 'value' before each fill
+template <typename T>
+void ScoutingTreeMakerRun3::bookScalar(const char* name, T& value, const char* leaf)
+{
+  if (ntupleModel_) {
+    auto field = ntupleModel_->MakeField<T>(name);
+    ntupleSync_.emplace_back([field, &value] { *field = value; });
+  } else {
+    outTree_->Branch(name, &value, leaf);
+  }
+}
+
+
+//----- One vector column. 'rntuple': 'values' is re-pointed to the field's value in the model's entry,
+//----- so the jet loop fills the RNTuple directly. 'flat' (perJet): a T[nJet] leaf over the buffer
+//----- reserved here; the jet loop never stores more than outputMaxJets_ jets, so it never moves.
+template <typename T>
+void ScoutingTreeMakerRun3::bookVector(const char* name, const char* className, std::vector<T>*& values, bool perJet)
+{
+  if (ntupleModel_) {
+    auto field = ntupleModel_->MakeField<std::vector<T>>(name);
+    delete values;
+    values = field.get();
+    ntupleDetach_.emplace_back([&values] { values = nullptr; });
+    return;
+  }
+  if constexpr (std::is_same_v<T, float> || std::is_same_v<T, int>) {
+    if (perJet && outputLayout_ == "flat") {
+      values->reserve(outputMaxJets_);
+      const std::string leaf = std::string(name) + "[nJet]/" + (std::is_same_v<T, float> ? "F" : "I");
+      outTree_->Branch(name, values->data(), leaf.c_str());
+      return;
+    }
+  }
+  outTree_->Branch(name, className, &values);
+}
+
+
+//----- Fixed-width bit words: a W-word array leaf, or a vector<uint64> field
+void ScoutingTreeMakerRun3::bookWords(const char* name, std::vector<ULong64_t>& words)
+{
+  if (ntupleModel_) {
+    auto field = ntupleModel_->MakeField<std::vector<std::uint64_t>>(name);
+    ntupleSync_.emplace_back([field, &words] { field->assign(words.begin(), words.end()); });
+  } else {
+    const std::string leaf = std::string(name) + "[" + std::to_string(words.size()) + "]/l";
+    outTree_->Branch(name, words.data(), leaf.c_str());
+  }
+}
+
+
+void ScoutingTreeMakerRun3::fillOutput()
+{
+  nJet_ = static_cast<int>(ptAK4_->size());
+  if (ntupleWriter_) {
+    for (auto& sync : ntupleSync_) sync();
+    ntupleWriter_->Fill();
+  } else {
+    outTree_->Fill();
+  }
+}
+
+
+
+//----- (menu path index, HLT bit) of every selected path, in menu order; rebuilt only on a menu change
+void ScoutingTreeMakerRun3::buildTriggerIndex(const edm::TriggerNames& names)
+{
+  hltSelected_.clear();
+  std::vector<bool> found(hltBitNames_.size(), false);
+  for (unsigned itrig = 0; itrig < names.size(); ++itrig) {
+    const std::string& trigName = names.triggerName(itrig);
+    for (size_t b = 0; b < hltBitNames_.size(); ++b) {
+      if (trigName.compare(0, hltBitNames_[b].length(), hltBitNames_[b]) == 0) {
+        hltSelected_.emplace_back(itrig, b);
+        found[b] = true;
+      }
+    }
+  }
+  ++hltMenuBuilds_;
+
+  std::ostringstream missing;
+  for (size_t b = 0; b < found.size(); ++b) if (!found[b]) missing << ' ' << hltBitNames_[b];
+  edm::LogInfo("Trigger") << "HLT menu " << names.parameterSetID() << ": " << names.size() << " paths, "
+                          << hltSelected_.size() << " selected" << (missing.str().empty() ? "" : "; not in menu:") << missing.str();
+}
+
 
 void ScoutingTreeMakerRun3::analyze(const Event& iEvent, const EventSetup& iSetup)
 {
+  ScopedTimer analyzeTimer(triggerTiming_, timeAnalyze_);
+  ++timedEvents_;
 
   initialize();
 
   Handle<vector<Run3ScoutingPFJet>>   PFJets;
   iEvent.getByToken(srcPFJets_,       PFJets);
-  if (!PFJets.isValid()) { outTree_->Fill(); return; } // If the PFJets product were ever absent, this avoids a hard crash.
+  if (!PFJets.isValid()) { fillOutput(); return; } // If the PFJets product were ever absent, this avoids a hard crash.
 
   edm::Handle<vector<Run3ScoutingParticle>> pfcandsH;
   iEvent.getByToken(srcPFCands_, pfcandsH);
@@ -250,6 +441,7 @@ void ScoutingTreeMakerRun3::analyze(const Event& iEvent, const EventSetup& iSetu
 
     jecTxtFiles_          =  sel.txtFiles;
     jecResidualMap_       =  sel.residualMap;
+    jecResidualIntervals_ =  jec::RunIntervals::parse(jecResidualMap_);
     jecUncTxtFile_        =  sel.uncTxtFile;
     jetVetoMapFiles_      =  sel.vetoMapFiles;
     jecResidualByRun_     =  sel.residualByRun;
@@ -267,8 +459,9 @@ void ScoutingTreeMakerRun3::analyze(const Event& iEvent, const EventSetup& iSetu
     if (jecMode_ == "txt") {
       if (jecResidualByRun_) {
         //----- TXT mode WITH residuals
-        std::string residualKey;
-        const bool haveResidual = jec::pickResidualForRun(jecResidualMap_, run_, residualKey);
+        const std::string* picked = jecResidualIntervals_.find(run_);
+        const bool haveResidual = (picked != nullptr);
+        const std::string residualKey = haveResidual ? *picked : std::string();
         const std::string cacheKey = haveResidual ? residualKey : std::string();
         const bool mustBuild = (!jecCorrector_) || (jecResidualCurrent_ != cacheKey);
 
@@ -294,8 +487,9 @@ void ScoutingTreeMakerRun3::analyze(const Event& iEvent, const EventSetup& iSetu
       const auto& coll = iSetup.getData(jecESGetToken_);
 
       //----- Only allow a TXT residual fallback when configured and (for DATA)
-      std::string residualKey;
-      const bool haveResidualTxt = jecResidualByRun_ && jec::pickResidualForRun(jecResidualMap_, run_, residualKey);
+      const std::string* picked = jecResidualByRun_ ? jecResidualIntervals_.find(run_) : nullptr;
+      const bool haveResidualTxt = (picked != nullptr);
+      const std::string residualKey = haveResidualTxt ? *picked : std::string();
       const std::string cacheKey = haveResidualTxt ? residualKey : std::string();
 
       const bool mustBuild = (!jecCorrector_) || (jecResidualFallbackToTxt_ && (jecResidualCurrent_ != cacheKey));
@@ -336,8 +530,11 @@ void ScoutingTreeMakerRun3::analyze(const Event& iEvent, const EventSetup& iSetu
     }
   }
 
-  //----- JetVeto: load/cycle map per run (no-op if 'disabled or no files')
-  jetveto::ensureVetoMapReady(applyJetVetoMap_, jetVetoMapFiles_, run_, vetoMapCurrentKey_, jetVetoMap_);
+  //----- JetVeto: load/cycle map per run (no-op if 'disabled or no files'); the file only depends on the run
+  if (run_ != vetoMapLastRun_) {
+    jetveto::ensureVetoMapReady(applyJetVetoMap_, jetVetoMapFiles_, run_, vetoMapCurrentKey_, jetVetoMap_);
+    vetoMapLastRun_ = run_;
+  }
 
   //----- SumET from PF-candidate pt (scouting has no stored sumEt)
   //----- MET Significance = MET / std::sqrt(SumET)
@@ -360,43 +557,57 @@ void ScoutingTreeMakerRun3::analyze(const Event& iEvent, const EventSetup& iSetu
   //-------------- Trigger Info -----------------------------------
   triggerPassHisto_->Fill("totalEvents", 1);
 
+  ScopedTimer triggerTimer(triggerTiming_, timeTrigger_);
   edm::Handle<edm::TriggerResults> hltresults = iEvent.getHandle(srcTriggerResultsTag_);
   if (hltresults.isValid()) {
     const edm::TriggerNames &triggerNames_ = iEvent.triggerNames(*hltresults);
-    int ntrigs = hltresults->size();
-    triggerName_    ->reserve(ntrigs);
-    triggerResult_  ->reserve(ntrigs);
 
-    for (int itrig = 0; itrig != ntrigs; ++itrig) {
-      const string &trigName = triggerNames_.triggerName(itrig);
-      bool accept = hltresults->accept(itrig); 
+    //----- Path names only change with the menu (TriggerNames ParameterSetID): match the prefixes once per menu
+    if (triggerNames_.parameterSetID() != hltMenuID_) {
+      hltMenuID_ = triggerNames_.parameterSetID();
+      buildTriggerIndex(triggerNames_);
+    }
+    if (writeTriggerNames_) {
+      triggerName_    ->reserve(hltSelected_.size());
+      triggerResult_  ->reserve(hltSelected_.size());
+    }
 
-      for(unsigned i=0;i<vtriggerSelection_.size();i++) {
-        if(trigName.compare(0,vtriggerSelection_[i].length(),vtriggerSelection_[i])==0){
-          triggerName_    ->push_back( trigName );
-          triggerResult_  ->push_back( accept   );
+    for (const auto& [itrig, b] : hltSelected_) {
+      const bool accept = hltresults->accept(itrig);
+      const string &trigName = triggerNames_.triggerName(itrig);
 
-          if(accept){ triggerPassHisto_->Fill(trigName.c_str(), 1); }
+      if (writeTriggerNames_) {
+        triggerName_    ->push_back( trigName );
+        triggerResult_  ->push_back( accept   );
+      }
+      if (writeTriggerBits_ && accept) {
+        hltBits_[b >> 6] |= 1ULL << (b & 63);
+      }
 
-        } //----- 
-      } //----- Selected trigger loop
-    } //----- All HLT loop
+      if(accept){ triggerPassHisto_->Fill(trigName.c_str(), 1); }
+    } //----- Selected trigger loop
   } //----- if hltresults valid
 
   //-------------- L1T (Global) --------------
   if (doL1_) {
-    l1Name_->reserve(l1Seeds_.size());
-    l1Result_->reserve(l1Seeds_.size());
+    if (writeTriggerNames_) {
+      l1Name_->reserve(l1Seeds_.size());
+      l1Result_->reserve(l1Seeds_.size());
+    }
 
     // Pull decisions for this event
     l1GtUtils_->retrieveL1(iEvent, iSetup, l1GtToken_);
-    for (const auto& seed : l1Seeds_) {
+    for (size_t b = 0; b < l1Seeds_.size(); ++b) {
       bool accept = false;
-      l1GtUtils_->getFinalDecisionByName(seed, accept);
-      l1Name_->push_back(seed);
-      l1Result_->push_back(accept);
+      l1GtUtils_->getFinalDecisionByName(l1Seeds_[b], accept);
+      if (writeTriggerNames_) {
+        l1Name_->push_back(l1Seeds_[b]);
+        l1Result_->push_back(accept);
+      }
+      if (accept) l1Bits_[b >> 6] |= 1ULL << (b & 63);
     }
   }
+  triggerTimer.stop();
 
   //----- At least one good vertex requirement
   //if (recVtxs->size() > 0) {
@@ -430,22 +641,26 @@ void ScoutingTreeMakerRun3::analyze(const Event& iEvent, const EventSetup& iSetu
     if (corrPt[i] > ptMinPF_) passIdx.push_back(i);
   }
 
-  //----- Reserve capacity for all jet vectors once per event
+  //----- 'flat' stores the leading outputMaxJets_ jets (the arrays' capacity); HT, veto count and nPFJets use all
   const size_t nPass = passIdx.size();
-  ptAK4_          ->reserve(nPass);   etaAK4_            ->reserve(nPass);    phiAK4_    ->reserve(nPass);
-  massAK4_        ->reserve(nPass);   energyAK4_         ->reserve(nPass);    areaAK4_   ->reserve(nPass);
-  chfAK4_         ->reserve(nPass);   nhfAK4_            ->reserve(nPass);    phfAK4_    ->reserve(nPass);
-  elfAK4_         ->reserve(nPass);   mufAK4_            ->reserve(nPass);    hf_hfAK4_  ->reserve(nPass);
-  hf_emfAK4_      ->reserve(nPass);   hofAK4_            ->reserve(nPass);    rawPtAK4_  ->reserve(nPass);
-  chEmEAK4_       ->reserve(nPass);   neEmEAK4_          ->reserve(nPass);
-  chEmFAK4_       ->reserve(nPass);   neEmFAK4_          ->reserve(nPass);
-  idLAK4_         ->reserve(nPass);   idTAK4_            ->reserve(nPass);
-  chHadMultAK4_   ->reserve(nPass);   neHadMultAK4_      ->reserve(nPass);
-  phoMultAK4_     ->reserve(nPass);   elMultAK4_         ->reserve(nPass);
-  muMultAK4_      ->reserve(nPass);   hfHadMultAK4_      ->reserve(nPass);
-  hfEmMultAK4_    ->reserve(nPass);   jecRelUncAK4_      ->reserve(nPass);
-  jetVetoMapAK4_  ->reserve(nPass);   jecUpFactorAK4_    ->reserve(nPass);
-  jecFactorAK4_   ->reserve(nPass);   jecDownFactorAK4_  ->reserve(nPass);
+  const size_t maxStored = outputLayout_ == "flat" ? outputMaxJets_ : nPass;
+
+  //----- Reserve capacity for all jet vectors once per event
+  const size_t nStore = std::min(nPass, maxStored);
+  ptAK4_          ->reserve(nStore);  etaAK4_            ->reserve(nStore);   phiAK4_    ->reserve(nStore);
+  massAK4_        ->reserve(nStore);  energyAK4_         ->reserve(nStore);   areaAK4_   ->reserve(nStore);
+  chfAK4_         ->reserve(nStore);  nhfAK4_            ->reserve(nStore);   phfAK4_    ->reserve(nStore);
+  elfAK4_         ->reserve(nStore);  mufAK4_            ->reserve(nStore);   hf_hfAK4_  ->reserve(nStore);
+  hf_emfAK4_      ->reserve(nStore);  hofAK4_            ->reserve(nStore);   rawPtAK4_  ->reserve(nStore);
+  chEmEAK4_       ->reserve(nStore);  neEmEAK4_          ->reserve(nStore);
+  chEmFAK4_       ->reserve(nStore);  neEmFAK4_          ->reserve(nStore);
+  idLAK4_         ->reserve(nStore);  idTAK4_            ->reserve(nStore);
+  chHadMultAK4_   ->reserve(nStore);  neHadMultAK4_      ->reserve(nStore);
+  phoMultAK4_     ->reserve(nStore);  elMultAK4_         ->reserve(nStore);
+  muMultAK4_      ->reserve(nStore);  hfHadMultAK4_      ->reserve(nStore);
+  hfEmMultAK4_    ->reserve(nStore);  jecRelUncAK4_      ->reserve(nStore);
+  jetVetoMapAK4_  ->reserve(nStore);  jecUpFactorAK4_    ->reserve(nStore);
+  jecFactorAK4_   ->reserve(nStore);  jecDownFactorAK4_  ->reserve(nStore);
 
   nPFJets_ = 0;
   int vetoCount = 0;
@@ -540,6 +755,7 @@ void ScoutingTreeMakerRun3::analyze(const Event& iEvent, const EventSetup& iSetu
     htAK4 += pt_corr;
     htAK4_raw += pt_raw;
     if (inVeto) ++vetoCount;
+    if (ptAK4_->size() >= maxStored) continue;
 
     ptAK4_             ->push_back(pt_corr);
     rawPtAK4_          ->push_back(pt_raw);
@@ -579,7 +795,7 @@ void ScoutingTreeMakerRun3::analyze(const Event& iEvent, const EventSetup& iSetu
   } //----- Jet loop
 
   nJetInVetoMap_     =  vetoCount;
-  nPFJets_           =  static_cast<int>(ptAK4_->size());
+  nPFJets_           =  static_cast<int>(nPass);
   htAK4_             =  htAK4;
   unclusteredEnFrac_ = (sumEt_ > 0.f) ? ((sumEt_ - htAK4_raw) / sumEt_) : -1.0f;
 
@@ -618,7 +834,7 @@ void ScoutingTreeMakerRun3::analyze(const Event& iEvent, const EventSetup& iSetu
   // } //----- vtx requirement end
   
   //----- Fill Tree ---
-  outTree_->Fill();     
+  fillOutput();
   //------------------
 
 } //----- analyze End - Event Loop
@@ -673,6 +889,8 @@ void ScoutingTreeMakerRun3::initialize()
   triggerResult_      ->clear();
   l1Name_             ->clear();
   l1Result_           ->clear();
+  std::fill(hltBits_.begin(), hltBits_.end(), 0ULL);
+  std::fill(l1Bits_.begin(),  l1Bits_.end(),  0ULL);
   elMultAK4_          ->clear();
   muMultAK4_          ->clear();
   hfHadMultAK4_       ->clear();
@@ -689,6 +907,18 @@ void ScoutingTreeMakerRun3::initialize()
 
 void ScoutingTreeMakerRun3::endJob() 
 {
+  if (triggerTiming_ && timedEvents_ > 0) {
+    edm::LogVerbatim("Trigger") << "[Trigger] " << timedEvents_ << " events, " << hltMenuBuilds_ << " HLT menu index build(s); "
+                                << "trigger block " << 1e6 * timeTrigger_ / timedEvents_ << " us/event, "
+                                << "analyze " << 1e6 * timeAnalyze_ / timedEvents_ << " us/event";
+  }
+
+  //----- 'rntuple': commit; the vectors booked as fields belonged to the writer's model
+  if (ntupleWriter_) {
+    ntupleWriter_.reset();
+    for (auto& detach : ntupleDetach_) detach();
+  }
+
   delete ptAK4_;
   delete rawPtAK4_;
   delete etaAK4_;
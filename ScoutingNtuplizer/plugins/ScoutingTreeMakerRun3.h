@@ -6,6 +6,7 @@
 #include <string>
 #include <cmath>
 #include <vector>
+#include <map>
 #include <limits>
 #include <cstdint>
 #include <TTree.h>
@@ -15,7 +16,15 @@
 #include <TFile.h>
 #include <TH2.h>
 #include <TKey.h>
+#include <TNamed.h>
+#include <Compression.h>
+#include <RVersion.h>
+#include <ROOT/RNTupleModel.hxx>
+#include <ROOT/RNTupleWriter.hxx>
 #include <memory>
+#include <chrono>
+#include <functional>
+#include <type_traits>
 //#include <iostream>
 //#include <istream>
 //#include <fstream>
@@ -64,6 +73,7 @@
 #include "CondFormats/JetMETObjects/interface/JetCorrectorParameters.h"
 #include "CondFormats/JetMETObjects/interface/FactorizedJetCorrector.h"
 #include "CondFormats/JetMETObjects/interface/JetCorrectionUncertainty.h"
+#include "DijetScoutingRun3NTupleMaker/ScoutingNtuplizer/plugins/JECUtils.h"
 
 // Trigger 
 #include "FWCore/Common/interface/TriggerNames.h"
@@ -97,6 +107,28 @@ using namespace reco;
 using namespace pat;
 using namespace edm;
 
+//----- RNTuple model/writer live in ROOT::Experimental before ROOT 6.36
+#if ROOT_VERSION_CODE >= ROOT_VERSION(6,36,0)
+namespace rntuple = ROOT;
+#else
+namespace rntuple = ROOT::Experimental;
+#endif
+
+
+//----- Adds the wall time of its scope (or up to stop()) to 'acc' when enabled
+struct ScopedTimer {
+  ScopedTimer(bool on, double& acc) : on_(on), acc_(acc), t0_(std::chrono::steady_clock::now()) {}
+  ~ScopedTimer() { stop(); }
+  void stop() {
+    if (!on_) return;
+    acc_ += std::chrono::duration<double>(std::chrono::steady_clock::now() - t0_).count();
+    on_ = false;
+  }
+  bool on_;
+  double& acc_;
+  std::chrono::steady_clock::time_point t0_;
+};
+
 
 class ScoutingTreeMakerRun3 : public edm::one::EDAnalyzer<>
 {
@@ -110,6 +142,12 @@ class ScoutingTreeMakerRun3 : public edm::one::EDAnalyzer<>
 
   private:
     void initialize();
+    void configureOutputTree();
+    template <typename T> void bookScalar(const char* name, T& value, const char* leaf);
+    template <typename T> void bookVector(const char* name, const char* className, std::vector<T>*& values, bool perJet);
+    void bookWords(const char* name, std::vector<ULong64_t>& words);
+    void fillOutput();
+    void buildTriggerIndex(const edm::TriggerNames& names);
     // --- Configurable parameters --------   
     double ptMinPF_;
     bool isData_;
@@ -133,6 +171,7 @@ class ScoutingTreeMakerRun3 : public edm::one::EDAnalyzer<>
     // --- TXT-mode: optional per-run override for L2L3Residual
     bool jecResidualByRun_;                      // if true, choose Residual TXT by run
     std::vector<std::string> jecResidualMap_;    // entries "min:max:file" (min inclusive, max exclusive; -1 = open)
+    jec::RunIntervals jecResidualIntervals_;     // jecResidualMap_ parsed once, binary-searched per event
     std::string jecResidualCurrent_;             // cache last applied residual file (FileInPath key)
 
 
@@ -172,6 +211,22 @@ class ScoutingTreeMakerRun3 : public edm::one::EDAnalyzer<>
     edm::Service<TFileService> fs_;
     TTree *outTree_;
 
+    // --- Output tree settings (outputProfile_ in the cfg, configs/output_profiles.py) ---
+    std::string outputCompressionAlgorithm_;     // "" (file default) | "ZLIB" | "LZMA" | "LZ4" | "ZSTD"
+    int outputCompressionLevel_;
+    long long outputAutoFlush_;                  // < 0: bytes, > 0: entries (TTree::SetAutoFlush)
+    int outputBasketSize_;                       // initial basket size in bytes, 0 = ROOT default
+    int outputCompressionSettings_ = -1;         // ROOT::CompressionSettings, -1 = not set
+
+    // --- Output layout (outputLayout_ in the cfg, configs/ntuple_reader.py) ---
+    std::string outputLayout_;                   // "vector" (vector<T> branches) | "flat" (T[nJet]) | "rntuple"
+    unsigned outputMaxJets_;                     // "flat": leading jets stored per event (array capacity)
+    int nJet_ = 0;                               // "flat": jets stored in this event (counter of the arrays)
+    std::unique_ptr<rntuple::RNTupleModel> ntupleModel_;    // "rntuple": built in beginJob, then owned by the writer
+    std::unique_ptr<rntuple::RNTupleWriter> ntupleWriter_;
+    std::vector<std::function<void()>> ntupleSync_;         // "rntuple": copy scalars/bit words into the entry
+    std::vector<std::function<void()>> ntupleDetach_;       // "rntuple": null the vector members the model owned
+
     // --- global event variables -----
     int   run_,nVtx_,lumi_;
     long int evt_;
@@ -194,6 +249,24 @@ class ScoutingTreeMakerRun3 : public edm::one::EDAnalyzer<>
     std::vector<bool> *l1Result_;
     std::vector<std::string> *l1Name_;
 
+    // --- Trigger bits (triggerOutput = "bits" | "both") ---
+    std::string triggerOutput_;                  // "names" | "bits" | "both"
+    bool writeTriggerNames_, writeTriggerBits_;
+    std::vector<std::string> triggerAlias_;      // HLT_Alias, parallel to vtriggerSelection_
+    std::vector<std::string> hltBitNames_;       // distinct triggerSelection prefixes, in bit order
+    std::vector<std::string> hltBitAlias_;
+    std::vector<ULong64_t> hltBits_, l1Bits_;    // per-event masks, 64 bits per word
+
+    // --- HLT menu index: (menu path index, HLT bit) of the selected paths, per TriggerNames ParameterSetID
+    edm::ParameterSetID hltMenuID_;
+    std::vector<std::pair<unsigned, size_t>> hltSelected_;
+    unsigned hltMenuBuilds_ = 0;
+
+    // --- Per-event timing (triggerTiming), reported in endJob
+    bool triggerTiming_;
+    double timeTrigger_ = 0, timeAnalyze_ = 0;
+    unsigned long long timedEvents_ = 0;
+
     // --- jet and genJet variables ---
     std::vector<float> *ptAK4_, *rawPtAK4_, *etaAK4_, *phiAK4_, *massAK4_, *energyAK4_, *areaAK4_, *chfAK4_, *nhfAK4_, *phfAK4_, *elfAK4_, *mufAK4_;
     std::vector<int> *idLAK4_, *idTAK4_, *chHadMultAK4_, *neHadMultAK4_, *phoMultAK4_;
@@ -207,6 +280,7 @@ class ScoutingTreeMakerRun3 : public edm::one::EDAnalyzer<>
     bool applyJetVetoMap_;                       // toggle from cfg
     std::vector<std::string> jetVetoMapFiles_;   // "min:max:file" or plain file
     std::string vetoMapCurrentKey_;              // cache key of currently loaded map (per run)
+    int vetoMapLastRun_ = -1;                    // run for which the veto map was last resolved
     std::unique_ptr<TH2> jetVetoMap_;            // loaded TH2 map (if using ROOT)
 
     // --- Jet veto outputs ---
@@ -5,6 +5,12 @@ import os, re
 era_     = '2025C'
 jecMode_ = 'txt' # 'es'| 'txt' | 'none' 
 doJetVetoMap = True
+triggerOutput_ = 'names' # 'names' (vector<string>/vector<bool>) | 'bits' (hltBits/l1Bits + triggerBitMap) | 'both'
+doTiming_ = False        # framework Timing summary + the analyzer's per-event trigger timing (printed at endJob)
+outputProfile_ = 'default' # 'default' | 'fast-write' (LZ4) | 'analysis' (ZSTD) | 'archive' (LZMA); see configs/output_profiles.py
+#outputProfile_ = 'THISOUTPUTPROFILE'
+outputLayout_ = 'vector' # 'vector' (vector<T> jet branches) | 'flat' (jetX[nJet] arrays) | 'rntuple'; read both with configs/ntuple_reader.py
+outputMaxJets_ = 32      # 'flat' only: leading jets stored per event (nPFJets/htAK4 still count all)
 
 process = cms.Process('jetToolbox')
 
@@ -36,6 +42,11 @@ process.MessageLogger.cerr.FwkReport.reportEvery  = 100000
 process.MessageLogger.cerr.threshold = 'INFO'  # allow LogInfo/LogVerbatim
 process.MessageLogger.cerr.default = cms.untracked.PSet(limit=cms.untracked.int32(0))
 process.MessageLogger.cerr.JEC = cms.untracked.PSet(limit = cms.untracked.int32(1000000000))
+process.MessageLogger.cerr.Trigger = cms.untracked.PSet(limit = cms.untracked.int32(100))  # HLT menu index builds, timing
+process.MessageLogger.cerr.Output = cms.untracked.PSet(limit = cms.untracked.int32(10))    # output tree settings (outputProfile_)
+
+if doTiming_:
+    process.Timing = cms.Service("Timing", summaryOnly = cms.untracked.bool(True))
 
 process.maxEvents = cms.untracked.PSet(
     input = cms.untracked.int32(-1)
@@ -59,22 +70,25 @@ process.source = cms.Source("PoolSource",
 #-----------------------------------------------------------------------#
 from DijetScoutingRun3NTupleMaker.ScoutingNtuplizer.configs.jec_utils import (
     infer_era_from_filenames,
-    load_jec_config_text,
     get_era_block,
+    RunIntervalIndex,
+    veto_map_entries,
+    file_in_path,
+)
+from DijetScoutingRun3NTupleMaker.ScoutingNtuplizer.configs.jetveto_grid import grid_is_fresh, veto_grid_path
+from DijetScoutingRun3NTupleMaker.ScoutingNtuplizer.configs.output_profiles import (
+    output_profile,
+    tfileservice_params,
+    analyzer_params,
 )
 
 #------ load JEC config db and pick the block
 data_jec_list = "data_jec_list.txt"
 mc_jec_list   = "mc_jec_list.txt"
 
-data_block = get_era_block(
-    load_jec_config_text(os.path.join(os.path.dirname(__file__), '../../data/cfg', data_jec_list)),
-    era_
-)
-mc_block = get_era_block(
-    load_jec_config_text(os.path.join(os.path.dirname(__file__), '../../data/cfg', mc_jec_list)),
-    era_
-)
+#------ (parsed lists are cached beside the txt files as '<list>.cache.json')
+data_block = get_era_block(os.path.join(os.path.dirname(__file__), '../../data/cfg', data_jec_list), era_)
+mc_block   = get_era_block(os.path.join(os.path.dirname(__file__), '../../data/cfg', mc_jec_list), era_)
 
 #------ Assemble base TXT (no Residual here by design)
 base_txt_data = [data_block.get('L1FastJet',''),
@@ -87,19 +101,27 @@ base_txt_mc   = [mc_block.get('L1FastJet',''),
                  mc_block.get('L3Absolute','')]
 base_txt_mc   = [p for p in base_txt_mc if p]
 
-#------ Residual run maps (list of min:max:file strings)
-residual_map_data = list(data_block.get('L2L3Residual', []))
-residual_map_mc   = list(mc_block.get('L2L3Residual', []))  # will be ignored for MC in C++
+#------ Residual run maps (list of min:max:file strings), validated (no overlaps) and sorted by run
+#------ so the analyzer can binary-search them
+residual_map_data = RunIntervalIndex(data_block.get('L2L3Residual', [])).to_vstring()
+residual_map_mc   = RunIntervalIndex(mc_block.get('L2L3Residual', [])).to_vstring()  # will be ignored for MC in C++
 
 #------ Uncertainty files
 unc_file_data = data_block.get('Unc','')
 unc_file_mc   = mc_block.get('Unc','')
 
 #------ Jet veto map files (accept string or list)
+#------ a JSON/ROOT map with an up-to-date compiled grid next to it ('<map>.vgrid',
+#------ python3 configs/jetveto_grid.py --list ../../data/cfg/data_jec_list.txt) is read from the grid
+def _prefer_grid(entry):
+    parts = entry.split(':', 2)
+    path = parts[-1].strip()
+    if not path.endswith('.vgrid') and grid_is_fresh(file_in_path(path), file_in_path(veto_grid_path(path))):
+        parts[-1] = veto_grid_path(path)
+    return ':'.join(parts)
+
 def _norm_vetomap(block):
-    v = block.get('JetVetoMap', [])
-    if isinstance(v, str): v = [v]
-    return [str(x).strip() for x in v if str(x).strip()]
+    return [_prefer_grid(e) for e in veto_map_entries(block)]
 
 vetomap_files_data = _norm_vetomap(data_block)
 vetomap_files_mc   = _norm_vetomap(mc_block)
@@ -108,24 +130,31 @@ vetomap_files_mc   = _norm_vetomap(mc_block)
 #-----------------------------------------------------------------------#
 
 
+#------ Output compression / auto-flush / basket sizes of the 'events' tree
+outProfile = output_profile(outputProfile_)
+
 process.TFileService = cms.Service("TFileService",
                                  fileName=cms.string('test_scouting.root'),
                                  #fileName=cms.string(THISROOTFILE),
                                  closeFileFast = cms.untracked.bool(True),
-                                 #compressionAlgorithm = cms.untracked.string("ZSTD"),
-                                 #compressionLevel = cms.untracked.int32(5) # try 5-8: larger = smaller & slower
+                                 **tfileservice_params(outProfile, cms)  # compressionAlgorithm/compressionLevel
                                  )
 
 
 #-------------------- User analyzer  --------------------------------
 L1Info = ['L1_HTT120er', 'L1_HTT160er', 'L1_HTT200er', 'L1_HTT255er', 'L1_HTT280er', 'L1_HTT320er', 'L1_HTT400er', 'L1_HTT450er', 'L1_ZeroBias']
 
+def unique_paths(paths):
+    """Drop repeated path prefixes, keeping the first occurrence (one trigger bit per prefix)."""
+    seen = set()
+    return [p for p in paths if not (p in seen or seen.add(p))]
+
 # https://cmshltinfo.app.cern.ch/summary?search=DST_&year=2024&paths=true&prescaled=false&stream-types=Scouting
-HLT_Info = cms.vstring("DST_PFScouting_JetHT_v", "DST_PFScouting_SingleMuon_v", "HLT_Mu50_v", "HLT_Mu55_v", "HLT_IsoMu24_v", "HLT_IsoMu20_v", "HLT_IsoMu27_v",
+HLT_Info = cms.vstring(*unique_paths(["DST_PFScouting_JetHT_v", "DST_PFScouting_SingleMuon_v", "HLT_Mu50_v", "HLT_Mu55_v", "HLT_IsoMu24_v", "HLT_IsoMu20_v", "HLT_IsoMu27_v",
     "HLT_PFHT180_v", "HLT_PFHT180_v", "HLT_PFHT350_v", "HLT_PFHT370_v", "HLT_PFHT430_v", "HLT_PFHT510_v", "HLT_PFHT590_v",
     "HLT_PFJet40_v", "HLT_PFJet60_v", "HLT_PFJet80_v", "HLT_PFJet140_v", "HLT_PFJet200_v", "HLT_PFJet260_v", "HLT_PFJet320_v", "HLT_PFJet400_v", "HLT_PFJet450_v", "HLT_PFJet500_v", "HLT_PFJet550_v", 
     "DST_PFScouting_ZeroBias_v", "DST_PFScouting_AXOTight_v", "DST_PFScouting_AXOVLoose_v", "DST_PFScouting_AXOLoose_v", "DST_PFScouting_AXOVTight_v", "DST_PFScouting_SinglePhotonEB_v", 
-    "DST_PFScouting_CICADAVLoose_v", "DST_PFScouting_CICADALoose_v", "DST_PFScouting_CICADAMedium_v", "DST_PFScouting_CICADATight_v", "DST_PFScouting_CICADAVTight_v")
+    "DST_PFScouting_CICADAVLoose_v", "DST_PFScouting_CICADALoose_v", "DST_PFScouting_CICADAMedium_v", "DST_PFScouting_CICADATight_v", "DST_PFScouting_CICADAVTight_v"]))
 
 HLT_Alias = cms.vstring([ (s.replace("DST_", "")[:-2] if s.endswith("_v") else s.replace("DST_", "")) for s in HLT_Info ]) #------ Remove prefix and suffixes ("DST_" and "_v") for trigger alias
 
@@ -196,6 +225,9 @@ process.dijetScouting = cms.EDAnalyzer('ScoutingTreeMakerRun3',
                             ReadPrescalesFromFile    =  cms.bool(False),
                             l1Seeds                  =  cms.vstring(L1Info),
                             triggerSelection         =  HLT_Info,
+                            triggerAlias             =  HLT_Alias,
+                            triggerOutput            =  cms.string(triggerOutput_), # decode bits with configs/trigger_bits.py
+                            triggerTiming            =  cms.bool(doTiming_),
                             TriggerResultsTag        =  cms.InputTag('TriggerResults' ,'' ,'HLT' ),
                             NoiseFilterResultsTag    =  cms.InputTag('TriggerResults' ,'' ,'HLT'),
                             l1GtSrc                  =  cms.InputTag('gtStage2Digis'  ,'' ,'HLT'),
@@ -203,6 +235,13 @@ process.dijetScouting = cms.EDAnalyzer('ScoutingTreeMakerRun3',
                             l1tIgnoreMaskAndPrescale =  cms.bool(False),
                             throw                    =  cms.bool(True),
                             usePathStatus            =  cms.bool(False),
+
+                            # --- Output layout of the jet columns
+                            outputLayout             =  cms.string(outputLayout_),
+                            outputMaxJets            =  cms.uint32(outputMaxJets_),
+
+                            # --- Output tree (outputProfile_): compression, auto-flush, basket size
+                            **analyzer_params(outProfile, cms)
 )
 
 
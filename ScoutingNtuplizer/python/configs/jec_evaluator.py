@@ -0,0 +1,398 @@
+"""
+Offline (no CMSSW) evaluator for JetCorrectorParameters text files.
+
+Reproduces what FactorizedJetCorrector / JetCorrectionUncertainty do in
+ScoutingTreeMakerRun3.cc, vectorized over numpy arrays of jets:
+
+  chain = JECChain([l1, l2, l3, residual])
+  jec   = chain.evaluate(pt_raw, eta, area, rho)     # total factor per jet
+  unc   = JECUncertainty(unc_txt).evaluate(pt_raw * jec, eta)
+
+Semantics follow CMSSW:
+  - bin lookup: first record with min <= x < max in every bin variable; no match -> factor 1
+  - parameter variables are clamped to the record's [min, max] before evaluating the formula
+  - levels are applied in order, each one sees pt/E already scaled by the previous levels
+Each formula is translated once into a numpy expression and compiled with compile().
+
+Validate against a cmsRun log (printJECInfo=True lines from jec::log::printJet):
+  python3 jec_evaluator.py --validate-log cmsRun.log L1.txt L2.txt L3.txt [Residual.txt]
+"""
+
+import math, os, re, sys
+
+import numpy as np
+
+__all__ = [
+    "compile_formula",
+    "read_level_columns",
+    "JECLevel",
+    "JECChain",
+    "JECUncertainty",
+    "parse_jec_log",
+]
+
+# CMSSW variable names -> evaluate() keyword
+_VAR_INPUTS = {
+    "JetEta": "eta",
+    "JetPt":  "pt",
+    "JetPhi": "phi",
+    "JetE":   "energy",
+    "JetA":   "area",
+    "Rho":    "rho",
+    "NPV":    "npv",
+}
+
+def _erf(a):
+    return np.vectorize(math.erf, otypes=[np.float64])(a)
+
+# TFormula functions -> numpy
+_FUNCS = {
+    "max": np.maximum, "min": np.minimum, "pow": np.power,
+    "exp": np.exp, "log": np.log, "log10": np.log10, "sqrt": np.sqrt,
+    "abs": np.abs, "fabs": np.abs, "atan": np.arctan, "tanh": np.tanh,
+    "cosh": np.cosh, "sinh": np.sinh, "erf": _erf,
+}
+_FORMULA_VARS = ("x", "y", "z", "t")
+_compiled = {}
+
+def compile_formula(formula):
+    """
+    Translate a TFormula string ('[0]+[1]*log10(x)', '[p0]*pow(x,[p1])', ...)
+    into a compiled numpy expression of (x, y, z, t, p). Cached per formula.
+    """
+    if formula in _compiled:
+        return _compiled[formula]
+    expr = formula.strip().strip('"')
+    expr = expr.replace("TMath::", "").replace("^", "**")
+    expr = re.sub(r"\[\s*p?(\d+)\s*\]", r"p[\1]", expr)
+    for name in re.findall(r"[A-Za-z_]\w*", expr):
+        if name not in _FUNCS and name not in _FORMULA_VARS and name != "p":
+            raise ValueError(f"Unsupported token '{name}' in JEC formula: {formula}")
+    code = compile(expr or "1", f"<jec formula {formula}>", "eval")
+    _compiled[formula] = code
+    return code
+
+def _eval_code(code, x, y, z, t, p, n):
+    ns = dict(_FUNCS, x=x, y=y, z=z, t=t, p=p)
+    out = eval(code, {"__builtins__": {}}, ns)
+    return np.broadcast_to(np.asarray(out, dtype=np.float64), (n,))
+
+def _read_records(path):
+    """
+    Yield (header, rows) from a JEC text file; rows are lists of floats.
+    Section markers ('[AbsoluteStat]') and '#' comments are skipped (first section only).
+    """
+    header, rows = None, []
+    with open(path, "r") as f:
+        for raw in f:
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("["):
+                if header is not None:
+                    break
+                continue
+            if line.startswith("{"):
+                if header is not None:
+                    break
+                header = line.strip("{}").split()
+                continue
+            rows.append([float(v) for v in line.split()])
+    if header is None:
+        raise ValueError(f"No '{{...}}' definition line in {path}")
+    return header, rows
+
+def _parse_header(tokens, path):
+    nbin = int(tokens[0])
+    binvars = tokens[1:1 + nbin]
+    npar = int(tokens[1 + nbin])
+    parvars = tokens[2 + nbin:2 + nbin + npar]
+    rest = tokens[2 + nbin + npar:]
+    # formula may not contain blanks in CMSSW files; the last two tokens are 'Correction <Level>'
+    if len(rest) < 3 or rest[-2] != "Correction":
+        raise ValueError(f"Malformed JEC definition line in {path}: {' '.join(tokens)}")
+    formula = " ".join(rest[:-2])
+    for v in binvars + parvars:
+        if v not in _VAR_INPUTS:
+            raise ValueError(f"Unsupported JEC variable '{v}' in {path}")
+    return binvars, parvars, formula, rest[-1]
+
+class _Axis(object):
+    """
+    Cell lookup on one sorted edge array. Uniform buckets narrower than the smallest cell
+    hold at most one edge, so a lookup is a table gather plus a +-1 fix-up instead of a
+    (branchy, cache-unfriendly) binary search per jet.
+    """
+    MAX_BUCKETS = 1 << 20
+
+    def __init__(self, edges):
+        self.edges = edges
+        self.ncell = len(edges) - 1
+        self.table = None
+        w = np.diff(edges).min() / 2.0 if self.ncell > 0 else 0.0
+        if w > 0 and (edges[-1] - edges[0]) / w < self.MAX_BUCKETS:
+            nb = int(np.ceil((edges[-1] - edges[0]) / w)) + 1
+            self.inv_w = 1.0 / w
+            starts = edges[0] + w * np.arange(nb)
+            self.table = np.clip(np.searchsorted(edges, starts, side="right") - 1, 0, self.ncell - 1)
+
+    def index(self, x):
+        """
+        (cell, inside) with cell clipped to a valid index.
+        """
+        e = self.edges
+        inside = (x >= e[0]) & (x < e[-1])
+        if self.table is None:
+            c = np.searchsorted(e, x, side="right") - 1
+        else:
+            # fmax/fmin (not clip) so NaN lands in bucket 0 instead of an invalid index
+            b = np.fmin(np.fmax((x - e[0]) * self.inv_w, 0.0), len(self.table) - 1).astype(np.int64)
+            c = self.table[b]
+            c += x >= e[np.minimum(c + 1, self.ncell)]
+            c -= x < e[c]
+        return np.clip(c, 0, self.ncell - 1), inside
+
+class _Binning(object):
+    """
+    Vectorized JetCorrectorParameters::binIndex over axis-aligned records.
+    The axes are cut at every record edge, so each grid cell is either fully inside
+    one record or outside all of them: a lookup is one axis lookup per variable + one gather.
+    """
+    def __init__(self, edges, grid):
+        self.axes = [_Axis(e) for e in edges]
+        self.grid = grid
+
+    @staticmethod
+    def build(mins, maxs):
+        """
+        (edges, grid) for records with lower/upper bin limits mins/maxs, shape (nrecords, nbinvars).
+        """
+        edges = [np.unique(np.concatenate([mins[:, d], maxs[:, d]])) for d in range(mins.shape[1])]
+        grid = np.full([len(e) - 1 for e in edges], -1, dtype=np.int64)
+        # fill in reverse so the first listed record wins, as in CMSSW
+        for i in range(len(mins) - 1, -1, -1):
+            sl = tuple(slice(np.searchsorted(e, mins[i, d]), np.searchsorted(e, maxs[i, d]))
+                       for d, e in enumerate(edges))
+            grid[sl] = i
+        return edges, grid
+
+    def index(self, xs):
+        cell, inside = [], None
+        for ax, x in zip(self.axes, xs):
+            c, ok = ax.index(x)
+            inside = ok if inside is None else (inside & ok)
+            cell.append(c)
+        rec = self.grid[tuple(cell)] if len(cell) > 1 else self.grid.take(cell[0])
+        return np.where(inside, rec, -1)
+
+def read_level_columns(path):
+    """
+    Parse a JEC level text file into (meta, columns):
+      meta    = {'binvars', 'parvars', 'formula', 'level'}
+      columns = {'ranges': (nrecords, 2*nparvars) clamp limits,
+                 'params': (npar, nrecords) one row per [i],
+                 'grid': cell -> record index (-1 = no record), 'edges0', 'edges1', ...: axis edges}
+    This is also what jec_table stores on disk.
+    """
+    header, rows = _read_records(path)
+    binvars, parvars, formula, level = _parse_header(header, path)
+    nb, nv = len(binvars), len(parvars)
+    if not rows:
+        raise ValueError(f"No records in {path}")
+
+    width = max(int(r[2 * nb]) for r in rows)
+    pars = np.zeros((len(rows), width), dtype=np.float64)
+    for i, r in enumerate(rows):
+        vals = r[2 * nb + 1:]
+        pars[i, :len(vals)] = vals
+    lim = np.asarray([r[:2 * nb] for r in rows], dtype=np.float64)
+
+    edges, grid = _Binning.build(lim[:, 0::2], lim[:, 1::2])
+    cols = {
+        "ranges": np.ascontiguousarray(pars[:, :2 * nv]),
+        "params": np.ascontiguousarray(pars[:, 2 * nv:].T),
+        "grid": grid,
+    }
+    for d, e in enumerate(edges):
+        cols[f"edges{d}"] = e
+    meta = {"binvars": binvars, "parvars": parvars, "formula": formula, "level": level}
+    return meta, cols
+
+class JECLevel(object):
+    """
+    One correction level (L1FastJet, L2Relative, L3Absolute, L2L3Residual, ...).
+    """
+    def __init__(self, path, meta=None, columns=None):
+        """
+        Parse 'path', or wrap already-loaded (meta, columns) from read_level_columns /
+        jec_table.load_jec_table (arrays are used as-is, e.g. memory-mapped).
+        """
+        if meta is None or columns is None:
+            meta, columns = read_level_columns(path)
+        self.path = path
+        self.binvars, self.parvars = list(meta["binvars"]), list(meta["parvars"])
+        self.formula, self.level = meta["formula"], meta["level"]
+        edges = [columns[f"edges{d}"] for d in range(len(self.binvars))]
+        self.binning = _Binning(edges, columns["grid"])
+        self.ranges = columns["ranges"]   # clamp limits of the parameter variables
+        self.params = columns["params"]   # (npar, nrecords): one row per [i]
+        self._code = compile_formula(self.formula)
+        # L1FastJet/L3Absolute placeholders ('1'): factor is 1 everywhere, in or out of range
+        self.is_constant_one = self.formula.strip() == "1"
+
+    def evaluate(self, **inputs):
+        """
+        Correction factor per jet; inputs are arrays keyed like _VAR_INPUTS values.
+        """
+        n = len(inputs["pt"])
+        if self.is_constant_one:
+            return np.ones(n)
+        rec = self.binning.index([inputs[_VAR_INPUTS[v]] for v in self.binvars])
+        valid = rec >= 0
+        rec = np.maximum(rec, 0)
+
+        xs = []
+        for i, v in enumerate(self.parvars):
+            lo = self.ranges[:, 2 * i].take(rec)
+            hi = self.ranges[:, 2 * i + 1].take(rec)
+            xs.append(np.clip(inputs[_VAR_INPUTS[v]], lo, hi))
+        xs += [None] * (4 - len(xs))
+        p = self.params.take(rec, axis=1)
+        out = _eval_code(self._code, xs[0], xs[1], xs[2], xs[3], p, n)
+        return np.where(valid, out, 1.0)
+
+class JECChain(object):
+    """
+    FactorizedJetCorrector equivalent over a list of level files (in application order).
+    """
+    def __init__(self, paths):
+        """
+        'paths' are level text files or ready JECLevel objects (e.g. from jec_table.load_jec_level).
+        """
+        self.levels = [p if isinstance(p, JECLevel) else JECLevel(p) for p in paths if p]
+
+    def evaluate(self, pt, eta, area, rho, phi=None, energy=None, npv=None,
+                 per_level=False, chunk=1 << 16):
+        """
+        Total correction factor for raw jets (arrays or scalars).
+        energy defaults to the massless estimate pt*cosh(eta). rho is floored at 0 as in jec::evaluate.
+        per_level=True returns the cumulative factors after each level, shape (nlevels, njets).
+        Work is done in chunks to keep temporaries cache-resident.
+        """
+        pt = np.atleast_1d(np.asarray(pt, dtype=np.float64))
+        n = len(pt)
+        def arr(a, default):
+            if a is None:
+                return default
+            return np.broadcast_to(np.asarray(a, dtype=np.float64), (n,))
+        eta = arr(eta, None)
+        cols = {
+            "eta": eta,
+            "area": arr(area, None),
+            "rho": np.maximum(arr(rho, None), 0.0),
+            "phi": arr(phi, np.zeros(n)),
+            "energy": arr(energy, pt * np.cosh(eta)),
+            "npv": arr(npv, np.zeros(n)),
+        }
+        out = np.empty((len(self.levels), n) if per_level else n, dtype=np.float64)
+        for lo in range(0, n, chunk):
+            hi = min(n, lo + chunk)
+            ins = {k: v[lo:hi] for k, v in cols.items()}
+            ins["pt"] = pt[lo:hi].copy()
+            ins["energy"] = ins["energy"].copy()
+            scale = np.ones(hi - lo)
+            for il, lvl in enumerate(self.levels):
+                f = lvl.evaluate(**ins)
+                scale *= f
+                ins["pt"] *= f
+                ins["energy"] *= f
+                if per_level:
+                    out[il, lo:hi] = scale
+            if not per_level:
+                out[lo:hi] = scale
+        return out
+
+class JECUncertainty(object):
+    """
+    JetCorrectionUncertainty equivalent: records of (pt, up, down) triplets binned in eta,
+    linearly interpolated in pt and clamped to the edge values outside the table.
+    """
+    def __init__(self, path):
+        header, rows = _read_records(path)
+        self.path = path
+        self.binvars, self.parvars, _, self.level = _parse_header(header, path)
+        if self.binvars != ["JetEta"] or self.parvars != ["JetPt"]:
+            raise ValueError(f"Only JetEta-binned / JetPt uncertainty tables are supported: {path}")
+        self.mins = np.asarray([r[0] for r in rows])
+        self.maxs = np.asarray([r[1] for r in rows])
+        self.binning = _Binning(*_Binning.build(self.mins[:, None], self.maxs[:, None]))
+        self.tables = []
+        for r in rows:
+            trip = np.asarray(r[3:3 + int(r[2])], dtype=np.float64).reshape(-1, 3)
+            self.tables.append(trip)
+
+    def evaluate(self, pt_corr, eta, up=True):
+        """
+        Relative uncertainty per jet (0 outside the eta range). pt is floored at 1 like jec::evaluate.
+        """
+        pt = np.maximum(np.atleast_1d(np.asarray(pt_corr, dtype=np.float64)), 1.0)
+        eta = np.broadcast_to(np.asarray(eta, dtype=np.float64), pt.shape)
+        rec = self.binning.index([eta])
+        out = np.zeros(len(pt))
+        if not len(pt):
+            return out
+        col = 1 if up else 2
+        # group jets by eta record once instead of one full mask per record
+        order = np.argsort(rec, kind="stable")
+        srec = rec[order]
+        bounds = np.flatnonzero(np.diff(srec)) + 1
+        for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(srec)]):
+            b = srec[lo]
+            if b < 0:
+                continue
+            tab = self.tables[b]
+            idx = order[lo:hi]
+            out[idx] = np.interp(pt[idx], tab[:, 0], tab[:, col])
+        return np.maximum(out, 0.0)
+
+# ---------- validation against cmsRun logs ----------
+_LOG_RE = re.compile(
+    r"eta=(?P<eta>\S+)\s+pt_raw=(?P<pt>\S+)\s+area=(?P<area>\S+)\s+rho=(?P<rho>\S+)\s*\|\s*JEC=(?P<jec>\S+)"
+    r"\s+pt_corr=\S+\s*\|\s*JES_rel=(?P<unc>\S+)")
+
+def parse_jec_log(text):
+    """
+    Extract (eta, pt_raw, area, rho, jec, jes_rel) rows from jec::log::printJet lines.
+    """
+    rows = [[float(m.group(k)) for k in ("eta", "pt", "area", "rho", "jec", "unc")]
+            for m in _LOG_RE.finditer(text)]
+    return np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="Compare the numpy JEC chain with cmsRun printJet log lines.")
+    ap.add_argument("--validate-log", required=True, help="cmsRun log with printJECInfo=True output")
+    ap.add_argument("--unc", default=None, help="Uncertainty txt (optional)")
+    ap.add_argument("--tol", type=float, default=1e-4, help="Max allowed relative deviation")
+    ap.add_argument("levels", nargs="+", help="JEC level txt files in application order")
+    args = ap.parse_args(argv)
+
+    with open(args.validate_log) as f:
+        ref = parse_jec_log(f.read())
+    if not len(ref):
+        print("No printJet lines found in log.", file=sys.stderr)
+        return 2
+    chain = JECChain(args.levels)
+    jec = chain.evaluate(ref[:, 1], ref[:, 0], ref[:, 2], ref[:, 3])
+    dev = np.abs(jec / ref[:, 4] - 1.0)
+    print(f"jets: {len(ref)}  max |rel dev| JEC: {dev.max():.3g}")
+    worst = dev.max()
+    if args.unc:
+        unc = JECUncertainty(args.unc).evaluate(ref[:, 1] * jec, ref[:, 0])
+        dunc = np.abs(unc - ref[:, 5])
+        print(f"max |abs dev| JES_rel: {dunc.max():.3g}")
+        worst = max(worst, dunc.max())
+    return 0 if worst <= args.tol else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Binary columnar tables for JEC level text files.
+
+A '<file>.txt.jtab' next to each text file holds exactly what jec_evaluator.JECLevel
+needs (axis edges, record grid, clamp ranges, parameter matrix) plus a JSON header with
+the formula, the variable lists and the checksum of the source text:
+
+  8 bytes   magic 'JECTAB01'
+  8 bytes   little-endian uint64 header length
+  header    JSON: version, source {name, size, mtime_ns, sha256}, meta, columns {name: [offset, dtype, shape]}
+  columns   raw C-order arrays, each starting on a 64-byte boundary
+
+Loading maps the file once and returns numpy views into it (no parsing, no copies):
+
+  lvl = load_jec_level("Winter24Run3_V1_MC_L2Relative_AK4PFPuppi.txt")  # table if fresh, else text
+
+Tables are produced by jec_utils.convert_jec_tables (or this module's CLI):
+  python3 jec_table.py --list ../../../data/cfg/data_jec_list.txt --era 2024F
+"""
+
+import hashlib, json, os, struct, sys, tempfile
+
+import numpy as np
+
+try:
+    from .jec_evaluator import JECLevel, read_level_columns
+except ImportError:  # run as a script / from the configs directory
+    from jec_evaluator import JECLevel, read_level_columns
+
+__all__ = [
+    "jec_table_path",
+    "write_jec_table",
+    "load_jec_table",
+    "table_is_fresh",
+    "load_jec_level",
+]
+
+_MAGIC = b"JECTAB01"
+_VERSION = 1
+_ALIGN = 64
+_SUFFIX = ".jtab"
+
+def jec_table_path(path):
+    """
+    Location of the binary table for a JEC text file.
+    """
+    return path + _SUFFIX
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _source_info(path):
+    st = os.stat(path)
+    return {"name": os.path.basename(path), "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns, "sha256": _sha256(path)}
+
+def _pad(n):
+    return (-n) % _ALIGN
+
+def write_jec_table(path, out=None):
+    """
+    Convert one JEC level text file; returns the table path.
+    Written to a temp file and renamed, so readers never see a partial table.
+    """
+    out = out or jec_table_path(path)
+    meta, cols = read_level_columns(path)
+
+    # header size depends on the offsets it lists: lay out columns relative to a
+    # reserved header block and grow the reservation until the header fits
+    reserve = 1024
+    while True:
+        offset, layout = 16 + reserve, {}
+        for name, arr in cols.items():
+            offset += _pad(offset)
+            layout[name] = [offset, arr.dtype.str, list(arr.shape)]
+            offset += arr.nbytes
+        header = json.dumps({"version": _VERSION, "source": _source_info(path),
+                             "meta": meta, "columns": layout}).encode()
+        if len(header) <= reserve:
+            break
+        reserve = len(header) + _pad(len(header))
+    header += b" " * (reserve - len(header))
+
+    fd, tmp = tempfile.mkstemp(prefix=".jtab_", dir=os.path.dirname(os.path.abspath(out)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_MAGIC + struct.pack("<Q", reserve) + header)
+            for name, arr in cols.items():
+                f.write(b"\0" * (layout[name][0] - f.tell()))
+                f.write(np.ascontiguousarray(arr).tobytes())
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600
+        os.replace(tmp, out)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return out
+
+def _read_header(table):
+    with open(table, "rb") as f:
+        head = f.read(16)
+        if len(head) != 16 or head[:8] != _MAGIC:
+            raise ValueError(f"Not a JEC table: {table}")
+        (n,) = struct.unpack("<Q", head[8:])
+        blob = json.loads(f.read(n))
+    if blob.get("version") != _VERSION:
+        raise ValueError(f"Unsupported JEC table version {blob.get('version')} in {table}")
+    return blob
+
+def table_is_fresh(path, table=None, verify=False):
+    """
+    True if the table exists and was converted from the current content of 'path'.
+    size + mtime decide by default; verify=True (or an mtime mismatch) compares the sha256.
+    """
+    table = table or jec_table_path(path)
+    try:
+        src = _read_header(table)["source"]
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return False
+    if st.st_size != src["size"]:
+        return False
+    if st.st_mtime_ns == src["mtime_ns"] and not verify:
+        return True
+    # touched (e.g. fresh checkout / CRAB sandbox unpack) but maybe unchanged
+    return _sha256(path) == src["sha256"]
+
+def load_jec_table(table):
+    """
+    Map a table and return (meta, columns, source) with columns as read-only views into the map.
+    """
+    blob = _read_header(table)
+    mm = np.memmap(table, dtype=np.uint8, mode="r")
+    cols = {}
+    for name, (offset, dtype, shape) in blob["columns"].items():
+        dt = np.dtype(dtype)
+        count = int(np.prod(shape, dtype=np.int64))
+        cols[name] = np.frombuffer(mm, dtype=dt, count=count, offset=offset).reshape(shape)
+    return blob["meta"], cols, blob["source"]
+
+def load_jec_level(path, convert=False, verify=False):
+    """
+    JECLevel for a text file, built from its table when that is fresh.
+    convert=True (re)writes a missing/stale table; otherwise the text is parsed.
+    """
+    table = jec_table_path(path)
+    if not table_is_fresh(path, table, verify=verify):
+        if not convert:
+            return JECLevel(path)
+        try:
+            write_jec_table(path, table)
+        except OSError:
+            # read-only area: fall back to the text file
+            return JECLevel(path)
+    meta, cols, _ = load_jec_table(table)
+    return JECLevel(path, meta=meta, columns=cols)
+
+def main(argv=None):
+    import argparse
+    try:
+        from . import jec_utils
+    except ImportError:
+        import jec_utils
+
+    ap = argparse.ArgumentParser(description="Convert JEC level text files to memory-mappable tables.")
+    ap.add_argument("--list", default=None, help="JEC list file (data/cfg/*_jec_list.txt); converts its blocks")
+    ap.add_argument("--era", default=None, help="Only this era block of --list (e.g. 2024F)")
+    ap.add_argument("--force", action="store_true", help="Rewrite tables even if fresh")
+    ap.add_argument("--check", action="store_true", help="Only report stale/missing tables (exit 1 if any)")
+    ap.add_argument("files", nargs="*", help="Level text files")
+    args = ap.parse_args(argv)
+
+    results = []
+    if args.list:
+        results += jec_utils.convert_jec_tables(args.list, era=args.era, force=args.force, dry_run=args.check)
+    results += jec_utils.convert_jec_files(args.files, force=args.force, dry_run=args.check)
+    for src, status in results:
+        print(f"{status:<8} {src}")
+    bad = [r for r in results if r[1] in ("stale", "missing", "notfound")]
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
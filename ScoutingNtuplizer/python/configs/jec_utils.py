@@ -1,4 +1,4 @@
-import os, re
+import bisect, json, os, re, tempfile
 
 __all__ = [
     "infer_era_from_filenames",
@@ -6,8 +6,24 @@ __all__ = [
     "load_jec_config_text",
     "normalize_era_key",
     "get_era_block",
+    "jec_cache_path",
+    "RunIntervalIndex",
+    "veto_map_entries",
+    "file_in_path",
+    "convert_jec_files",
+    "convert_jec_tables",
 ]
 
+# Parsed configs are cached next to the text file ('<file>.cache.json') and in-process.
+# Cache key = file name + mtime + size, so editing the text file invalidates it automatically.
+# The name (not the absolute path) is used so a cache shipped in a CRAB sandbox stays valid.
+_CACHE_SUFFIX  = ".cache.json"
+_CACHE_VERSION = 1
+_memo = {}
+
+# Correction levels that have a binary table (jec_table); 'Unc' uses a different record layout
+_TABLE_LEVELS = ("L1FastJet", "L2Relative", "L3Absolute", "L2L3Residual")
+
 def infer_era_from_filenames(file_names):
     """
     Pull 'Run20XX[A-I]' from input LFNs, e.g. /store/data/Run2024G/...
@@ -48,7 +64,90 @@ def parse_residual_list(s):
         out.append(":".join([a.strip(), b.strip(), rest.strip()]))
     return out
 
-def load_jec_config_text(path):
+class RunIntervalIndex(object):
+    """
+    Sorted, validated index over 'min:max:path' run ranges
+    (min inclusive, max exclusive, -1 = open end; same semantics as the C++ side).
+
+      idx = RunIntervalIndex(block['L2L3Residual'])
+      idx.lookup(382300)   -> path or None
+      idx.gaps()           -> [(lo, hi), ...] uncovered run ranges between IOVs
+      idx.to_vstring()     -> normalized entries, sorted by run, for cms.vstring()
+
+    Overlapping ranges raise ValueError (the C++ picker silently took the first match).
+    """
+    OPEN_LO = 0
+    OPEN_HI = 2**32  # run numbers are unsigned 32-bit
+
+    def __init__(self, entries):
+        rows = []
+        for e in entries:
+            a, b, path = [x.strip() for x in str(e).split(":", 2)]
+            lo, hi = int(a), int(b)
+            lo = self.OPEN_LO if lo < 0 else lo
+            hi = self.OPEN_HI if hi < 0 else hi
+            if hi <= lo:
+                raise ValueError(f"Empty run range in '{e}' (max must be > min)")
+            rows.append((lo, hi, path))
+        rows.sort(key=lambda r: (r[0], r[1]))
+
+        for (lo1, hi1, p1), (lo2, hi2, p2) in zip(rows, rows[1:]):
+            if lo2 < hi1:
+                raise ValueError(f"Overlapping run ranges: [{lo1},{hi1}) {p1} and [{lo2},{hi2}) {p2}")
+
+        self.lows  = [r[0] for r in rows]
+        self.highs = [r[1] for r in rows]
+        self.paths = [r[2] for r in rows]
+
+    def __len__(self):
+        return len(self.paths)
+
+    def find(self, run):
+        """
+        Position of the interval containing 'run', or -1.
+        """
+        i = bisect.bisect_right(self.lows, run) - 1
+        if i >= 0 and run < self.highs[i]:
+            return i
+        return -1
+
+    def lookup(self, run):
+        i = self.find(run)
+        return self.paths[i] if i >= 0 else None
+
+    def find_many(self, runs):
+        """
+        Vectorized find() over an array of runs (needs numpy); -1 where uncovered.
+        """
+        import numpy as np
+        runs = np.asarray(runs, dtype=np.int64)
+        i = np.searchsorted(np.asarray(self.lows, dtype=np.int64), runs, side="right") - 1
+        ok = (i >= 0) & (runs < np.asarray(self.highs, dtype=np.int64)[np.maximum(i, 0)])
+        return np.where(ok, i, -1)
+
+    def gaps(self):
+        """
+        Uncovered [lo, hi) ranges between the first and last interval.
+        """
+        out = []
+        for hi, lo in zip(self.highs, self.lows[1:]):
+            if lo > hi:
+                out.append((hi, lo))
+        return out
+
+    def to_vstring(self):
+        """
+        Normalized 'min:max:path' strings sorted by run (open ends written as -1),
+        so the analyzer can binary-search them without re-validating.
+        """
+        out = []
+        for lo, hi, path in zip(self.lows, self.highs, self.paths):
+            a = -1 if lo == self.OPEN_LO else lo
+            b = -1 if hi == self.OPEN_HI else hi
+            out.append(f"{a}:{b}:{path}")
+        return out
+
+def _parse_jec_config_text(path):
     """
     Parse your free-form JEC text file into:
       { 'Run2024F': {'L1FastJet':..., 'L2Relative':..., 'L3Absolute':...,
@@ -60,9 +159,6 @@ def load_jec_config_text(path):
       #---- era:  2025C:
     """
     db = {}
-    if not os.path.isfile(path):
-        return db
-
     cur = None
     in_list = False
     buf = []
@@ -120,13 +216,152 @@ def load_jec_config_text(path):
 
     return db
 
+def veto_map_entries(block):
+    """
+    'JetVetoMap' of an era block as a list of 'min:max:path' (or plain path) strings.
+    The list file writes it like L2L3Residual ('[ -1:-1:file.json ]') but it is stored as text.
+    """
+    v = block.get("JetVetoMap", [])
+    if isinstance(v, str):
+        v = parse_residual_list(v) if v.strip().startswith("[") else [v]
+    return [str(x).strip() for x in v if str(x).strip()]
+
+def jec_cache_path(path):
+    """
+    Location of the compiled cache for a JEC list file.
+    """
+    return path + _CACHE_SUFFIX
+
+def _cache_key(path):
+    st = os.stat(path)
+    return [os.path.basename(path), st.st_mtime_ns, st.st_size]
+
+def _read_cache(path, key):
+    try:
+        with open(jec_cache_path(path), "r") as f:
+            blob = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if blob.get("version") != _CACHE_VERSION or blob.get("key") != key:
+        return None
+    return blob.get("db")
+
+def _write_cache(path, key, db):
+    # Atomic replace; silently skip on read-only areas (e.g. some grid sandboxes)
+    target = jec_cache_path(path)
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(prefix=".jec_cache_", dir=os.path.dirname(os.path.abspath(target)))
+        with os.fdopen(fd, "w") as f:
+            json.dump({"version": _CACHE_VERSION, "key": key, "db": db}, f)
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600
+        os.replace(tmp, target)
+    except OSError:
+        if tmp and os.path.exists(tmp):
+            os.unlink(tmp)
+
+def load_jec_config_text(path, use_cache=True):
+    """
+    Load a JEC list file (see _parse_jec_config_text for the format).
+    With use_cache=True the parsed result is memoized in-process and persisted
+    to '<path>.cache.json'; both are invalidated when the file's mtime/size change.
+    Returns {} if the file does not exist.
+    """
+    if not os.path.isfile(path):
+        return {}
+    if not use_cache:
+        return _parse_jec_config_text(path)
+
+    key = _cache_key(path)
+    memo_key = os.path.abspath(path)
+    hit = _memo.get(memo_key)
+    if hit is None or hit[0] != key:
+        db = _read_cache(path, key)
+        if db is None:
+            db = _parse_jec_config_text(path)
+            _write_cache(path, key, db)
+        hit = (key, db)
+        _memo[memo_key] = hit
+    # callers may mutate the blocks; never hand out the memoized object
+    return {era: {k: (list(v) if isinstance(v, list) else v) for k, v in blk.items()}
+            for era, blk in hit[1].items()}
+
 def get_era_block(db, era_hint):
     """
     Resolve the block for 'era_hint' (normalize to Run20XX?).
+    'db' is a parsed dict or a JEC list path (loaded through the cache).
     Return {} if not found.
     """
+    if isinstance(db, str):
+        db = load_jec_config_text(db)
     key = normalize_era_key(era_hint) if era_hint else ""
     if key and key in db:
         return db[key]
     return {}
 
+
+def file_in_path(path):
+    """
+    Resolve a config path the way edm::FileInPath does ('DijetScoutingRun3NTupleMaker/data/...'
+    relative to $CMSSW_SEARCH_PATH / $CMSSW_BASE/src), falling back to this checkout.
+    Returns the path unchanged if nothing matches.
+    """
+    if os.path.isabs(path) or os.path.isfile(path):
+        return path
+    roots = [r for r in os.environ.get("CMSSW_SEARCH_PATH", "").split(":") if r]
+    roots += [os.path.join(os.environ[v], "src") for v in ("CMSSW_BASE", "CMSSW_RELEASE_BASE") if os.environ.get(v)]
+    for root in roots:
+        cand = os.path.join(root, path)
+        if os.path.isfile(cand):
+            return cand
+    # standalone checkout: <repo>/data/... for 'DijetScoutingRun3NTupleMaker/data/...'
+    repo = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../.."))
+    parts = path.split("/", 1)
+    if len(parts) == 2:
+        cand = os.path.join(repo, parts[1])
+        if os.path.isfile(cand):
+            return cand
+    return path
+
+def convert_jec_files(paths, force=False, dry_run=False):
+    """
+    Write binary tables (jec_table) for JEC level text files.
+    Returns [(path, status)], status in 'fresh', 'written', 'stale'/'missing' (dry_run), 'notfound'.
+    """
+    try:
+        from . import jec_table
+    except ImportError:
+        import jec_table
+    out = []
+    for p in paths:
+        src = file_in_path(p)
+        if not os.path.isfile(src):
+            out.append((p, "notfound"))
+            continue
+        table = jec_table.jec_table_path(src)
+        if not force and jec_table.table_is_fresh(src, table):
+            out.append((src, "fresh"))
+        elif dry_run:
+            out.append((src, "stale" if os.path.exists(table) else "missing"))
+        else:
+            jec_table.write_jec_table(src, table)
+            out.append((src, "written"))
+    return out
+
+def convert_jec_tables(db, era=None, force=False, dry_run=False):
+    """
+    Convert every correction-level file referenced by a JEC list (path or parsed dict),
+    or only by the 'era' block. Each file is handled once even if shared by several eras.
+    """
+    if isinstance(db, str):
+        db = load_jec_config_text(db)
+    blocks = [get_era_block(db, era)] if era else list(db.values())
+    paths = []
+    for blk in blocks:
+        for level in _TABLE_LEVELS:
+            v = blk.get(level)
+            if not v:
+                continue
+            files = [e.split(":", 2)[2].strip() for e in v] if isinstance(v, list) else [v]
+            paths += [f for f in files if f and f not in paths]
+    return convert_jec_files(paths, force=force, dry_run=dry_run)
@@ -0,0 +1,375 @@
+"""
+Jet veto maps compiled into one dense, memory-mappable grid.
+
+Sources:
+  - correctionlib JSON (schema v2, e.g. data/jetvetomap/jetvetomaps_2024BCDEFGHI.json):
+    category node 'type' -> multibinning over (eta, phi); non-zero content = vetoed
+  - ROOT file with TH2 maps (e.g. jetvetomaps_2025CDE_V2M.root), read with uproot.
+    The TH2 convention is the INVERSE of the JSON one: content < 0.5 = vetoed (1 = good, 0 = bad),
+    because that is how jetveto::flagFromMap reads the ROOT file when no grid is used. Axis roles
+    and the phi convention also follow flagFromMap, so the grid gives the analyzer's decisions
+    (check_veto_grid() compares them, compile_veto_map() runs it)
+
+Either way the grid stores 1 = vetoed (tests/test_jetveto_grid.py covers both sources).
+
+Output '<source>.vgrid' (little-endian), also read by jetveto::loadTH2FromGrid in the analyzer:
+
+  0   8s   magic 'JVGRID01'
+  8   u32  version (2), u32 nmaps, u32 neta, u32 nphi
+  24  i64  source size, i64 source mtime_ns, 32s source sha256
+  80  nmaps x (32s name, u8 flow, 7x pad)      flow: 0 = outside not vetoed, 1 = vetoed, 2 = clamp
+      f64  eta edges [neta+1], f64 phi edges [nphi+1]
+      u8   mask [nmaps][neta][nphi]            1 = vetoed
+
+Only the 'jetvetomap*' flavours are kept (pull/asymmetry maps are not veto decisions).
+
+  grid = load_veto_grid("jetvetomaps_2024BCDEFGHI.json", convert=True)
+  veto = grid.is_vetoed(eta, phi)             # 'jetvetomap' unless map_type= is given
+"""
+
+import hashlib, json, math, os, struct, sys, tempfile
+
+import numpy as np
+
+try:
+    from .jec_evaluator import _Axis
+except ImportError:  # run as a script / from the configs directory
+    from jec_evaluator import _Axis
+
+__all__ = [
+    "veto_grid_path",
+    "compile_veto_map",
+    "grid_is_fresh",
+    "check_veto_grid",
+    "VetoGrid",
+    "load_veto_grid",
+]
+
+_MAGIC = b"JVGRID01"
+_VERSION = 2   # 1: ROOT maps compiled with non-zero = vetoed, not the analyzer's convention
+_HEADER = struct.Struct("<8sIIIIqq32s")   # 80 bytes
+_MAPREC = struct.Struct("<32sB7x")        # 40 bytes
+_SUFFIX = ".vgrid"
+_NAME_LEN = 32
+RECOMMENDED = "jetvetomap"
+FLOW_NONE, FLOW_VETO, FLOW_CLAMP = 0, 1, 2
+
+def veto_grid_path(path):
+    """
+    Location of the compiled grid for a veto map file.
+    """
+    return path + _SUFFIX
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.digest()
+
+def _edges(spec):
+    # correctionlib: explicit list or {'n', 'low', 'high'}
+    if isinstance(spec, dict):
+        return np.linspace(spec["low"], spec["high"], int(spec["n"]) + 1)
+    return np.asarray(spec, dtype=np.float64)
+
+def _flow(flow):
+    if flow == "clamp":
+        return FLOW_CLAMP
+    if isinstance(flow, (int, float)):
+        return FLOW_VETO if flow != 0 else FLOW_NONE
+    return FLOW_NONE  # 'error': the analyzer treats out-of-range jets as not vetoed
+
+def _read_json(path):
+    with open(path, "r") as f:
+        doc = json.load(f)
+    maps = []
+    for corr in doc.get("corrections", []):
+        node = corr["data"]
+        if node.get("nodetype") != "category":
+            raise ValueError(f"{path}: expected a category node over the map type in '{corr['name']}'")
+        for item in node["content"]:
+            name, v = item["key"], item["value"]
+            if not name.startswith(RECOMMENDED):
+                continue
+            if v.get("nodetype") != "multibinning" or sorted(v["inputs"]) != ["eta", "phi"]:
+                raise ValueError(f"{path}: map '{name}' is not an (eta, phi) multibinning")
+            edges = [_edges(e) for e in v["edges"]]
+            content = np.asarray(v["content"], dtype=np.float64)
+            if not content.size or len(content) != (len(edges[0]) - 1) * (len(edges[1]) - 1):
+                raise ValueError(f"{path}: map '{name}' has non-numeric or mis-sized content")
+            # correctionlib flattens with the last input fastest
+            vals = content.reshape(len(edges[0]) - 1, len(edges[1]) - 1)
+            if v["inputs"][0] == "phi":
+                edges, vals = edges[::-1], vals.T
+            maps.append((name, edges[0], edges[1], vals != 0, _flow(v.get("flow", 0.0))))
+    return maps
+
+def _looks_eta(e):
+    return e[0] < -4.0 and e[-1] > 4.0
+
+def _looks_phi(e):
+    return (e[0] <= -3.3 and e[-1] >= 3.0) or (e[0] >= -0.2 and 5.8 < e[-1] < 6.6)
+
+def _read_root(path):
+    try:
+        import uproot
+    except ImportError:
+        raise ImportError("uproot is needed to compile ROOT veto maps (pip install uproot)")
+    maps = []
+    with uproot.open(path) as f:
+        for key, cls in f.classnames().items():
+            name = key.split(";")[0]
+            if not cls.startswith("TH2") or any(m[0] == name for m in maps):
+                continue
+            h = f[key]
+            x, y, vals = h.axis(0).edges(), h.axis(1).edges(), h.values()
+            # same axis-role heuristic as jetveto::flagFromMap: X=eta unless X looks like phi and Y like eta
+            if _looks_phi(x) and _looks_eta(y):
+                x, y, vals = y, x, vals.T
+            maps.append((name, np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64), vals < 0.5, FLOW_NONE))
+    vetos = [m for m in maps if m[0].startswith(RECOMMENDED)]
+    return vetos or maps
+
+def compile_veto_map(path, out=None):
+    """
+    Compile a JSON or ROOT veto map file into '<path>.vgrid'; returns (grid path, skipped map names).
+    Maps whose binning differs from the recommended one are skipped. A grid compiled from ROOT
+    is checked against the TH2s (check_veto_grid) and not written if any decision differs.
+    """
+    out = out or veto_grid_path(path)
+    maps = _read_root(path) if path.endswith(".root") else _read_json(path)
+    if not maps:
+        raise ValueError(f"No veto maps found in {path}")
+    ref = next((m for m in maps if m[0] == RECOMMENDED), maps[0])
+    keep = [m for m in maps if np.array_equal(m[1], ref[1]) and np.array_equal(m[2], ref[2])]
+    skipped = [m[0] for m in maps if m not in keep]
+    for m in keep:
+        if len(m[0].encode()) > _NAME_LEN:
+            raise ValueError(f"Map name too long for the grid format: {m[0]}")
+
+    st = os.stat(path)
+    eta, phi = ref[1], ref[2]
+    head = _HEADER.pack(_MAGIC, _VERSION, len(keep), len(eta) - 1, len(phi) - 1,
+                        st.st_size, st.st_mtime_ns, _sha256(path))
+    fd, tmp = tempfile.mkstemp(prefix=".vgrid_", dir=os.path.dirname(os.path.abspath(out)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(head)
+            for m in keep:
+                f.write(_MAPREC.pack(m[0].encode(), m[4]))
+            f.write(eta.astype("<f8").tobytes())
+            f.write(phi.astype("<f8").tobytes())
+            for m in keep:
+                f.write(np.ascontiguousarray(m[3], dtype=np.uint8).tobytes())
+        if path.endswith(".root"):
+            bad = {k: n for k, n in check_veto_grid(path, tmp).items() if n}
+            if bad:
+                raise ValueError(f"{path}: grid decisions differ from the TH2s ("
+                                 + ", ".join(f"{k}: {n}" for k, n in bad.items()) + ")")
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600
+        os.replace(tmp, out)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return out, skipped
+
+def _read_grid_header(grid):
+    with open(grid, "rb") as f:
+        raw = f.read(_HEADER.size)
+    if len(raw) != _HEADER.size or raw[:8] != _MAGIC:
+        raise ValueError(f"Not a veto grid: {grid}")
+    magic, version, nmaps, neta, nphi, size, mtime_ns, sha = _HEADER.unpack(raw)
+    if version != _VERSION:
+        raise ValueError(f"Unsupported veto grid version {version} in {grid}")
+    return nmaps, neta, nphi, size, mtime_ns, sha
+
+def grid_is_fresh(path, grid=None, verify=False):
+    """
+    True if the grid exists and was compiled from the current content of 'path'
+    (size + mtime, sha256 when only the mtime differs or verify=True).
+    """
+    grid = grid or veto_grid_path(path)
+    try:
+        _, _, _, size, mtime_ns, sha = _read_grid_header(grid)
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return False
+    if st.st_size != size:
+        return False
+    if st.st_mtime_ns == mtime_ns and not verify:
+        return True
+    return _sha256(path) == sha
+
+class VetoGrid(object):
+    """
+    Memory-mapped view of a '.vgrid' file; masks are read-only views into the map.
+    """
+    def __init__(self, grid):
+        nmaps, neta, nphi, _, _, _ = _read_grid_header(grid)
+        mm = np.memmap(grid, dtype=np.uint8, mode="r")
+        pos = _HEADER.size
+        self.path = grid
+        self.names, self.flows = [], []
+        for _ in range(nmaps):
+            name, flow = _MAPREC.unpack_from(mm, pos)
+            self.names.append(name.rstrip(b"\0").decode())
+            self.flows.append(flow)
+            pos += _MAPREC.size
+        self.eta_edges = np.frombuffer(mm, dtype="<f8", count=neta + 1, offset=pos)
+        pos += 8 * (neta + 1)
+        self.phi_edges = np.frombuffer(mm, dtype="<f8", count=nphi + 1, offset=pos)
+        pos += 8 * (nphi + 1)
+        self.masks = np.frombuffer(mm, dtype=np.uint8, count=nmaps * neta * nphi, offset=pos).reshape(nmaps, neta, nphi)
+        self._eta = _Axis(self.eta_edges)
+        self._phi = _Axis(self.phi_edges)
+        span = self.phi_edges[-1] - self.phi_edges[0]
+        # full-circle phi axis: fold any phi convention onto it
+        self._period = span if abs(span - 2 * math.pi) < 1e-3 else None
+
+    def _map_index(self, map_type):
+        try:
+            return self.names.index(map_type)
+        except ValueError:
+            raise KeyError(f"No map '{map_type}' in {self.path} (have: {', '.join(self.names)})")
+
+    def mask(self, map_type=RECOMMENDED):
+        """
+        (neta, nphi) uint8 mask, 1 = vetoed.
+        """
+        return self.masks[self._map_index(map_type)]
+
+    def is_vetoed(self, eta, phi, map_type=RECOMMENDED):
+        """
+        Boolean veto decision per (eta, phi); same shape as the broadcast inputs.
+        """
+        k = self._map_index(map_type)
+        eta = np.asarray(eta, dtype=np.float64)
+        phi = np.asarray(phi, dtype=np.float64)
+        eta, phi = np.broadcast_arrays(eta, phi)
+        shape = eta.shape
+        eta, phi = eta.ravel(), phi.ravel()
+        if self._period is not None:
+            phi = self.phi_edges[0] + np.mod(phi - self.phi_edges[0], self._period)
+        ie, ok_e = self._eta.index(eta)
+        ip, ok_p = self._phi.index(phi)
+        out = self.masks[k][ie, ip].astype(bool)
+        if self.flows[k] != FLOW_CLAMP:
+            out = np.where(ok_e & ok_p, out, self.flows[k] == FLOW_VETO)
+        return out.reshape(shape)
+
+def _flag_from_th2(x, y, vals, eta, phi):
+    # numpy port of jetveto::flagFromMap for a TH2 with edges x, y and contents vals[ix, iy]
+    def wrap(p, e):
+        if e[0] >= -0.2 and e[-1] > 5.8:
+            p = np.where(p < 0, p + 2 * math.pi, p)
+            p = np.where(p < e[0], e[0], p)
+            p = np.where(p > e[-1], e[-1] - 1e-6, p)
+        return p
+
+    if _looks_phi(x) and _looks_eta(y):
+        xq, yq = wrap(phi, x), eta
+    else:
+        xq, yq = eta, wrap(phi, y)
+    bx = np.searchsorted(x, xq, side="right")   # TAxis::FindBin: 0 underflow, n+1 overflow
+    by = np.searchsorted(y, yq, side="right")
+    ok = (bx >= 1) & (bx < len(x)) & (by >= 1) & (by < len(y))
+    v = vals[np.clip(bx - 1, 0, len(x) - 2), np.clip(by - 1, 0, len(y) - 2)]
+    return ok & (v < 0.5)
+
+def check_veto_grid(path, grid=None):
+    """
+    Compare the decisions of a grid with jetveto::flagFromMap on the TH2s of the ROOT file it was
+    compiled from; returns {map name: number of differing (eta, phi) points}. The points are the
+    bin centres (phi also in [-pi, pi)) and a few outside the eta range.
+    """
+    try:
+        import uproot
+    except ImportError:
+        raise ImportError("uproot is needed to read ROOT veto maps (pip install uproot)")
+    g = VetoGrid(grid or veto_grid_path(path))
+    out = {}
+    with uproot.open(path) as f:
+        for name in g.names:
+            h = f[name]
+            x, y, vals = h.axis(0).edges(), h.axis(1).edges(), h.values()
+            ex, ey = (y, x) if _looks_phi(x) and _looks_eta(y) else (x, y)
+            eta = np.concatenate([0.5 * (ex[1:] + ex[:-1]), [ex[0] - 1.0, ex[-1] + 1.0]])
+            phi = 0.5 * (ey[1:] + ey[:-1])
+            phi = np.concatenate([phi, np.where(phi >= math.pi, phi - 2 * math.pi, phi)])
+            eta, phi = np.meshgrid(eta, phi, indexing="ij")
+            ref = _flag_from_th2(x, y, vals, eta, phi)
+            out[name] = int(np.count_nonzero(ref != g.is_vetoed(eta, phi, name)))
+    return out
+
+def load_veto_grid(path, convert=False, verify=False):
+    """
+    VetoGrid for a '.vgrid' file or for a JSON/ROOT source with a fresh compiled grid.
+    convert=True compiles a missing/stale grid (in a temp dir if the source dir is read-only).
+    """
+    if path.endswith(_SUFFIX):
+        return VetoGrid(path)
+    grid = veto_grid_path(path)
+    if not grid_is_fresh(path, grid, verify=verify):
+        if not convert:
+            raise ValueError(f"No up-to-date veto grid for {path} (compile it or pass convert=True)")
+        try:
+            compile_veto_map(path, grid)
+        except OSError:
+            grid = os.path.join(tempfile.mkdtemp(prefix="vgrid_"), os.path.basename(grid))
+            compile_veto_map(path, grid)
+    return VetoGrid(grid)
+
+def main(argv=None):
+    import argparse
+    try:
+        from . import jec_utils
+    except ImportError:
+        import jec_utils
+
+    ap = argparse.ArgumentParser(description="Compile jet veto maps (JSON/ROOT) into memory-mappable grids.")
+    ap.add_argument("--list", default=None, help="JEC list file; compiles the JetVetoMap files of its blocks")
+    ap.add_argument("--era", default=None, help="Only this era block of --list (e.g. 2024F)")
+    ap.add_argument("--force", action="store_true", help="Recompile even if fresh")
+    ap.add_argument("--check", action="store_true", help="Only report stale/missing grids (exit 1 if any)")
+    ap.add_argument("files", nargs="*", help="Veto map files (.json / .root)")
+    args = ap.parse_args(argv)
+
+    paths = list(args.files)
+    if args.list:
+        db = jec_utils.load_jec_config_text(args.list)
+        blocks = [jec_utils.get_era_block(db, args.era)] if args.era else list(db.values())
+        for blk in blocks:
+            for e in jec_utils.veto_map_entries(blk):
+                p = e.split(":", 2)[2].strip() if e.count(":") >= 2 else e
+                if p not in paths:
+                    paths.append(p)
+
+    rc = 0
+    for p in paths:
+        src = jec_utils.file_in_path(p)
+        if not os.path.isfile(src):
+            print(f"notfound {p}")
+            rc = 1
+            continue
+        if not args.force and grid_is_fresh(src):
+            print(f"fresh    {src}")
+        elif args.check:
+            print(f"{'stale' if os.path.exists(veto_grid_path(src)) else 'missing':<8} {src}")
+            rc = 1
+        else:
+            try:
+                out, skipped = compile_veto_map(src)
+            except (ImportError, ValueError) as e:
+                print(f"failed   {src}: {e}")
+                rc = 1
+                continue
+            grid = VetoGrid(out)
+            print(f"written  {out}  ({len(grid.eta_edges) - 1}x{len(grid.phi_edges) - 1}, maps: {', '.join(grid.names)})")
+            if skipped:
+                print(f"         skipped (different binning): {', '.join(skipped)}")
+    return rc
+
+if __name__ == "__main__":
+    sys.exit(main())
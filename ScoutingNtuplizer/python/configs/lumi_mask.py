@@ -0,0 +1,275 @@
+"""
+Lumi masks (golden JSONs) as sorted, disjoint half-open intervals over (run << 32 | lumi).
+
+  golden = LumiMask.from_file("data/json/Cert_Collisions2024_378981_386951_Golden.json")
+  era    = golden & LumiMask.from_runs(381384, 383780)      # runs [lo, hi), -1 = open
+  parts  = split_by_iov(era, block["L2L3Residual"])          # [(lo, hi, path, LumiMask), ...]
+  parts[0][3].write("mask_nib1.json")
+
+Masks support | (union), & (intersection) and - (difference); the operations are a single
+vectorized sweep over the interval endpoints. Run ranges use the RunIntervalIndex convention
+(min inclusive, max exclusive, -1 = open end), so residual IOVs from the JEC lists can be
+used directly. Only masks whose intervals stay inside single runs can be written as JSON;
+intersect a run range with a lumi mask before writing.
+
+Command line (set operations left to right, optional per-IOV split):
+  python3 lumi_mask.py golden.json --runs 381384:383780 --split-iov data/cfg/data_jec_list.txt \\
+      --era 2024F -o masks/golden_2024F
+"""
+
+import json, os, sys, tempfile
+
+import numpy as np
+
+try:
+    from .jec_utils import RunIntervalIndex, get_era_block
+except ImportError:
+    from jec_utils import RunIntervalIndex, get_era_block
+
+__all__ = [
+    "LumiMask",
+    "split_by_iov",
+    "era_iov_masks",
+]
+
+_SHIFT = 32
+_LUMI = (1 << _SHIFT) - 1
+_END = np.iinfo(np.int64).max
+
+def _run_key(run):
+    # first key of 'run'; an open upper end (RunIntervalIndex.OPEN_HI) maps past every run
+    return _END if run >= RunIntervalIndex.OPEN_HI else int(run) << _SHIFT
+
+def _merge(starts, ends):
+    # sort and merge overlapping/adjacent intervals
+    if len(starts) == 0:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    order = np.argsort(starts, kind="stable")
+    s, e = starts[order], ends[order]
+    reach = np.maximum.accumulate(e)
+    new = np.concatenate([[True], s[1:] > reach[:-1]])
+    first = np.flatnonzero(new)
+    last = np.concatenate([first[1:] - 1, [len(s) - 1]])
+    return s[first], reach[last]
+
+def _covers(mask, points):
+    i = np.searchsorted(mask.starts, points, side="right") - 1
+    return (i >= 0) & (points < mask.ends[np.maximum(i, 0)]) if len(mask.starts) else np.zeros(len(points), bool)
+
+class LumiMask(object):
+    """
+    Set of (run, lumi); 'starts'/'ends' are sorted, disjoint int64 keys (end exclusive).
+    """
+    def __init__(self, starts=(), ends=()):
+        s = np.asarray(starts, dtype=np.int64)
+        e = np.asarray(ends, dtype=np.int64)
+        keep = e > s
+        self.starts, self.ends = _merge(s[keep], e[keep])
+
+    # ---------- construction ----------
+    @classmethod
+    def from_dict(cls, d):
+        """
+        Golden-JSON dict {"run": [[first, last], ...]} (lumi ranges inclusive).
+        """
+        starts, ends = [], []
+        for run, ranges in d.items():
+            base = int(run) << _SHIFT
+            for a, b in ranges:
+                starts.append(base + int(a))
+                ends.append(base + int(b) + 1)
+        return cls(starts, ends)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_pairs(cls, runs, lumis):
+        """
+        Mask of the given (run, lumi) pairs (duplicates and order do not matter).
+        """
+        keys = np.unique((np.asarray(runs, dtype=np.int64) << _SHIFT) | np.asarray(lumis, dtype=np.int64))
+        return cls(keys, keys + 1)
+
+    @classmethod
+    def from_runs(cls, lo=-1, hi=-1):
+        """
+        Every lumi of runs [lo, hi); -1 leaves that end open.
+        """
+        lo = RunIntervalIndex.OPEN_LO if lo < 0 else lo
+        hi = RunIntervalIndex.OPEN_HI if hi < 0 else hi
+        return cls([_run_key(lo)], [_run_key(hi)])
+
+    # ---------- set operations ----------
+    def _combine(self, other, keep):
+        pts = np.unique(np.concatenate([self.starts, self.ends, other.starts, other.ends]))
+        if len(pts) < 2:
+            return LumiMask()
+        lo, hi = pts[:-1], pts[1:]
+        k = keep(_covers(self, lo), _covers(other, lo))
+        return LumiMask(lo[k], hi[k])
+
+    def union(self, other):
+        return self._combine(other, lambda a, b: a | b)
+
+    def intersection(self, other):
+        return self._combine(other, lambda a, b: a & b)
+
+    def difference(self, other):
+        return self._combine(other, lambda a, b: a & ~b)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def restrict_runs(self, lo=-1, hi=-1):
+        return self & LumiMask.from_runs(lo, hi)
+
+    # ---------- queries ----------
+    def __bool__(self):
+        return len(self.starts) > 0
+
+    def __eq__(self, other):
+        return (isinstance(other, LumiMask) and np.array_equal(self.starts, other.starts)
+                and np.array_equal(self.ends, other.ends))
+
+    def __repr__(self):
+        lo, hi = self.run_range() if self else (None, None)
+        return f"LumiMask({self.n_runs()} runs, {self.n_lumis()} lumis, runs {lo}-{hi})"
+
+    def contains(self, runs, lumis):
+        """
+        Vectorized membership of (run, lumi) pairs.
+        """
+        keys = (np.asarray(runs, dtype=np.int64) << _SHIFT) | np.asarray(lumis, dtype=np.int64)
+        return _covers(self, np.atleast_1d(keys))
+
+    def __contains__(self, run_lumi):
+        return bool(self.contains([run_lumi[0]], [run_lumi[1]])[0])
+
+    def runs(self):
+        """
+        Sorted run numbers with at least one lumi (JSON-style masks only).
+        """
+        return np.unique(self.starts >> _SHIFT)
+
+    def n_runs(self):
+        return len(self.runs())
+
+    def n_lumis(self):
+        return int((self.ends - self.starts).sum())
+
+    def run_range(self):
+        """
+        (first run, last run + 1), i.e. the CRAB runRange as a half-open interval.
+        """
+        return int(self.starts[0] >> _SHIFT), int((self.ends[-1] - 1) >> _SHIFT) + 1
+
+    # ---------- output ----------
+    def to_dict(self):
+        r0, r1 = self.starts >> _SHIFT, (self.ends - 1) >> _SHIFT
+        if np.any(r0 != r1):
+            raise ValueError("Mask spans whole run ranges; intersect it with a lumi mask before writing")
+        out = {}
+        for run, a, b in zip(r0.tolist(), (self.starts & _LUMI).tolist(), ((self.ends - 1) & _LUMI).tolist()):
+            out.setdefault(str(run), []).append([a, b])
+        return out
+
+    def to_text(self):
+        # golden-JSON compatible, one run per line
+        rows = [f'"{run}": {json.dumps(r)}' for run, r in self.to_dict().items()]
+        return "{\n" + ",\n".join(rows) + "\n}\n"
+
+    def write(self, path):
+        """
+        Atomic write of the JSON mask.
+        """
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".lumimask_", suffix=".tmp", dir=d)
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.to_text())
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return path
+
+def split_by_iov(mask, entries):
+    """
+    [(lo, hi, path, sub-mask)] for each 'min:max:path' IOV (e.g. an era's L2L3Residual list)
+    that keeps at least one lumi of 'mask'; lo/hi as in RunIntervalIndex (0 / 2**32 when open).
+    """
+    idx = RunIntervalIndex(entries)
+    out = []
+    for lo, hi, path in zip(idx.lows, idx.highs, idx.paths):
+        sub = mask & LumiMask([_run_key(lo)], [_run_key(hi)])
+        if sub:
+            out.append((lo, hi, path, sub))
+    return out
+
+def era_iov_masks(mask, jec_list, era, run_range=None):
+    """
+    'mask' restricted to run_range ((lo, hi), -1 = open) and split by the era's L2L3Residual
+    IOVs from a JEC list; a single (-1:-1) IOV gives one part. ValueError if the era is unknown.
+    """
+    block = get_era_block(jec_list, era)
+    if not block or not block.get("L2L3Residual"):
+        raise ValueError(f"No L2L3Residual list for era '{era}' in {jec_list}")
+    if run_range:
+        mask = mask.restrict_runs(*run_range)
+    return split_by_iov(mask, block["L2L3Residual"])
+
+def _run_range_arg(s):
+    a, b = s.split(":", 1)
+    return int(a or -1), int(b or -1)
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Combine golden JSONs, restrict them to run ranges and split by JEC residual IOV.")
+    ap.add_argument("mask", help="Input golden JSON")
+    ap.add_argument("--union", action="append", default=[], metavar="JSON")
+    ap.add_argument("--intersect", action="append", default=[], metavar="JSON")
+    ap.add_argument("--subtract", action="append", default=[], metavar="JSON")
+    ap.add_argument("--runs", type=_run_range_arg, default=None, metavar="LO:HI",
+                    help="Keep runs [LO, HI) (-1 or empty = open end)")
+    ap.add_argument("--split-iov", default=None, metavar="JEC_LIST", help="Split by the era's L2L3Residual IOVs")
+    ap.add_argument("--era", default="", help="Era for --split-iov (e.g. 2024F)")
+    ap.add_argument("-o", "--output", default=None,
+                    help="Output JSON (with --split-iov: prefix, '<prefix>_iov<k>_<lo>-<hi>.json')")
+    args = ap.parse_args(argv)
+
+    mask = LumiMask.from_file(args.mask)
+    for op, paths in (("union", args.union), ("intersection", args.intersect), ("difference", args.subtract)):
+        for p in paths:
+            mask = getattr(mask, op)(LumiMask.from_file(p))
+    if args.runs:
+        mask = mask.restrict_runs(*args.runs)
+    print(f"{args.mask}: {mask!r}")
+
+    if args.split_iov:
+        if not args.era:
+            ap.error("--split-iov needs --era")
+        try:
+            parts = era_iov_masks(mask, args.split_iov, args.era)
+        except ValueError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+        for k, (lo, hi, path, sub) in enumerate(parts):
+            hi_s = "open" if hi == RunIntervalIndex.OPEN_HI else str(hi)
+            line = f"  iov{k} runs [{lo}, {hi_s}): {sub.n_runs()} runs, {sub.n_lumis()} lumis  {os.path.basename(path)}"
+            if args.output:
+                line += "  -> " + sub.write(f"{args.output}_iov{k}_{lo}-{hi_s}.json")
+            print(line)
+    elif args.output:
+        print("  -> " + mask.write(args.output))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Layout-independent reader of ScoutingTreeMakerRun3 ntuples (outputLayout_ in ScoutingTreeMakerRun3.py).
+
+  vector   TTree dijetScouting/events; jet columns are vector<float>/vector<int> branches
+  flat     same TTree; jet columns are jetX[nJet] arrays of the leading outputMaxJets_ jets
+  rntuple  RNTuple 'events' (top level of the file, or dijetScouting/ with ROOT >= 6.34)
+
+All three are read through uproot and come back the same way: one awkward array per column,
+with the per-jet columns jagged (jets sorted by corrected pT) and the 'nJet' counter of the
+flat layout hidden. In 'flat' ntuples nPFJets/htAK4 still count every jet above ptMinPF, so
+use num(jetPtAK4) for the number of stored jets. jet_columns() returns the offsets and the
+decompressed content buffers as numpy views, without copies or Python objects per jet.
+
+  with EventsReader("ntuple.root") as ev:
+      print(ev.layout, ev.num_entries)
+      arrays = ev.arrays(["jetPtAK4", "jetEtaAK4", "mjjAK4"])
+      for chunk in ev.iterate(["jetPtAK4", "htAK4"], step_size=200000):
+          ...
+      counts, cols = ev.jet_columns(["jetPtAK4", "jetEtaAK4"])   # cols["jetPtAK4"]: float32, len counts.sum()
+      bm = ev.trigger_bit_map()                                    # TriggerBitMap (triggerOutput 'bits'/'both')
+"""
+
+import posixpath, sys
+
+import numpy as np
+
+try:
+    from .trigger_bits import BIT_MAP, TriggerBitMap
+except ImportError:
+    from trigger_bits import BIT_MAP, TriggerBitMap
+
+__all__ = [
+    "LAYOUTS",
+    "EventsReader",
+    "find_events",
+]
+
+LAYOUTS = ("vector", "flat", "rntuple")
+TREE = "dijetScouting/events"
+COUNTER = "nJet"
+
+def _layout(f, key, cls):
+    if cls == "ROOT::RNTuple":
+        return "rntuple"
+    if cls == "TTree":
+        return "flat" if COUNTER in f[key].keys() else "vector"
+    return None
+
+def find_events(f):
+    """
+    (key, layout) of the events TTree/RNTuple in an open uproot file.
+    """
+    classes = {k.split(";")[0]: c for k, c in f.classnames().items()}
+    keys = [TREE, "events"] + sorted(k for k in classes if posixpath.basename(k) == "events")
+    for key in keys:
+        layout = _layout(f, key, classes.get(key))
+        if layout:
+            return key, layout
+    raise KeyError(f"No 'events' TTree or RNTuple in {getattr(f, 'file_path', f)}")
+
+class EventsReader(object):
+    """
+    One ntuple (path or open uproot file); 'key' overrides the lookup of find_events().
+    """
+    def __init__(self, path, key=None):
+        import uproot
+
+        self._own = isinstance(path, str)
+        self.file = uproot.open(path) if self._own else path
+        if key:
+            self.key, self.layout = key, _layout(self.file, key, self.file.classname_of(key))
+            if not self.layout:
+                raise KeyError(f"'{key}' is not a TTree or RNTuple")
+        else:
+            self.key, self.layout = find_events(self.file)
+        self.events = self.file[self.key]
+
+    def close(self):
+        if self._own:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def num_entries(self):
+        return self.events.num_entries
+
+    def keys(self):
+        """
+        Column names, the same for every layout (no counters, no sub-branches).
+        """
+        return [k for k in self.events.keys() if k != COUNTER and "/" not in k and "." not in k]
+
+    def _columns(self, columns):
+        have = self.keys()
+        cols = list(columns) if columns else have
+        missing = [c for c in cols if c not in have]
+        if missing:
+            raise KeyError(f"{self.key} ({self.layout}) has no column(s): {', '.join(missing)}")
+        return cols
+
+    def arrays(self, columns=None, entry_start=None, entry_stop=None):
+        """
+        Awkward record array of 'columns' (default all) for entries [entry_start, entry_stop).
+        """
+        cols = self._columns(columns)
+        arr = self.events.arrays(cols, entry_start=entry_start, entry_stop=entry_stop, library="ak")
+        return arr[cols]
+
+    def iterate(self, columns=None, step_size=100000):
+        """
+        arrays() in chunks of 'step_size' entries (or a size such as "100 MB" for TTrees).
+        """
+        cols = self._columns(columns)
+        if not isinstance(step_size, int):
+            step_size = self.events.num_entries_for(step_size, filter_name=cols) if self.layout != "rntuple" else 100000
+        step_size = max(1, step_size)
+        for start in range(0, self.num_entries, step_size):
+            yield self.arrays(cols, start, min(self.num_entries, start + step_size))
+
+    def jet_columns(self, columns, entry_start=None, entry_stop=None):
+        """
+        (jets per event, {column: flat numpy content}) of per-jet columns, as views of the
+        decompressed buffers.
+        """
+        arr = self.arrays(columns, entry_start, entry_stop)
+        counts, out = None, {}
+        for c in columns:
+            layout = arr[c].layout
+            if not hasattr(layout, "offsets"):
+                if not hasattr(layout, "starts"):
+                    raise ValueError(f"'{c}' is not a per-jet column")
+                layout = layout.to_ListOffsetArray64(True)
+            offsets = np.asarray(layout.offsets)
+            out[c] = np.asarray(layout.content.data)[offsets[0]:offsets[-1]]
+            n = np.diff(offsets)
+            if counts is not None and not np.array_equal(counts, n):
+                raise ValueError(f"'{c}' has a different jet multiplicity than '{columns[0]}'")
+            counts = n
+        return counts, out
+
+    def trigger_bit_map(self):
+        """
+        TriggerBitMap written next to the events (dijetScouting/ for a top-level RNTuple).
+        """
+        for tree in (self.key, TREE):
+            if posixpath.join(posixpath.dirname(tree), BIT_MAP) in self.file:
+                return TriggerBitMap.from_file(self.file, tree)
+        return TriggerBitMap.from_file(self.file, self.key)  # raises with the usual message
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Print the output layout, entries and columns of ntuples.")
+    ap.add_argument("files", nargs="+")
+    args = ap.parse_args(argv)
+
+    for path in args.files:
+        with EventsReader(path) as ev:
+            jagged = [k for k in ev.keys() if "var" in str(ev.arrays([k], 0, 1)[k].type)]
+            print(f"{path}: {ev.layout} {ev.key}, {ev.num_entries} events, {len(ev.keys())} columns "
+                  f"({len(jagged)} per jet)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Output profiles of the 'events' tree (outputProfile_ in ScoutingTreeMakerRun3.py).
+
+  default     TFileService defaults (no compression set), flush every ~20 MB; what jobs wrote so far
+  fast-write  LZ4 4: cheapest to write and to read back, largest files
+  analysis    ZSTD 5: about ZLIB size at a fraction of its CPU, fast columnar reads
+  archive     LZMA 8 with large clusters: smallest files for /store/group quota, slow to write and read
+
+Each profile sets the compression of the output file (TFileService) and of every branch of
+outTree_ (so it applies even when the service settings are not used), the tree's auto-flush
+(negative = bytes, positive = entries) and the initial basket size (0 = ROOT's default). ROOT
+still resizes the baskets at the first flush (TTree::OptimizeBaskets).
+
+  p = output_profile("analysis")
+  process.TFileService = cms.Service("TFileService", ..., **tfileservice_params(p, cms))
+  cms.EDAnalyzer('ScoutingTreeMakerRun3', ..., **analyzer_params(p, cms))
+
+Compare the profiles on a reference ntuple: python3 utils/benchmarks/bench_output_profiles.py
+"""
+
+__all__ = [
+    "OUTPUT_PROFILES",
+    "output_profile",
+    "tfileservice_params",
+    "analyzer_params",
+]
+
+MB = 1024 * 1024
+
+OUTPUT_PROFILES = {
+    "default":    {"algorithm": "",     "level": 0, "autoFlush": -20 * MB, "basketSize": 0},
+    "fast-write": {"algorithm": "LZ4",  "level": 4, "autoFlush": -10 * MB, "basketSize": 32000},
+    "analysis":   {"algorithm": "ZSTD", "level": 5, "autoFlush": -20 * MB, "basketSize": 64000},
+    "archive":    {"algorithm": "LZMA", "level": 8, "autoFlush": -50 * MB, "basketSize": 256000},
+}
+
+def output_profile(name):
+    """
+    Settings of profile 'name' (a copy); ValueError for unknown names.
+    """
+    try:
+        return dict(OUTPUT_PROFILES[name], name=name)
+    except KeyError:
+        raise ValueError(f"Unknown outputProfile '{name}' (choose from {', '.join(OUTPUT_PROFILES)})")
+
+def tfileservice_params(profile, cms):
+    """
+    compressionAlgorithm/compressionLevel for the TFileService (none for 'default').
+    """
+    if not profile["algorithm"]:
+        return {}
+    return {"compressionAlgorithm": cms.untracked.string(profile["algorithm"]),
+            "compressionLevel": cms.untracked.int32(profile["level"])}
+
+def analyzer_params(profile, cms):
+    return {"outputCompressionAlgorithm": cms.string(profile["algorithm"]),
+            "outputCompressionLevel": cms.int32(profile["level"]),
+            "outputAutoFlush": cms.int64(profile["autoFlush"]),
+            "outputBasketSize": cms.int32(profile["basketSize"])}
@@ -0,0 +1,214 @@
+"""
+Trigger bitmask output of ScoutingTreeMakerRun3 (triggerOutput = 'bits' | 'both').
+
+Instead of vector<string>/vector<bool> per event the analyzer writes fixed-width masks:
+
+  hltBits[W]   uint64, W = ceil(nbits / 64); bit b is word b // 64, bit b % 64
+  l1Bits[W]    same for the L1 seeds (only with doL1)
+
+HLT bit b is the b-th distinct triggerSelection prefix (HLT_Info with duplicates dropped),
+L1 bit b is l1Seeds[b] (L1Info). A set HLT bit means a menu path starting with that prefix
+fired; a path missing from the menu reads as 0. The bit -> name table is written once per
+file as the TNamed 'triggerBitMap' next to the 'events' tree, one 'kind bit name alias'
+line per bit.
+
+  bm    = TriggerBitMap.from_file("ntuple.root", tree="dijetScouting/events")
+  jetht = bm.fired(arrays["hltBits"], "PFScouting_JetHT")   # bool per event
+  table = bm.decode(arrays["l1Bits"], kind="L1")             # {seed: bool per event}
+"""
+
+import posixpath, sys
+
+import numpy as np
+
+__all__ = [
+    "BIT_MAP",
+    "TriggerBitMap",
+    "pack_bits",
+    "unpack_bits",
+]
+
+BIT_MAP = "triggerBitMap"
+TREE = "dijetScouting/events"   # where the analyzer writes the events (and the table next to them)
+KINDS = ("HLT", "L1")
+BRANCH = {"HLT": "hltBits", "L1": "l1Bits"}
+
+def _words(words):
+    w = np.asarray(words)
+    if w.dtype != np.uint64:
+        w = w.astype(np.uint64)
+    return w.reshape(len(w), -1)
+
+def unpack_bits(words, nbits):
+    """
+    (nevents, nbits) bool matrix from (nevents, W) uint64 masks.
+    """
+    w = np.ascontiguousarray(_words(words), dtype="<u8")
+    b = np.unpackbits(w.view(np.uint8).reshape(len(w), -1), axis=1, bitorder="little")
+    return b[:, :nbits].astype(bool)
+
+def pack_bits(bits):
+    """
+    (nevents, W) uint64 masks from a (nevents, nbits) bool matrix; inverse of unpack_bits.
+    """
+    bits = np.asarray(bits, dtype=bool)
+    n, nbits = bits.shape
+    nw = max(1, -(-nbits // 64))
+    padded = np.zeros((n, nw * 64), dtype=bool)
+    padded[:, :nbits] = bits
+    return np.packbits(padded, axis=1, bitorder="little").view("<u8").astype(np.uint64)
+
+class TriggerBitMap(object):
+    """
+    Bit -> (name, alias) table of one ntuple; names/aliases per kind ('HLT', 'L1') in bit order.
+    """
+    def __init__(self, hlt=(), l1=()):
+        self.names = {"HLT": [n for n, _ in hlt], "L1": [n for n, _ in l1]}
+        self.aliases = {"HLT": [a for _, a in hlt], "L1": [a for _, a in l1]}
+
+    @classmethod
+    def from_config(cls, hlt_info, hlt_alias=None, l1_info=()):
+        """
+        The table the analyzer writes for triggerSelection/triggerAlias/l1Seeds.
+        """
+        hlt_alias = list(hlt_alias or [])
+        hlt, seen = [], set()
+        for i, name in enumerate(hlt_info):
+            if name in seen:
+                continue
+            seen.add(name)
+            hlt.append((name, hlt_alias[i] if i < len(hlt_alias) else name))
+        return cls(hlt, [(s, s) for s in l1_info])
+
+    @classmethod
+    def from_text(cls, text):
+        rows = {"HLT": {}, "L1": {}}
+        for line in text.splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split()
+            if len(parts) < 3 or parts[0] not in rows:
+                raise ValueError(f"Bad {BIT_MAP} line: {line!r}")
+            alias = parts[3] if len(parts) > 3 else parts[2]
+            rows[parts[0]][int(parts[1])] = (parts[2], alias)
+        for kind, r in rows.items():
+            if sorted(r) != list(range(len(r))):
+                raise ValueError(f"{BIT_MAP}: {kind} bits are not contiguous from 0")
+        return cls([rows["HLT"][b] for b in range(len(rows["HLT"]))],
+                   [rows["L1"][b] for b in range(len(rows["L1"]))])
+
+    @classmethod
+    def from_file(cls, path, tree=TREE):
+        """
+        Table stored next to 'tree' in an ntuple (path or open uproot file).
+        """
+        import uproot
+
+        key = posixpath.join(posixpath.dirname(tree), BIT_MAP)
+        f = uproot.open(path) if isinstance(path, str) else path
+        try:
+            if key not in f:
+                raise KeyError(f"No '{key}' in {getattr(f, 'file_path', path)} (not written with triggerOutput='bits'/'both')")
+            obj = f[key]
+            # TNamed from the analyzer; TObjString when rewritten by uproot (skims)
+            return cls.from_text(obj if isinstance(obj, str) else obj.member("fTitle"))
+        finally:
+            if isinstance(path, str):
+                f.close()
+
+    def to_text(self):
+        lines = ["# kind bit name alias"]
+        for kind in KINDS:
+            lines += [f"{kind} {b} {n} {a}" for b, (n, a) in enumerate(zip(self.names[kind], self.aliases[kind]))]
+        return "\n".join(lines) + "\n"
+
+    def nbits(self, kind="HLT"):
+        return len(self.names[kind])
+
+    def bits(self, pattern, kind="HLT"):
+        """
+        Bits for a path: exact name or alias if there is one, else every name starting with
+        'pattern' or 'DST_' + pattern (same rule as skim_ntuple's trigger()), or names that
+        'pattern' itself starts with (a versioned path such as 'HLT_PFJet40_v23').
+        """
+        names, aliases = self.names[kind], self.aliases[kind]
+        exact = [b for b, (n, a) in enumerate(zip(names, aliases)) if pattern in (n, a)]
+        if exact:
+            return exact
+        return [b for b, n in enumerate(names)
+                if n.startswith(pattern) or n.startswith("DST_" + pattern) or pattern.startswith(n)]
+
+    def mask(self, bits, kind="HLT"):
+        """
+        (W,) uint64 mask with the given bits set.
+        """
+        m = np.zeros(max(1, -(-self.nbits(kind) // 64)), dtype=np.uint64)
+        for b in bits:
+            m[b >> 6] |= np.uint64(1) << np.uint64(b & 63)
+        return m
+
+    def fired(self, words, pattern, kind="HLT"):
+        """
+        Per-event OR over the bits matching 'pattern'.
+        """
+        bits = self.bits(pattern, kind)
+        if not bits:
+            raise KeyError(f"No {kind} bit matches '{pattern}' (have: {', '.join(self.names[kind])})")
+        w = _words(words)
+        return ((w & self.mask(bits, kind)[: w.shape[1]]) != 0).any(axis=1)
+
+    def decode(self, words, kind="HLT", alias=False):
+        """
+        {name (or alias): bool per event} for every bit of 'kind'.
+        """
+        bits = unpack_bits(words, self.nbits(kind))
+        labels = self.aliases[kind] if alias else self.names[kind]
+        return {lab: bits[:, b] for b, lab in enumerate(labels)}
+
+    def counts(self, words, kind="HLT"):
+        """
+        Number of events with each bit set, in bit order.
+        """
+        return unpack_bits(words, self.nbits(kind)).sum(axis=0)
+
+def main(argv=None):
+    import argparse
+    import uproot
+
+    ap = argparse.ArgumentParser(description="Print the trigger bit table of an ntuple and how often each bit fired.")
+    ap.add_argument("files", nargs="+", help="Ntuples written with triggerOutput='bits'/'both'")
+    ap.add_argument("--tree", default=TREE)
+    ap.add_argument("--step-size", default="100 MB")
+    args = ap.parse_args(argv)
+
+    bm, total, counts = None, 0, {k: 0 for k in KINDS}
+    for path in args.files:
+        with uproot.open(path) as f:
+            this = TriggerBitMap.from_file(f, args.tree)
+            if bm is None:
+                bm = this
+            elif this.to_text() != bm.to_text():
+                print(f"error: {path} has a different {BIT_MAP}; decode files separately", file=sys.stderr)
+                return 1
+            tree = f[args.tree]
+            branches = [BRANCH[k] for k in KINDS if bm.nbits(k) and BRANCH[k] in tree.keys()]
+            for arr in tree.iterate(branches, step_size=args.step_size, library="np"):
+                total += len(arr[branches[0]]) if branches else 0
+                for k in KINDS:
+                    if BRANCH[k] in arr:
+                        counts[k] = counts[k] + bm.counts(arr[BRANCH[k]], k)
+
+    print(f"{total} events in {len(args.files)} file(s)")
+    for k in KINDS:
+        if not bm.nbits(k):
+            continue
+        print(f"\n{k:<4}{'bit':>4} {'fired':>12} {'frac':>8}  name (alias)")
+        c = np.broadcast_to(counts[k], (bm.nbits(k),))
+        for b, (n, a) in enumerate(zip(bm.names[k], bm.aliases[k])):
+            frac = c[b] / total if total else 0.0
+            print(f"{'':<4}{b:>4} {int(c[b]):>12} {frac:>8.4f}  {n}" + (f" ({a})" if a != n else ""))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+crab_monitor.py
+
+Status of every CRAB task created by createAndSubmitCrab.py, polled concurrently:
+
+  - tasks are the CRAB project dirs (crab_<request>) under the 'workdir' folders below the
+    given paths; dataset/era labels come from the tasks.json the submitter writes next to them
+  - 'crab status -d <project> --json' runs for up to -j tasks at a time (asyncio), with
+    retries and exponential backoff on failures/timeouts
+  - the last state of each task is cached in <path>/.crab_monitor.json: finished tasks
+    (COMPLETED/KILLED/all jobs finished) are not polled again, tasks polled less than
+    --max-age seconds ago are shown from the cache, and a task whose poll fails is shown
+    with its last known state
+  - one table: jobs per state, failures by exit code, job throughput and wall time
+
+The crab executable is $CRAB_BIN (or --crab-bin), so a fake script exercises it offline.
+
+Examples:
+  python3 createAndSubmitCrab.py monitor Output_ScoutingPFRun3 -j 16
+  python3 crab_monitor.py Output_ScoutingPFRun3/ScoutingPFRun3_Run2024F-v1_03October2025_20251003_1200 --watch 600
+"""
+
+from __future__ import annotations
+import asyncio
+import glob
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+CACHE = ".crab_monitor.json"
+TASK_LIST = "tasks.json"
+STATES = ("unsubmitted", "idle", "running", "transferring", "cooloff", "failed", "finished")
+SHORT = {"idle": "Idle", "running": "Run", "transferring": "Xfer", "cooloff": "Cool", "failed": "Fail"}
+TERMINAL = ("COMPLETED", "KILLED")
+
+class MonitorError(RuntimeError):
+    pass
+
+# ---------- discovery ----------
+def discover_tasks(paths: List[str]) -> List[Dict[str, str]]:
+    """
+    [{'project', 'request', 'dataset', 'era', 'part', 'crab_cfg'}] for every crab_* project dir below the
+    paths (a path may also be a project dir itself), labelled from tasks.json when present.
+    """
+    projects: List[str] = []
+    for p in paths:
+        p = os.path.abspath(p)
+        if os.path.basename(p).startswith("crab_") and os.path.isdir(p):
+            projects.append(p)
+            continue
+        projects += [d for d in glob.glob(os.path.join(p, "**", "workdir", "crab_*"), recursive=True)
+                     if os.path.isdir(d)]
+    tasks = []
+    labels: Dict[str, Dict[str, Dict[str, str]]] = {}
+    for proj in sorted(dict.fromkeys(projects)):
+        root = os.path.dirname(os.path.dirname(proj))
+        if root not in labels:
+            labels[root] = {}
+            try:
+                with open(os.path.join(root, TASK_LIST)) as f:
+                    labels[root] = {t["request"]: t for t in json.load(f) if t.get("request")}
+            except (OSError, ValueError):
+                pass
+        request = os.path.basename(proj)[len("crab_"):]
+        lab = labels[root].get(request, {})
+        tasks.append({"project": proj, "request": request, "dataset": lab.get("dataset") or request,
+                      "era": lab.get("era") or "-", "part": lab.get("part") or "",
+                      "crab_cfg": lab.get("crab_cfg") or ""})
+    return tasks
+
+# ---------- crab status ----------
+def parse_status(text: str) -> Dict[str, object]:
+    """
+    Server status and per-job dict from 'crab status --json' output (the JSON is the last
+    line that parses as an object; the rest is the usual text report).
+    """
+    server = re.search(r"Status on the CRAB server:\s*(\S+)", text) or re.search(r"Task status:\s*(\S+)", text)
+    jobs = None
+    for ln in reversed(text.splitlines()):
+        ln = ln.strip()
+        if ln.startswith("{"):
+            try:
+                jobs = json.loads(ln)
+                break
+            except ValueError:
+                continue
+    if jobs is None and not server:
+        raise MonitorError("no status in crab output")
+    return {"server": server.group(1) if server else "UNKNOWN", "jobs": jobs or {}}
+
+def summarize_jobs(jobs: Dict[str, dict]) -> Dict[str, object]:
+    """
+    Counts per state, failed jobs per exit code, finished jobs/hour and mean wall time.
+    """
+    states: Counter = Counter()
+    codes: Counter = Counter()
+    starts, ends, walls = [], [], []
+    for job in jobs.values():
+        st = str(job.get("State", "unknown")).lower()
+        states[st] += 1
+        if st == "failed":
+            e = job.get("Error") or []
+            codes[str(e[0]) if e else "?"] += 1
+        if st == "finished":
+            if job.get("StartTimes"):
+                starts.append(min(job["StartTimes"]))
+            if job.get("EndTimes"):
+                ends.append(max(job["EndTimes"]))
+            if job.get("WallDurations"):
+                walls.append(job["WallDurations"][-1])
+    span = (max(ends) - min(starts)) / 3600.0 if starts and ends and max(ends) > min(starts) else 0.0
+    return {
+        "njobs": len(jobs),
+        "states": dict(states),
+        "exit_codes": dict(codes),
+        "jobs_per_hour": states["finished"] / span if span else 0.0,
+        "mean_wall_h": sum(walls) / len(walls) / 3600.0 if walls else 0.0,
+    }
+
+def is_terminal(entry: Dict[str, object]) -> bool:
+    s = entry.get("summary") or {}
+    return (entry.get("server") in TERMINAL
+            or (s.get("njobs", 0) > 0 and s.get("states", {}).get("finished", 0) == s.get("njobs")))
+
+async def poll_task(project: str, sem: asyncio.Semaphore, crab_bin: str, retries: int = 3,
+                    backoff: float = 5.0, timeout: float = 300.0) -> Dict[str, object]:
+    """
+    One task's parsed status; retries with exponential backoff (plus jitter) on failures.
+    """
+    last = ""
+    for k in range(retries + 1):
+        async with sem:
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    crab_bin, "status", "-d", project, "--json",
+                    stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+                try:
+                    out, _ = await asyncio.wait_for(proc.communicate(), timeout)
+                except asyncio.TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+                    raise MonitorError(f"timed out after {timeout:.0f} s")
+                text = out.decode(errors="replace")
+                if proc.returncode != 0:
+                    raise MonitorError(f"exit {proc.returncode}: " + " ".join(text.strip().splitlines()[-2:]))
+                return parse_status(text)
+            except (MonitorError, OSError) as e:
+                last = str(e)
+        if k < retries:
+            await asyncio.sleep(backoff * 2 ** k * (1 + 0.25 * random.random()))
+    raise MonitorError(last)
+
+# ---------- cache ----------
+def load_cache(path: str) -> Dict[str, dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(path: str, cache: Dict[str, dict]) -> None:
+    d = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".crab_monitor_", suffix=".tmp", dir=d)
+    with os.fdopen(fd, "w") as f:
+        json.dump(cache, f, indent=1)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+async def refresh(tasks: List[Dict[str, str]], cache: Dict[str, dict], crab_bin: str, workers: int = 8,
+                  max_age: float = 0.0, force: bool = False, retries: int = 3, backoff: float = 5.0,
+                  timeout: float = 300.0) -> Dict[str, int]:
+    """
+    Poll the tasks that need it and update 'cache' in place ({project: entry});
+    returns {'polled', 'cached', 'failed'}.
+    """
+    now = time.time()
+    todo = []
+    for t in tasks:
+        entry = cache.get(t["project"])
+        if entry and not force and (is_terminal(entry) or now - entry.get("time", 0) < max_age):
+            continue
+        todo.append(t)
+    sem = asyncio.Semaphore(max(1, workers))
+    results = await asyncio.gather(*(poll_task(t["project"], sem, crab_bin, retries, backoff, timeout)
+                                     for t in todo), return_exceptions=True)
+    failed = 0
+    for t, res in zip(todo, results):
+        entry = cache.setdefault(t["project"], {})
+        if isinstance(res, Exception):
+            failed += 1
+            entry["error"] = f"{type(res).__name__}: {res}" if not isinstance(res, MonitorError) else str(res)
+            continue
+        entry.update(time=time.time(), server=res["server"], summary=summarize_jobs(res["jobs"]))
+        entry.pop("error", None)
+    return {"polled": len(todo) - failed, "cached": len(tasks) - len(todo), "failed": failed}
+
+# ---------- report ----------
+def _codes(codes: Dict[str, int], top: int = 3) -> str:
+    items = sorted(codes.items(), key=lambda kv: -kv[1])
+    s = ", ".join(f"{c}x{n}" for c, n in items[:top])
+    return s + (", ..." if len(items) > top else "") if s else "-"
+
+def render_table(tasks: List[Dict[str, str]], cache: Dict[str, dict]) -> str:
+    head = ("Era", "Task", "Server", "Jobs", "Done", *(SHORT[s] for s in STATES[1:6]), "Fail codes", "Jobs/h", "Wall h", "Age")
+    rows = []
+    total: Counter = Counter()
+    codes: Counter = Counter()
+    jph = 0.0
+    now = time.time()
+    for t in tasks:
+        e = cache.get(t["project"], {})
+        s = e.get("summary") or {}
+        st = s.get("states", {})
+        n = s.get("njobs", 0)
+        total.update(st)
+        total["njobs"] += n
+        codes.update(s.get("exit_codes", {}))
+        jph += s.get("jobs_per_hour", 0.0)
+        name = t["dataset"] + (f" ({t['part']})" if t["part"] else "")
+        server = e.get("server", "-") + (" (stale)" if e.get("error") else "")
+        age = f"{(now - e['time']) / 60:.0f}m" if e.get("time") else "-"
+        rows.append((t["era"], name, server, str(n), f"{100 * st.get('finished', 0) / n:.0f}%" if n else "-",
+                     *(str(st.get(k, 0)) for k in STATES[1:6]), _codes(s.get("exit_codes", {})),
+                     f"{s.get('jobs_per_hour', 0):.0f}", f"{s.get('mean_wall_h', 0):.2f}", age))
+    n = total["njobs"]
+    rows.append(("all", f"{len(tasks)} task(s)", "", str(n), f"{100 * total['finished'] / n:.0f}%" if n else "-",
+                 *(str(total.get(k, 0)) for k in STATES[1:6]), _codes(dict(codes), top=6), f"{jph:.0f}", "", ""))
+    widths = [max(len(h), *(len(r[i]) for r in rows)) for i, h in enumerate(head)]
+    line = "-" * (sum(widths) + 3 * (len(widths) - 1))
+    fmt = lambda r: " | ".join(c.ljust(w) for c, w in zip(r, widths))  # noqa: E731
+    out = [fmt(head), line, *(fmt(r) for r in rows[:-1]), line, fmt(rows[-1])]
+    errors = [(t, cache[t["project"]]["error"]) for t in tasks if cache.get(t["project"], {}).get("error")]
+    out += [f"  ! {t['request']}: {e}" for t, e in errors]
+    return "\n".join(out)
+
+def main(argv=None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="+", help="Output dirs of createAndSubmitCrab.py (or their parent, or project dirs)")
+    ap.add_argument("-j", "--jobs", type=int, default=8, help="Concurrent 'crab status' calls")
+    ap.add_argument("--max-age", type=float, default=0.0, help="Show tasks polled less than this many seconds ago from the cache")
+    ap.add_argument("--refresh", action="store_true", help="Poll finished tasks too")
+    ap.add_argument("--retries", type=int, default=3)
+    ap.add_argument("--backoff", type=float, default=5.0, help="First retry delay in seconds (doubles)")
+    ap.add_argument("--timeout", type=float, default=300.0, help="Seconds per 'crab status' call")
+    ap.add_argument("--watch", type=float, default=0.0, help="Repeat every this many seconds")
+    ap.add_argument("--crab-bin", default=os.environ.get("CRAB_BIN", "crab"))
+    args = ap.parse_args(argv)
+
+    tasks = discover_tasks(args.paths)
+    if not tasks:
+        print(f"No CRAB project dirs (workdir/crab_*) below {' '.join(args.paths)}", file=sys.stderr)
+        return 1
+    cache_path = os.path.join(os.path.abspath(args.paths[0]), CACHE)
+    if not os.path.isdir(os.path.dirname(cache_path)):
+        cache_path = os.path.join(os.getcwd(), CACHE)
+    cache = load_cache(cache_path)
+    while True:
+        t0 = time.perf_counter()
+        stats = asyncio.run(refresh(tasks, cache, args.crab_bin, args.jobs, args.max_age, args.refresh,
+                                    args.retries, args.backoff, args.timeout))
+        save_cache(cache_path, cache)
+        print(render_table(tasks, cache))
+        print(f"{stats['polled']} polled, {stats['cached']} from cache, {stats['failed']} failed "
+              f"in {time.perf_counter() - t0:.1f} s ({cache_path})")
+        if args.watch <= 0:
+            return 1 if stats["failed"] else 0
+        time.sleep(args.watch)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+crab_recovery.py
+
+Missing-lumi masks for recovery tasks (createAndSubmitCrab.py --incremental):
+
+  processed = (run, lumi) pairs of the ntuples already produced for a dataset
+              (runNo/lumi of the 'events' tree, files found by a local walk or a storage lister)
+            | results/processedLumis.json of earlier CRAB projects ('crab report')
+  missing   = target - processed
+              (target = the dataset's lumis in DAS, within the lumi mask if one is given)
+
+Ntuples are matched to a dataset by the CRAB request name in their path
+('crab_<Primary>__<Processing>__<Tier>[__iov<k>...]/'), so outputs of earlier recovery and
+per-IOV tasks count as well. Lumis without any event in the ntuple read as missing; they
+are cheap to redo.
+
+The storage lister is any command that lists a directory recursively, '{path}' being
+replaced by the location; the listed paths are opened as '<prefix><path>'. Without one,
+locations are local directories (or a local copy standing in for remote storage):
+
+  --storage-lister "xrdfs root://cmseos.fnal.gov ls -R {path}" --storage-prefix root://cmseos.fnal.gov/
+
+Example:
+  python3 submitCrabJobs/crab_recovery.py /ScoutingPFRun3/Run2024F-v1/HLTSCOUT \\
+      --scan-outputs /eos/uscms/store/group/lpcjj/Run3PFScouting/rootTrees_big/2024 \\
+      --lumi-mask data/json/Cert_Collisions2024_378981_386951_Golden.json -o missing_2024F.json
+"""
+
+from __future__ import annotations
+import glob
+import os
+import re
+import shlex
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "../ScoutingNtuplizer/python/configs"))
+sys.path.insert(0, os.path.join(HERE, "../utils"))
+from lumi_mask import LumiMask  # noqa: E402
+from das_client import DASClient  # noqa: E402
+
+TREES = ("dijetScouting/events", "events")
+REPORT = "processedLumis.json"
+
+def request_base(dataset: str) -> str:
+    # same name createAndSubmitCrab gives the CRAB request (before any __iov/__recovery suffix)
+    return re.sub(r"[^A-Za-z0-9._-]", "_", dataset.strip("/").replace("/", "__"))
+
+# ---------- finding outputs ----------
+def list_outputs(location: str, lister: Optional[str] = None, prefix: str = "") -> List[str]:
+    """
+    ROOT files below 'location': os.walk, or the output of the lister command.
+    """
+    if not lister:
+        out = []
+        for root, _, files in os.walk(location):
+            out += [os.path.join(root, f) for f in files if f.endswith(".root")]
+        return sorted(out)
+    cmd = [a.replace("{path}", location) for a in shlex.split(lister)]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"'{' '.join(cmd)}' failed: {proc.stderr.strip() or proc.stdout.strip()}")
+    paths = [ln.split()[-1] for ln in proc.stdout.splitlines() if ln.strip().endswith(".root")]
+    return sorted(prefix + p for p in paths)
+
+def outputs_for(dataset: str, files: List[str]) -> List[str]:
+    tag = f"crab_{request_base(dataset)}"
+    return [f for f in files if re.search(rf"/{re.escape(tag)}(__[^/]*)?/", f)]
+
+# ---------- processed lumis ----------
+def _file_keys(path: str) -> np.ndarray:
+    # unique run << 32 | lumi of one ntuple (runs in worker processes)
+    import uproot
+
+    with uproot.open(path) as f:
+        tree = next((f[t] for t in TREES if t in f), None)
+        if tree is None:
+            raise KeyError(f"No {' / '.join(TREES)} tree in {path}")
+        arr = tree.arrays(["runNo", "lumi"], library="np")
+    ok = (arr["runNo"] > 0) & (arr["lumi"] > 0)  # -999 from events filled before the ids are set
+    return np.unique((arr["runNo"][ok].astype(np.int64) << 32) | arr["lumi"][ok].astype(np.int64))
+
+def lumis_from_ntuples(paths: List[str], workers: int = 4) -> LumiMask:
+    if not paths:
+        return LumiMask()
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as pool:
+        keys = np.unique(np.concatenate(list(pool.map(_file_keys, paths))))
+    return LumiMask.from_pairs(keys >> 32, keys & 0xFFFFFFFF)
+
+def crab_reports(dataset: str, roots: List[str]) -> List[str]:
+    """
+    processedLumis.json of the CRAB projects of 'dataset' below each root (an earlier output
+    dir of createAndSubmitCrab.py, a workdir or a single project dir).
+    """
+    tag = f"crab_{request_base(dataset)}"
+    out = []
+    for root in roots:
+        for path in glob.glob(os.path.join(root, "**", "results", REPORT), recursive=True):
+            project = os.path.basename(os.path.dirname(os.path.dirname(path)))
+            if project == tag or project.startswith(tag + "__"):
+                out.append(path)
+    return sorted(out)
+
+def lumis_from_reports(paths: List[str]) -> LumiMask:
+    mask = LumiMask()
+    for p in paths:
+        mask = mask | LumiMask.from_file(p)
+    return mask
+
+# ---------- target lumis ----------
+def parse_das_run_lumis(lines: List[str]) -> LumiMask:
+    """
+    Mask from 'run,lumi dataset=...' output ('<run> [l1,l2,...]').
+    """
+    runs, lumis = [], []
+    for ln in lines:
+        parts = ln.split(None, 1)
+        if len(parts) < 2 or not parts[0].isdigit():
+            continue
+        ls = [int(x) for x in re.findall(r"\d+", parts[1])]
+        runs += [int(parts[0])] * len(ls)
+        lumis += ls
+    return LumiMask.from_pairs(runs, lumis)
+
+def das_lumis(dataset: str, das: DASClient) -> LumiMask:
+    return parse_das_run_lumis(das.query(f"run,lumi dataset={dataset}"))
+
+def missing_lumis(target: LumiMask, processed: LumiMask) -> LumiMask:
+    return target - processed
+
+def summarize(dataset: str, target: LumiMask, processed: LumiMask, missing: LumiMask) -> str:
+    done = target.n_lumis() - missing.n_lumis()
+    frac = done / target.n_lumis() if target else 1.0
+    return (f"{dataset}: {done}/{target.n_lumis()} lumis done ({100 * frac:.1f}%), "
+            f"{missing.n_lumis()} missing in {missing.n_runs()} runs")
+
+def main(argv=None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("dataset")
+    ap.add_argument("--scan-outputs", nargs="*", default=[], metavar="LOC", help="Directories with produced ntuples")
+    ap.add_argument("--storage-lister", default=None, help="Recursive listing command, '{path}' = location")
+    ap.add_argument("--storage-prefix", default="", help="Prefix to open listed files (e.g. root://host/)")
+    ap.add_argument("--crab-reports", nargs="*", default=[], metavar="DIR",
+                    help="Dirs searched for CRAB results/processedLumis.json")
+    ap.add_argument("--lumi-mask", default=None, help="Only lumis of this mask are targeted (e.g. the golden JSON)")
+    ap.add_argument("--no-das", action="store_true",
+                    help="Target the --lumi-mask alone instead of its overlap with the dataset's lumis in DAS")
+    ap.add_argument("-j", "--jobs", type=int, default=min(8, os.cpu_count() or 1))
+    ap.add_argument("-o", "--output", default=None, help="Write the missing lumis as JSON")
+    args = ap.parse_args(argv)
+
+    if not (args.scan_outputs or args.crab_reports):
+        ap.error("give --scan-outputs and/or --crab-reports")
+    files = []
+    for loc in args.scan_outputs:
+        files += list_outputs(loc, args.storage_lister, args.storage_prefix)
+    files = outputs_for(args.dataset, files)
+    reports = crab_reports(args.dataset, args.crab_reports)
+    processed = lumis_from_ntuples(files, args.jobs) | lumis_from_reports(reports)
+    print(f"{len(files)} ntuple(s), {len(reports)} CRAB report(s): {processed.n_lumis()} lumis processed")
+
+    if args.no_das and not args.lumi_mask:
+        ap.error("--no-das needs --lumi-mask")
+    target = LumiMask.from_file(args.lumi_mask) if args.no_das else das_lumis(args.dataset, DASClient())
+    if args.lumi_mask and not args.no_das:
+        target = target & LumiMask.from_file(args.lumi_mask)
+    missing = missing_lumis(target, processed)
+    print(summarize(args.dataset, target, processed, missing))
+    if args.output and missing:
+        print("  -> " + missing.write(args.output))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+crab_scheduler.py
+
+Long-running resubmission of the CRAB tasks created by createAndSubmitCrab.py (the
+crab_* project dirs under the 'workdir' folders, labelled from tasks.json):
+
+  - every --interval seconds each unfinished task is polled ('crab status --json', -j at a time)
+  - failed jobs are classified by exit code (first policy class listing it, else 'other'):
+      xrootd    8020/8021/8028/84/85/92   input open/read failures -> plain resubmit
+      memory    50660/50661/8030/8031     -> resubmit with --maxmemory x memory_factor
+      walltime  50664/8032                -> resubmit with --maxjobruntime x runtime_factor,
+                                             then a recovery task with smaller splitting
+      stageout  60307/60311/60318/60324   -> plain resubmit
+      other                               -> plain resubmit
+  - a job is resubmitted at most max_attempts times per class; after that its class either
+    splits (split_factor: once no job of the task is pending, 'crab report' gives the
+    not-finished lumis and a new task '<request>__split<k>' runs them with unitsPerJob /
+    split_factor) or gives up
+  - resubmitted jobs are left alone for settle_min minutes, so a status that CRAB has not
+    updated yet is not acted on twice
+
+The policy is JSON; a file only needs the keys it changes ({"classes": {"memory":
+{"max_memory_mb": 6000}}}); --print-policy shows the defaults. The state (attempts per job
+and class, current maxmemory/maxjobruntime, split tasks, history of commands) is written to
+<path>/.crab_scheduler.json after every command, so a restarted scheduler continues where the
+last one stopped. A lock file keeps two schedulers off the same state.
+
+The crab executable is $CRAB_BIN (or --crab-bin), so a stub script exercises it offline.
+
+Examples:
+  python3 createAndSubmitCrab.py schedule Output_ScoutingPFRun3 --policy policy.json
+  python3 crab_scheduler.py Output_ScoutingPFRun3 --once --dry-run
+"""
+
+from __future__ import annotations
+import asyncio
+import copy
+import fcntl
+import json
+import math
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from crab_monitor import TERMINAL, MonitorError, discover_tasks, poll_task
+
+STATE = ".crab_scheduler.json"
+REPORT = "notFinishedLumis.json"
+# CRAB defaults when the cfg does not set JobType.maxMemoryMB / maxJobRuntimeMin
+MAX_MEMORY_MB = 2000
+MAX_RUNTIME_MIN = 1315
+
+DEFAULT_POLICY: Dict[str, object] = {
+    "settle_min": 30,
+    "classes": {
+        "xrootd": {"codes": [8020, 8021, 8028, 84, 85, 92], "max_attempts": 3},
+        "memory": {"codes": [50660, 50661, 8030, 8031], "max_attempts": 2,
+                   "memory_factor": 1.5, "max_memory_mb": 5000},
+        "walltime": {"codes": [50664, 8032], "max_attempts": 1,
+                     "runtime_factor": 1.5, "max_runtime_min": 2750, "split_factor": 2},
+        "stageout": {"codes": [60307, 60311, 60318, 60324], "max_attempts": 3},
+        "other": {"max_attempts": 1},
+    },
+}
+_NUMERIC = ("max_attempts", "memory_factor", "max_memory_mb", "runtime_factor", "max_runtime_min", "split_factor")
+
+class SchedulerError(RuntimeError):
+    pass
+
+# ---------- policy ----------
+def load_policy(path: Optional[str] = None) -> Dict[str, object]:
+    """
+    DEFAULT_POLICY updated with the JSON file at 'path' (per class, key by key).
+    """
+    policy = copy.deepcopy(DEFAULT_POLICY)
+    if not path:
+        return policy
+    try:
+        with open(path) as f:
+            user = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SchedulerError(f"cannot read policy {path}: {e}")
+    for k, v in user.items():
+        if k == "classes":
+            for name, cls in v.items():
+                policy["classes"].setdefault(name, {}).update(cls)
+        elif k in policy:
+            policy[k] = v
+        else:
+            raise SchedulerError(f"{path}: unknown policy key '{k}'")
+    for name, cls in policy["classes"].items():
+        try:
+            cls["codes"] = [int(c) for c in cls.get("codes", [])]
+            for k in _NUMERIC:
+                if k in cls:
+                    cls[k] = float(cls[k]) if "factor" in k else int(cls[k])
+        except (TypeError, ValueError):
+            raise SchedulerError(f"{path}: bad value in class '{name}'")
+    policy["classes"].setdefault("other", {"max_attempts": 1})
+    return policy
+
+def exit_code(job: dict) -> Optional[int]:
+    e = job.get("Error") or []
+    try:
+        return int(e[0])
+    except (IndexError, TypeError, ValueError):
+        return None
+
+def classify(code: Optional[int], policy: Dict[str, object]) -> str:
+    for name, cls in policy["classes"].items():
+        if code in cls.get("codes", ()):
+            return name
+    return "other"
+
+# ---------- decisions ----------
+def new_entry(task: Dict[str, str]) -> Dict[str, object]:
+    mem, runtime = MAX_MEMORY_MB, MAX_RUNTIME_MIN
+    try:
+        with open(task["crab_cfg"]) as f:
+            text = f.read()
+        mem = int(_get_param(text, "JobType", "maxMemoryMB") or mem)
+        runtime = int(_get_param(text, "JobType", "maxJobRuntimeMin") or runtime)
+    except (OSError, KeyError, ValueError):
+        pass
+    return {"request": task["request"], "status": "active", "maxmemory": mem, "maxjobruntime": runtime,
+            "jobs": {}, "history": []}
+
+def plan_task(entry: Dict[str, object], jobs: Dict[str, dict], policy: Dict[str, object],
+              now: Optional[float] = None) -> Dict[str, object]:
+    """
+    What to do with one task's jobs: {'resubmit': {class: [jobids]}, 'split': [jobids],
+    'given_up': {class: n}, 'pending': n, 'finished': n, 'codes': {jobid: code}}.
+    """
+    now = time.time() if now is None else now
+    settle = 60.0 * float(policy.get("settle_min", 0))
+    resubmit: Dict[str, List[str]] = {}
+    split: List[str] = []
+    given_up: Counter = Counter()
+    codes: Dict[str, Optional[int]] = {}
+    pending = finished = 0
+    for jid, job in jobs.items():
+        st = str(job.get("State", "")).lower()
+        if st == "finished":
+            finished += 1
+            continue
+        rec = entry["jobs"].get(jid, {})
+        if st != "failed" or now - rec.get("time", 0) < settle:
+            pending += 1
+            continue
+        code = codes[jid] = exit_code(job)
+        name = classify(code, policy)
+        cls = policy["classes"][name]
+        if rec.get("attempts", {}).get(name, 0) < cls.get("max_attempts", 0):
+            resubmit.setdefault(name, []).append(jid)
+        elif cls.get("split_factor"):
+            split.append(jid)
+        else:
+            given_up[name] += 1
+    return {"resubmit": resubmit, "split": split, "given_up": dict(given_up), "pending": pending,
+            "finished": finished, "codes": codes}
+
+def _jobkey(jid: str):
+    return [int(x) if x.isdigit() else x for x in re.split(r"(\d+)", jid)]
+
+def resubmit_args(project: str, jobids: List[str], cls: Dict[str, object],
+                  entry: Dict[str, object]) -> Tuple[List[str], Dict[str, int]]:
+    """
+    'crab resubmit' arguments for the jobs of one class, and the new task limits they set.
+    """
+    args = ["resubmit", "-d", project, "--jobids", ",".join(sorted(jobids, key=_jobkey))]
+    limits: Dict[str, int] = {}
+    if cls.get("memory_factor"):
+        mem = int(math.ceil(entry["maxmemory"] * cls["memory_factor"]))
+        limits["maxmemory"] = min(mem, cls.get("max_memory_mb", mem))
+        args += ["--maxmemory", str(limits["maxmemory"])]
+    if cls.get("runtime_factor"):
+        minutes = int(math.ceil(entry["maxjobruntime"] * cls["runtime_factor"]))
+        limits["maxjobruntime"] = min(minutes, cls.get("max_runtime_min", minutes))
+        args += ["--maxjobruntime", str(limits["maxjobruntime"])]
+    return args, limits
+
+# ---------- split recovery task ----------
+def _get_param(text: str, section: str, key: str) -> Optional[str]:
+    m = re.search(rf"^\s*config\.{section}\.{key}\s*=\s*([^#\n]+)", text, re.M)
+    return m.group(1).strip().strip("'\"") if m else None
+
+def _set_param(text: str, section: str, key: str, value: str) -> str:
+    # replace the active 'config.<section>.<key> = ...' line, or append one
+    pat = re.compile(rf"^(\s*config\.{section}\.{key}\s*=\s*).*$", re.M)
+    if pat.search(text):
+        return pat.sub(lambda m: f"{m.group(1)}{value}", text, count=1)
+    return text.rstrip("\n") + f"\nconfig.{section}.{key} = {value}\n"
+
+def split_request(request: str) -> str:
+    m = re.match(r"^(.*)__split(\d+)$", request)
+    return f"{m.group(1)}__split{int(m.group(2)) + 1}" if m else f"{request}__split1"
+
+def split_cfg(text: str, request: str, mask: str, factor: float, maxmemory: int,
+              maxjobruntime: int) -> Tuple[str, int]:
+    """
+    CRAB cfg of a recovery task: new requestName, lumiMask, unitsPerJob / factor and the
+    current job limits; returns (text, unitsPerJob).
+    """
+    units = int(_get_param(text, "Data", "unitsPerJob") or 0)
+    if units <= 0:
+        raise SchedulerError("no numeric config.Data.unitsPerJob in the CRAB cfg")
+    units = max(1, int(units // factor))
+    text = _set_param(text, "General", "requestName", repr(request))
+    text = _set_param(text, "Data", "lumiMask", repr(mask))
+    text = _set_param(text, "Data", "unitsPerJob", str(units))
+    text = _set_param(text, "JobType", "maxMemoryMB", str(maxmemory))
+    text = _set_param(text, "JobType", "maxJobRuntimeMin", str(maxjobruntime))
+    return text, units
+
+def _write_json(path: str, obj) -> None:
+    d = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".crab_scheduler_", suffix=".tmp", dir=d)
+    with os.fdopen(fd, "w") as f:
+        json.dump(obj, f, indent=1)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+def _add_to_task_list(project: str, record: Dict[str, str]) -> None:
+    # the split task is labelled by the monitor and found again after a restart
+    path = os.path.join(os.path.dirname(os.path.dirname(project)), "tasks.json")
+    try:
+        with open(path) as f:
+            records = json.load(f)
+    except (OSError, ValueError):
+        records = []
+    records = [r for r in records if r.get("request") != record["request"]] + [record]
+    _write_json(path, records)
+
+# ---------- crab ----------
+async def run_crab(crab_bin: str, args: List[str], sem: asyncio.Semaphore, timeout: float = 600.0) -> Tuple[int, str]:
+    async with sem:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                crab_bin, *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+        except OSError as e:
+            return -1, str(e)
+        try:
+            out, _ = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return -1, f"timed out after {timeout:.0f} s"
+    return proc.returncode, out.decode(errors="replace")
+
+class Scheduler(object):
+    """
+    One pass over the tasks per cycle(); 'state' is saved after every crab command.
+    """
+    def __init__(self, state_path: str, policy: Dict[str, object], crab_bin: str = "crab",
+                 workers: int = 8, dry_run: bool = False, retries: int = 3, backoff: float = 5.0,
+                 timeout: float = 600.0):
+        self.state_path = state_path
+        self.policy = policy
+        self.crab_bin = crab_bin
+        self.workers = workers
+        self.dry_run = dry_run
+        self.retries, self.backoff, self.timeout = retries, backoff, timeout
+        try:
+            with open(state_path) as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {"tasks": {}}
+
+    def save(self) -> None:
+        if not self.dry_run:
+            _write_json(self.state_path, self.state)
+
+    async def _crab(self, entry: Dict[str, object], args: List[str], sem: asyncio.Semaphore,
+                    log: List[str]) -> bool:
+        line = " ".join(["crab", *args])
+        if self.dry_run:
+            log.append(f"would run: {line}")
+            return True
+        rc, out = await run_crab(self.crab_bin, args, sem, self.timeout)
+        entry["history"].append({"time": time.time(), "command": line, "rc": rc})
+        self.save()
+        if rc != 0:
+            log.append(f"'{line}' failed ({rc}): " + " ".join(out.strip().splitlines()[-2:]))
+        return rc == 0
+
+    async def _split(self, task: Dict[str, str], entry: Dict[str, object], factor: float,
+                     sem: asyncio.Semaphore, log: List[str]) -> None:
+        project = task["project"]
+        request = split_request(task["request"])
+        child = os.path.join(os.path.dirname(project), f"crab_{request}")
+        if not task.get("crab_cfg") or not os.path.exists(task["crab_cfg"]):
+            log.append("split needed but the task's CRAB cfg is unknown (no tasks.json record)")
+            entry["status"] = "incomplete"
+            return
+        if not os.path.isdir(child):
+            if not await self._crab(entry, ["report", "-d", project], sem, log):
+                return
+            report = os.path.join(project, "results", REPORT)
+            cfg_dir = os.path.dirname(os.path.abspath(task["crab_cfg"]))
+            mask = os.path.join(cfg_dir, "masks", f"{request}.json")
+            cfg = os.path.join(cfg_dir, f"{request}_crab.py")
+            if self.dry_run:
+                log.append(f"would write {cfg} ({REPORT} as lumiMask, unitsPerJob / {factor:g})")
+                return
+            try:
+                os.makedirs(os.path.dirname(mask), exist_ok=True)
+                shutil.copyfile(report, mask)
+                with open(task["crab_cfg"]) as f:
+                    text, units = split_cfg(f.read(), request, mask, factor, entry["maxmemory"], entry["maxjobruntime"])
+            except (OSError, SchedulerError) as e:
+                log.append(f"split failed: {e}")
+                return
+            with open(cfg, "w") as f:
+                f.write(text)
+            if not await self._crab(entry, ["submit", "-c", cfg], sem, log):
+                return
+            _add_to_task_list(project, {"dataset": task["dataset"], "era": task["era"],
+                                        "part": (task["part"] + "__" if task["part"] else "") + request.rsplit("__", 1)[1],
+                                        "request": request, "status": "submitted", "project": child,
+                                        "crab_cfg": cfg, "lumi_mask": mask})
+            log.append(f"split: {request} submitted with unitsPerJob {units}")
+        else:
+            log.append(f"split: {request} already exists")
+        entry["status"] = "split"
+        entry["split"] = child
+        self.save()
+
+    async def handle(self, task: Dict[str, str], sem: asyncio.Semaphore) -> Tuple[Dict[str, object], List[str]]:
+        """
+        Poll one task and act on it; returns (plan or {}, log lines).
+        """
+        entry = self.state["tasks"].setdefault(task["project"], new_entry(task))
+        log: List[str] = []
+        try:
+            status = await poll_task(task["project"], sem, self.crab_bin, self.retries, self.backoff, self.timeout)
+        except MonitorError as e:
+            return {}, [f"status failed: {e}"]
+        entry["server"] = status["server"]
+        plan = plan_task(entry, status["jobs"], self.policy)
+        now = time.time()
+        for name, jids in plan["resubmit"].items():
+            args, limits = resubmit_args(task["project"], jids, self.policy["classes"][name], entry)
+            if not await self._crab(entry, args, sem, log):
+                continue
+            if self.dry_run:
+                continue
+            entry.update(limits)
+            for jid in jids:
+                rec = entry["jobs"].setdefault(jid, {"attempts": {}})
+                rec["attempts"][name] = rec["attempts"].get(name, 0) + 1
+                rec.update(time=now, code=plan["codes"][jid])
+            self.save()
+            log.append(f"resubmitted {len(jids)} {name} job(s)" + "".join(f", {k} {v}" for k, v in limits.items()))
+        done = not plan["pending"] and not plan["resubmit"]
+        if done and plan["split"]:
+            name = classify(plan["codes"][plan["split"][0]], self.policy)
+            await self._split(task, entry, float(self.policy["classes"][name]["split_factor"]), sem, log)
+        elif done and status["jobs"] and not plan["given_up"] and not plan["split"]:
+            entry["status"] = "complete"
+        elif done and (status["jobs"] or status["server"] in TERMINAL):
+            entry["status"] = "incomplete"
+        if not self.dry_run:
+            self.save()
+        return plan, log
+
+    def cycle(self, tasks: List[Dict[str, str]], recheck: bool = False) -> List[str]:
+        """
+        Handle every task that is still active (all with recheck); returns the report lines.
+        """
+        todo = [t for t in tasks if recheck or self.state["tasks"].get(t["project"], {}).get("status", "active") == "active"]
+
+        async def run():
+            sem = asyncio.Semaphore(max(1, self.workers))
+            return await asyncio.gather(*(self.handle(t, sem) for t in todo))
+
+        results = asyncio.run(run()) if todo else []
+        lines = []
+        for t, (plan, log) in zip(todo, results):
+            e = self.state["tasks"].get(t["project"], {})
+            head = f"{t['request']}: {e.get('server', '-')}, {e.get('status', 'active')}"
+            if plan:
+                failed = Counter({k: len(v) for k, v in plan["resubmit"].items()}) + Counter(plan["given_up"])
+                if plan["split"]:
+                    failed["split"] = len(plan["split"])
+                head += (f", {plan['finished']} finished, {plan['pending']} pending"
+                         + (", failed " + ", ".join(f"{k} {n}" for k, n in sorted(failed.items())) if failed else ""))
+            lines.append(head)
+            lines += [f"    {ln}" for ln in log]
+        n_done = sum(1 for t in tasks if self.state["tasks"].get(t["project"], {}).get("status", "active") != "active")
+        lines.append(f"{len(todo)} task(s) handled, {n_done}/{len(tasks)} done")
+        return lines
+
+    def active(self, tasks: List[Dict[str, str]]) -> int:
+        return sum(1 for t in tasks if self.state["tasks"].get(t["project"], {}).get("status", "active") == "active")
+
+def main(argv=None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="*", help="Output dirs of createAndSubmitCrab.py (or their parent, or project dirs)")
+    ap.add_argument("--policy", default=None, help="JSON policy (merged over the defaults)")
+    ap.add_argument("--print-policy", action="store_true", help="Print the effective policy and exit")
+    ap.add_argument("--state", default=None, help=f"State file (default: <first path>/{STATE})")
+    ap.add_argument("-j", "--jobs", type=int, default=8, help="Concurrent crab calls")
+    ap.add_argument("--interval", type=float, default=1800.0, help="Seconds between cycles")
+    ap.add_argument("--once", action="store_true", help="One cycle, then exit")
+    ap.add_argument("--dry-run", action="store_true", help="Print the crab commands instead of running them (state untouched)")
+    ap.add_argument("--recheck", action="store_true", help="Also poll tasks the state marks complete/incomplete/split")
+    ap.add_argument("--retries", type=int, default=3, help="Retries of a failed 'crab status'")
+    ap.add_argument("--backoff", type=float, default=5.0, help="First retry delay in seconds (doubles)")
+    ap.add_argument("--timeout", type=float, default=600.0, help="Seconds per crab call")
+    ap.add_argument("--crab-bin", default=os.environ.get("CRAB_BIN", "crab"))
+    args = ap.parse_args(argv)
+
+    try:
+        policy = load_policy(args.policy)
+    except SchedulerError as e:
+        print(f"[crab_scheduler] {e}", file=sys.stderr)
+        return 1
+    if args.print_policy:
+        print(json.dumps(policy, indent=1))
+        return 0
+    if not args.paths:
+        ap.error("give at least one output dir")
+
+    state_path = args.state or os.path.join(os.path.abspath(args.paths[0]), STATE)
+    lock = open(state_path + ".lock", "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        print(f"[crab_scheduler] another scheduler holds {state_path}.lock", file=sys.stderr)
+        return 1
+
+    sched = Scheduler(state_path, policy, args.crab_bin, args.jobs, args.dry_run, args.retries, args.backoff, args.timeout)
+    n = 0
+    while True:
+        # rediscovered every cycle: split tasks and new submissions are picked up
+        tasks = discover_tasks(args.paths)
+        if not tasks:
+            print(f"No CRAB project dirs (workdir/crab_*) below {' '.join(args.paths)}", file=sys.stderr)
+            return 1
+        n += 1
+        print(f"== cycle {n}, {time.strftime('%Y-%m-%d %H:%M:%S')} ==")
+        print("\n".join(sched.cycle(tasks, args.recheck and n == 1)))
+        sys.stdout.flush()
+        if args.once or args.dry_run or not sched.active(discover_tasks(args.paths)):
+            break
+        time.sleep(args.interval)
+    incomplete = [p for p, e in sched.state["tasks"].items() if e.get("status") == "incomplete"]
+    return 1 if incomplete else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
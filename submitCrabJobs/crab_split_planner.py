@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+crab_split_planner.py
+
+Chooses CRAB job splitting from event counts so jobs finish close to a target wall time,
+instead of a fixed lumisPerJob:
+
+  lumi         'LumiBased', unitsPerJob = lumis per job; the largest value whose job-time
+               quantile (--tail-quantile) still fits the target
+  event-aware  'EventAwareLumiBased', unitsPerJob = events per job (lumis are grouped
+               until the next one would exceed it; a single heavy lumi is its own job)
+  file         'FileBased', unitsPerJob = files per job, chosen like 'lumi'
+
+Job time = overhead + events / rate, where the rate (events/s of ScoutingTreeMakerRun3)
+is given directly or measured from a cmsRun log with the framework summary
+(wantSummary: 'event loop Real/event' or 'Event Throughput').
+
+Event counts come from a JSON stand-in or from DAS (through utils/das_client.py, so the
+answers are cached on disk). JSON layout (what --dump writes):
+
+  {"dataset": "/A/B/C", "lumis": [[run, lumi, events], ...]}        per lumi
+  {"dataset": "/A/B/C", "files": [[lfn, events], ...]}              per file
+
+Jobs are simulated over consecutive lumis in (run, lumi) order, as CRAB groups them;
+the prediction ignores file boundaries and site effects.
+
+Example:
+  python3 submitCrabJobs/crab_split_planner.py /ScoutingPFRun3/Run2024F-v1/HLTSCOUT \\
+      --rate-log cmsRun_2024F.log --target-hours 3 --mode event-aware --dump counts_2024F.json
+"""
+
+from __future__ import annotations
+import json
+import math
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "../utils"))
+from das_client import DASClient, DASError  # noqa: E402
+
+SPLITTING = {"lumi": "LumiBased", "event-aware": "EventAwareLumiBased", "file": "FileBased"}
+DEFAULT_TARGET_HOURS = 3.0
+DEFAULT_OVERHEAD = 300.0     # s per job: startup, conditions, stage-out
+DEFAULT_QUANTILE = 0.95
+
+# ---------- event counts ----------
+class EventCounts:
+    """
+    Events per splitting unit, in CRAB order: per lumi (runs/lumis set) or per file (files set).
+    """
+    def __init__(self, dataset: str, events, runs=None, lumis=None, files: Optional[List[str]] = None):
+        self.dataset = dataset
+        self.events = np.asarray(events, dtype=np.int64)
+        self.runs = None if runs is None else np.asarray(runs, dtype=np.int64)
+        self.lumis = None if lumis is None else np.asarray(lumis, dtype=np.int64)
+        self.files = files
+        if self.runs is not None:
+            order = np.lexsort((self.lumis, self.runs))
+            self.events, self.runs, self.lumis = self.events[order], self.runs[order], self.lumis[order]
+
+    @property
+    def per_lumi(self) -> bool:
+        return self.runs is not None
+
+    def select(self, keep) -> "EventCounts":
+        """
+        Counts of the lumis (or files) where 'keep' is True, e.g. a lumi-mask selection.
+        """
+        keep = np.asarray(keep, dtype=bool)
+        if self.per_lumi:
+            return EventCounts(self.dataset, self.events[keep], self.runs[keep], self.lumis[keep])
+        return EventCounts(self.dataset, self.events[keep], files=[f for f, k in zip(self.files, keep) if k])
+
+    @property
+    def unit(self) -> str:
+        return "lumi" if self.per_lumi else "file"
+
+    def to_json(self) -> Dict[str, object]:
+        if self.per_lumi:
+            rows = np.stack([self.runs, self.lumis, self.events], axis=1).tolist()
+            return {"dataset": self.dataset, "lumis": rows}
+        return {"dataset": self.dataset, "files": [[f, int(n)] for f, n in zip(self.files, self.events)]}
+
+    @classmethod
+    def from_json(cls, obj: Dict[str, object]) -> "EventCounts":
+        if "lumis" in obj:
+            rows = np.asarray(obj["lumis"], dtype=np.int64).reshape(-1, 3)
+            return cls(obj.get("dataset", ""), rows[:, 2], rows[:, 0], rows[:, 1])
+        if "files" in obj:
+            files = [r[0] for r in obj["files"]]
+            return cls(obj.get("dataset", ""), [r[1] for r in obj["files"]], files=files)
+        raise ValueError("Event-count JSON needs a 'lumis' or a 'files' list")
+
+def load_counts(path: str, dataset: Optional[str] = None) -> EventCounts:
+    """
+    Counts from a JSON file, or from '<dir>/<Primary>__<Processing>__<Tier>.json' for a dataset.
+    """
+    if os.path.isdir(path):
+        if not dataset:
+            raise ValueError(f"{path} is a directory; a dataset name is needed")
+        path = os.path.join(path, counts_file_name(dataset))
+    with open(path) as f:
+        return EventCounts.from_json(json.load(f))
+
+def counts_file_name(dataset: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", dataset.strip("/").replace("/", "__")) + ".json"
+
+def dump_counts(counts: EventCounts, path: str) -> None:
+    if os.path.isdir(path):
+        path = os.path.join(path, counts_file_name(counts.dataset))
+    with open(path, "w") as f:
+        json.dump(counts.to_json(), f, separators=(",", ":"))
+
+def _das_list(tok: str) -> List[str]:
+    return [t for t in tok.strip("[]").split(",") if t.strip()]
+
+def parse_das_lumi_events(lines: List[str]) -> Dict[tuple, int]:
+    """
+    {(run, lumi): events} from 'file,run,lumi,events dataset=...' output lines
+    ('<lfn> <run> [l1,l2,...] [n1,n2,...]'); lumis without an event count are skipped.
+    """
+    out: Dict[tuple, int] = {}
+    for ln in lines:
+        parts = ln.split()
+        if len(parts) < 4:
+            continue
+        try:
+            run = int(parts[1])
+        except ValueError:
+            continue
+        lumis, events = _das_list(parts[2]), _das_list(parts[3])
+        for l, n in zip(lumis, events):
+            if n.strip() in ("null", "None", ""):
+                continue
+            out[(run, int(l))] = out.get((run, int(l)), 0) + int(float(n))
+    return out
+
+def das_query(dataset: str, per_file: bool = False) -> str:
+    if per_file:
+        return f"file dataset={dataset} | grep file.name, file.nevents"
+    return f"file,run,lumi,events dataset={dataset}"
+
+def das_counts(dataset: str, das: DASClient, per_file: bool = False) -> EventCounts:
+    """
+    Per-lumi (default) or per-file event counts from DAS.
+    """
+    if per_file:
+        rows = [ln.split() for ln in das.query(das_query(dataset, True))]
+        rows = [r for r in rows if len(r) >= 2 and r[1].isdigit()]
+        return EventCounts(dataset, [int(r[1]) for r in rows], files=[r[0] for r in rows])
+    lumi_events = parse_das_lumi_events(das.query(das_query(dataset)))
+    if not lumi_events:
+        raise ValueError(f"DAS returned no per-lumi event counts for {dataset}")
+    keys = list(lumi_events)
+    return EventCounts(dataset, [lumi_events[k] for k in keys], [k[0] for k in keys], [k[1] for k in keys])
+
+# ---------- rate ----------
+_REAL_PER_EVENT = re.compile(r"event loop Real/event\s*=\s*([0-9.eE+-]+)")
+_THROUGHPUT = re.compile(r"Event Throughput:\s*([0-9.eE+-]+)\s*ev/s")
+
+def measure_rate(text: str) -> Optional[float]:
+    """
+    Events/s from a cmsRun log with the framework summary, or None.
+    """
+    m = _THROUGHPUT.search(text)
+    if m and float(m.group(1)) > 0:
+        return float(m.group(1))
+    m = _REAL_PER_EVENT.search(text)
+    if m and float(m.group(1)) > 0:
+        return 1.0 / float(m.group(1))
+    return None
+
+# ---------- job simulation ----------
+def jobs_fixed(events: np.ndarray, units: int) -> np.ndarray:
+    """
+    Events per job for 'units' consecutive units per job (LumiBased / FileBased).
+    """
+    csum = np.concatenate([[0], np.cumsum(events)])
+    edges = np.append(np.arange(0, len(events), max(1, units)), len(events))
+    return np.diff(csum[edges])
+
+def jobs_event_aware(events: np.ndarray, max_events: int) -> np.ndarray:
+    """
+    Events per job for EventAwareLumiBased: consecutive lumis are added while the job stays
+    within 'max_events'; a lumi above it alone makes one job.
+    """
+    jobs, cur = [], 0
+    for n in events.tolist():
+        if cur and cur + n > max_events:
+            jobs.append(cur)
+            cur = 0
+        cur += n
+    if cur or not jobs:
+        jobs.append(cur)
+    return np.asarray(jobs, dtype=np.int64)
+
+def job_stats(job_events: np.ndarray, rate: float, overhead: float) -> Dict[str, float]:
+    t = overhead + job_events / rate
+    return {
+        "jobs": int(len(job_events)),
+        "p50": float(np.percentile(t, 50)),
+        "p90": float(np.percentile(t, 90)),
+        "p99": float(np.percentile(t, 99)),
+        "max": float(t.max()) if len(t) else 0.0,
+        "cpu_hours": float(t.sum() / 3600.0),
+    }
+
+def plan_splitting(counts: EventCounts, rate: float, target_hours: float = DEFAULT_TARGET_HOURS,
+                   mode: str = "lumi", overhead: float = DEFAULT_OVERHEAD,
+                   quantile: float = DEFAULT_QUANTILE) -> Dict[str, object]:
+    """
+    Splitting for one dataset: {'mode', 'splitting', 'units', 'events', 'jobs', 'p50', ..., 'max'}.
+    """
+    if mode not in SPLITTING:
+        raise ValueError(f"Unknown mode '{mode}' (choose from {', '.join(SPLITTING)})")
+    if mode in ("lumi", "event-aware") and not counts.per_lumi:
+        raise ValueError(f"Mode '{mode}' needs per-lumi event counts")
+    if mode == "file" and counts.per_lumi:
+        raise ValueError("Mode 'file' needs per-file event counts")
+    if not len(counts.events):
+        raise ValueError("no lumis/files with event counts")
+    budget = max(1.0, (target_hours * 3600.0 - overhead) * rate)  # events a job may process
+    ev = counts.events
+
+    if mode == "event-aware":
+        units = int(budget)
+        jobs = jobs_event_aware(ev, units)
+    else:
+        def tail(u):
+            return np.quantile(jobs_fixed(ev, u), quantile)
+        lo, hi = 1, max(1, len(ev))
+        if tail(lo) > budget:
+            hi = lo
+        while lo < hi:  # largest u with tail(u) <= budget
+            mid = (lo + hi + 1) // 2
+            if tail(mid) <= budget:
+                lo = mid
+            else:
+                hi = mid - 1
+        units = lo
+        jobs = jobs_fixed(ev, units)
+
+    out: Dict[str, object] = {"dataset": counts.dataset, "mode": mode, "splitting": SPLITTING[mode],
+                              "units": units, "events": int(ev.sum()), "nunits": int(len(ev)),
+                              "rate": rate, "target_hours": target_hours}
+    out.update(job_stats(jobs, rate, overhead))
+    return out
+
+def baseline(counts: EventCounts, lumis_per_job: int, rate: float, overhead: float = DEFAULT_OVERHEAD) -> Dict[str, float]:
+    """
+    Prediction for the current fixed lumisPerJob (per-lumi counts only).
+    """
+    return job_stats(jobs_fixed(counts.events, lumis_per_job), rate, overhead)
+
+def _hours(s: float) -> str:
+    return f"{s / 3600.0:5.2f} h"
+
+def format_plan(plan: Dict[str, object], base: Optional[Dict[str, float]] = None, base_units: Optional[int] = None) -> str:
+    unit = {"lumi": "lumis", "event-aware": "events", "file": "files"}[str(plan["mode"])]
+    lines = [
+        f"{plan['dataset']}: {plan['events']} events in {plan['nunits']} {'files' if plan['mode'] == 'file' else 'lumis'}, "
+        f"rate {plan['rate']:.0f} ev/s, target {plan['target_hours']:.2f} h",
+        f"  plan    : {plan['splitting']}, unitsPerJob = {plan['units']} {unit} -> {plan['jobs']} jobs, "
+        f"p50 {_hours(plan['p50'])}, p90 {_hours(plan['p90'])}, p99 {_hours(plan['p99'])}, "
+        f"max {_hours(plan['max'])}, {plan['cpu_hours']:.0f} job-hours",
+    ]
+    if base:
+        lines.append(
+            f"  current : LumiBased, unitsPerJob = {base_units} lumis -> {base['jobs']} jobs, "
+            f"p50 {_hours(base['p50'])}, p90 {_hours(base['p90'])}, p99 {_hours(base['p99'])}, max {_hours(base['max'])}")
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("dataset", nargs="?", default="", help="Dataset (counts from DAS unless --counts is given)")
+    ap.add_argument("--counts", default=None, help="Event-count JSON (or a directory of <dataset>.json)")
+    ap.add_argument("--mode", choices=list(SPLITTING), default="lumi")
+    rate = ap.add_mutually_exclusive_group(required=True)
+    rate.add_argument("--rate", type=float, help="Measured events/s of ScoutingTreeMakerRun3")
+    rate.add_argument("--rate-log", help="cmsRun log with the framework summary to take the rate from")
+    ap.add_argument("--target-hours", type=float, default=DEFAULT_TARGET_HOURS)
+    ap.add_argument("--overhead", type=float, default=DEFAULT_OVERHEAD, help="Seconds per job besides the event loop")
+    ap.add_argument("--tail-quantile", type=float, default=DEFAULT_QUANTILE,
+                    help="Job-time quantile that must fit the target (lumi/file modes)")
+    ap.add_argument("--current", type=int, default=None, help="Current lumisPerJob, for comparison")
+    ap.add_argument("--dump", default=None, help="Write the event counts as JSON (file or directory)")
+    ap.add_argument("--das-ttl", type=int, default=24 * 3600, help="DAS cache lifetime in seconds")
+    args = ap.parse_args(argv)
+
+    if args.rate_log:
+        with open(args.rate_log, errors="replace") as f:
+            r = measure_rate(f.read())
+        if r is None:
+            ap.error(f"no 'Event Throughput' / 'event loop Real/event' line in {args.rate_log}")
+    else:
+        r = args.rate
+    if r <= 0:
+        ap.error(f"the rate must be positive (got {r:g} events/s)")
+    if not (args.counts or args.dataset):
+        ap.error("give a dataset or --counts")
+    try:
+        if args.counts:
+            counts = load_counts(args.counts, args.dataset)
+        else:
+            counts = das_counts(args.dataset, DASClient(ttl=args.das_ttl), per_file=args.mode == "file")
+        plan = plan_splitting(counts, r, args.target_hours, args.mode, args.overhead, args.tail_quantile)
+    except (OSError, ValueError, DASError) as e:
+        print(f"[crab_split_planner] {e}", file=sys.stderr)
+        return 1
+    if args.dump:
+        dump_counts(counts, args.dump)
+
+    base = baseline(counts, args.current, r, args.overhead) if (args.current and counts.per_lumi) else None
+    print(format_plan(plan, base, args.current))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,14 +4,22 @@
 from __future__ import annotations
 import argparse
 import datetime as dt
+import functools
+import json
+import os
 import re
 import shutil
 import subprocess
 import sys
 import py_compile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+HERE = Path(__file__).resolve().parent
+CONFIGS_DIR = HERE.parent / "ScoutingNtuplizer" / "python" / "configs"
+DATA_JEC_LIST = HERE.parent / "data" / "cfg" / "data_jec_list.txt"
+
 # =============== Pretty colors & tiny logger ===============
 class C:
     R = "\033[91m"   # bright red
@@ -91,7 +99,9 @@ def build_tokens(dataset: str,
                  working_area: Path,
                  namedir: str,
                  lumi_mask: Optional[Path] = None,
-                 secondary_dataset: Optional[str] = None) -> Dict[str, str]:
+                 secondary_dataset: Optional[str] = None,
+                 suffix: str = "",
+                 output_profile: Optional[str] = None) -> Dict[str, str]:
     try:
         sample = dataset.split('/')[1]
         processing = dataset.split('/')[2]
@@ -99,7 +109,7 @@ def build_tokens(dataset: str,
     except Exception as exc:
         raise ValueError(f"Dataset must look like /Primary/Processing/Tier, got: {dataset}") from exc
 
-    request_name = sanitize_request_name(f"{sample}__{processing}__{tier}")
+    request_name = sanitize_request_name(f"{sample}__{processing}__{tier}{suffix}")
     root_name = f"{request_name}.root"
 
     tokens: Dict[str, str] = {
@@ -117,18 +127,27 @@ def build_tokens(dataset: str,
         tokens["SECONDARYDATASET"] = secondary_dataset
     if lumi_mask:
         tokens["LUMIMASK"] = str(lumi_mask)
+    if output_profile:
+        tokens["THISOUTPUTPROFILE"] = output_profile
     return tokens
 
 # ----- Template rendering -----
+@functools.lru_cache(maxsize=64)
+def compile_template(text: str, names: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    Split a template once into literal text (even indices) and token names (odd indices),
+    using one alternation of all whole-word tokens (longest first). Cached per
+    (template, token set), so rendering many datasets is a join.
+    """
+    if not names:
+        return (text,)
+    alt = "|".join(re.escape(k) for k in sorted(names, key=len, reverse=True))
+    return tuple(re.split(rf"\b({alt})\b", text))
+
 def render_template_text(text: str, tokens: Dict[str, str]) -> str:
-    patterns = {k: re.compile(rf"\b{re.escape(k)}\b") for k in tokens}
-    out: List[str] = []
-    for raw in text.splitlines(keepends=True):
-        line = raw
-        for k, pat in patterns.items():
-            line = pat.sub(tokens[k], line)
-        out.append(line)
-    return "".join(out)
+    parts = list(compile_template(text, tuple(sorted(tokens))))
+    parts[1::2] = [tokens[k] for k in parts[1::2]]
+    return "".join(parts)
 
 # ----- comment/uncomment helpers -----
 def _comment(line: str) -> str:
@@ -169,12 +188,22 @@ def _ensure_maxevents_minus1(text: str) -> str:
         return text[:start_pset] + canon + text[j:]
     return text[:start_pset] + canon + text[start_pset:]
 
-def patch_cmssw_cfg_text(text: str, era: Optional[str]) -> Tuple[str, Dict[str, bool]]:
+def patch_cmssw_cfg_text(text: str, era: Optional[str],
+                         output_profile: bool = False) -> Tuple[str, Dict[str, bool]]:
+    # the same template is patched for every dataset of an era: do it once per (template, era)
+    new_text, checks = _patch_cmssw_cfg_text(text, era, output_profile)
+    return new_text, dict(checks)
+
+@functools.lru_cache(maxsize=32)
+def _patch_cmssw_cfg_text(text: str, era: Optional[str],
+                          output_profile: bool = False) -> Tuple[str, Tuple[Tuple[str, bool], ...]]:
     lines = text.splitlines(keepends=False)
     has_token_globaltag = False
     has_token_rootfile = False
+    has_token_outputprofile = False
     new_lines: List[str] = []
     re_era = re.compile(r"^\s*era_\s*=\s*['\"][^'\"]*['\"]")
+    re_profile = re.compile(r"^\s*outputProfile_\s*=")
 
     for ln in lines:
         if era and re_era.match(ln):
@@ -190,15 +219,22 @@ def patch_cmssw_cfg_text(text: str, era: Optional[str]) -> Tuple[str, Dict[str,
         elif 'fileName' in ln and 'THISROOTFILE' not in ln and re.search(r"cms\.string\(\s*'[^']+'\s*\)", ln):
             ln = _comment(ln)
 
+        # outputProfile_ only when one is requested (THISOUTPUTPROFILE token)
+        if output_profile and 'THISOUTPUTPROFILE' in ln:
+            ln = _uncomment(ln); has_token_outputprofile = True
+        elif output_profile and re_profile.match(ln):
+            ln = _comment(ln)
+
         new_lines.append(ln)
 
     new_text = "\n".join(new_lines) + "\n"
     new_text = _ensure_maxevents_minus1(new_text)
 
-    return new_text, {
-        'has_token_globaltag': has_token_globaltag,
-        'has_token_rootfile': has_token_rootfile,
-    }
+    return new_text, (
+        ('has_token_globaltag', has_token_globaltag),
+        ('has_token_rootfile', has_token_rootfile),
+        ('has_token_outputprofile', has_token_outputprofile),
+    )
 
 # ----- outLFNDirBase year patching in CRAB template -----
 def _infer_year_from(era: Optional[str], dataset: Optional[str], processing: Optional[str]) -> Optional[str]:
@@ -269,77 +305,266 @@ def patch_crab_outlfn_year(text: str, year: Optional[str]) -> Tuple[str, Optiona
 
     return ("\n".join(lines) + "\n"), applied_path
 
-# ========================= Main ===========================
-def main() -> None:
-    parser = argparse.ArgumentParser(
-        description="Create CMSSW+CRAB cfgs (era/tokens/maxEvents), optionally submit."
-    )
-    parser.add_argument('-i', '--inputList', required=True, help='Input dataset list file.')
-    parser.add_argument('-d', '--storageDir', dest='storage_dir', required=True, help='Output base dir.')
-    parser.add_argument('-t', dest='template_crab', required=True, help='CRAB3 template cfg.')
-    parser.add_argument('-c', dest='template_cmssw', required=True, help='CMSSW template cfg.')
-    parser.add_argument('-v', dest='tagname', required=True, help='Tag prefix for output folder.')
-    parser.add_argument('--lumi-mask', dest='lumi_mask', default=None,
-                        help="Optional lumiMask JSON path (requires LUMIMASK token in template).")
-    parser.add_argument('--submit', action='store_true', default=False, help='Submit with CRAB.')
-    args = parser.parse_args()
+def patch_crab_splitting(text: str, splitting: Optional[str]) -> str:
+    """
+    Set the active config.Data.splitting line to 'splitting' (planner output); unchanged if None.
+    """
+    if not splitting:
+        return text
+    pat = re.compile(r"^(\s*config\.Data\.splitting\s*=\s*)([\"']).*?\2", re.M)
+    if not pat.search(text):
+        return text.rstrip("\n") + f"\nconfig.Data.splitting = '{splitting}'\n"
+    return pat.sub(lambda m: f"{m.group(1)}{m.group(2)}{splitting}{m.group(2)}", text)
+
+def _set_crab_param(text: str, key: str, value: str) -> str:
+    # replace the active 'config.Data.<key> = ...' line, or append one
+    pat = re.compile(rf"^(\s*config\.Data\.{key}\s*=\s*).*$", re.M)
+    if pat.search(text):
+        return pat.sub(lambda m: f"{m.group(1)}{value}", text, count=1)
+    return text.rstrip("\n") + f"\nconfig.Data.{key} = {value}\n"
+
+def patch_crab_lumimask(text: str, mask: Optional[str], run_range: Optional[str]) -> str:
+    """
+    Activate config.Data.lumiMask / runRange for a per-task mask written by prepare_lumi_masks.
+    """
+    if mask:
+        text = _set_crab_param(text, "lumiMask", repr(mask))
+    if run_range:
+        text = _set_crab_param(text, "runRange", repr(run_range))
+    return text
+
+# ================= Lumi masks ==============================
+def _dataset_runs(specs: List[Dict[str, str]], das_ttl: int) -> Dict[str, Tuple[int, int]]:
+    # {dataset: (first run, last run + 1)} from DAS (cached)
+    sys.path.insert(0, str(HERE.parent / "utils"))
+    from das_client import DASClient
+
+    das = DASClient(ttl=das_ttl)
+    res = das.query_many([f"run dataset={s['dataset']}" for s in specs])
+    out: Dict[str, Tuple[int, int]] = {}
+    for s in specs:
+        runs = [int(x) for x in res[f"run dataset={s['dataset']}"] if x.isdigit()]
+        if runs:
+            out[s['dataset']] = (min(runs), max(runs) + 1)
+    return out
 
-    input_list = Path(args.inputList).resolve()
-    template_crab = Path(args.template_crab).resolve()
-    template_cmssw = Path(args.template_cmssw).resolve()
-    storage_base = Path(args.storage_dir).resolve()
-    tagname = args.tagname
+def prepare_lumi_masks(specs: List[Dict[str, str]], args: argparse.Namespace,
+                       mask_path: Path, mask_dir: Path) -> Optional[List[Dict[str, str]]]:
+    """
+    Restrict the golden JSON to each dataset's runs and, with --mask-iov-split, split it by the
+    era's L2L3Residual IOVs (one CRAB task per IOV). Writes one mask per task to 'mask_dir' and
+    returns the expanded specs ('lumiMaskFile', 'runRange', 'part'); None on errors.
+    """
+    sys.path.insert(0, str(CONFIGS_DIR))
+    from lumi_mask import LumiMask, split_by_iov
+    from jec_utils import RunIntervalIndex, get_era_block
+
+    golden = LumiMask.from_file(str(mask_path))
+    info(f"Lumi mask {mask_path.name}: {golden.n_runs()} runs, {golden.n_lumis()} lumis")
+    ranges: Dict[str, Tuple[int, int]] = {}
+    if args.mask_runs == "das":
+        try:
+            ranges = _dataset_runs(specs, args.das_ttl)
+        except Exception as e:
+            err(f"Run ranges from DAS failed ({e}); use --mask-runs none to skip.")
+            return None
+
+    out: List[Dict[str, str]] = []
+    for spec in specs:
+        ds = spec['dataset']
+        mask = golden.restrict_runs(*ranges[ds]) if ds in ranges else golden
+        if args.mask_runs == "das" and ds not in ranges:
+            warn(f"{ds}: no runs in DAS; keeping the full mask")
+        if args.mask_iov_split:
+            block = get_era_block(str(args.mask_iov_split), spec.get('era') or "")
+            if not block.get("L2L3Residual"):
+                err(f"{ds}: no L2L3Residual for era '{spec.get('era')}' in {args.mask_iov_split}")
+                return None
+            parts = [(f"iov{k}", lo, hi, sub)
+                     for k, (lo, hi, _, sub) in enumerate(split_by_iov(mask, block["L2L3Residual"]))]
+        else:
+            parts = [("", 0, RunIntervalIndex.OPEN_HI, mask)] if mask else []
+        if not parts:
+            warn(f"{ds}: no certified lumis left in its runs; skipped")
+            continue
+        base = sanitize_request_name(ds.strip('/').replace('/', '__'))
+        for label, lo, hi, sub in parts:
+            first, end = sub.run_range()
+            path = mask_dir / f"{base}{'__' + label if label else ''}.json"
+            sub.write(str(path))
+            iov = (f", IOV [{lo if lo else 'open'}, {'open' if hi == RunIntervalIndex.OPEN_HI else hi})"
+                   if label else "")
+            info(f"{ds}{' ' + label if label else ''}: runs {first}-{end - 1}, "
+                 f"{sub.n_runs()} runs / {sub.n_lumis()} lumis{iov}")
+            new = dict(spec, lumiMaskFile=str(path), runRange=f"{first}-{end - 1}")
+            if label:
+                new['part'] = label
+            out.append(new)
+    if not out:
+        err("No dataset has certified lumis in the lumi mask.")
+        return None
+    return out
 
-    for pth, msg in [
-        (input_list, "Input list not found"),
-        (template_crab, "CRAB template not found"),
-        (template_cmssw, "CMSSW template not found"),
-    ]:
-        if not pth.exists():
-            err(f"{msg}: {pth}")
-            sys.exit(1)
+# ================= Incremental recovery ====================
+def prepare_recovery(specs: List[Dict[str, str]], args: argparse.Namespace,
+                     mask_dir: Path) -> Optional[List[Dict[str, str]]]:
+    """
+    --incremental: keep only the lumis not yet in produced ntuples / CRAB reports
+    (crab_recovery.py). Each spec gets a missing-lumi mask and a '__recovery' request name;
+    complete datasets are dropped. Target = the spec's mask, else the dataset's lumis in DAS.
+    """
+    import crab_recovery as rec
 
-    lumi_mask_path: Optional[Path] = None
-    if args.lumi_mask:
-        p = Path(args.lumi_mask).expanduser().resolve()
-        if not p.exists():
-            err(f"--lumi-mask not found: {p}")
-            sys.exit(1)
-        lumi_mask_path = p
+    try:
+        files: List[str] = []
+        for loc in args.scan_outputs:
+            files += rec.list_outputs(loc, args.storage_lister, args.storage_prefix)
+    except (OSError, RuntimeError) as e:
+        err(f"Listing outputs failed: {e}")
+        return None
+    info(f"Incremental: {len(files)} ntuple(s) under {len(args.scan_outputs)} location(s)")
+
+    das = None
+    processed: Dict[str, object] = {}
+    out: List[Dict[str, str]] = []
+    for spec in specs:
+        ds = spec['dataset']
+        try:
+            if ds not in processed:
+                mine = rec.outputs_for(ds, files)
+                reports = rec.crab_reports(ds, args.crab_reports)
+                processed[ds] = rec.lumis_from_ntuples(mine, args.jobs) | rec.lumis_from_reports(reports)
+                info(f"{ds}: {len(mine)} ntuple(s), {len(reports)} CRAB report(s)")
+            if spec.get('lumiMaskFile'):
+                target = rec.LumiMask.from_file(spec['lumiMaskFile'])
+            else:
+                das = das or rec.DASClient(ttl=args.das_ttl)
+                target = rec.das_lumis(ds, das)
+        except ImportError as e:
+            err(f"Reading ntuples needs uproot ({e}); use --crab-reports only or set up the environment.")
+            return None
+        except Exception as e:
+            err(f"{ds}: {type(e).__name__}: {e}")
+            return None
+        missing = rec.missing_lumis(target, processed[ds])
+        label = f"{spec['part']}__recovery" if spec.get('part') else "recovery"
+        print("  " + rec.summarize(f"{ds} ({spec['part']})" if spec.get('part') else ds,
+                                   target, processed[ds], missing))
+        if not missing:
+            ok(f"{ds}{' ' + spec['part'] if spec.get('part') else ''}: complete, nothing to submit")
+            continue
+        path = mask_dir / f"{rec.request_base(ds)}__{label}.json"
+        missing.write(str(path))
+        first, end = missing.run_range()
+        out.append(dict(spec, lumiMaskFile=str(path), runRange=f"{first}-{end - 1}", part=label))
+    return out
 
-    stamp = timestamp_label()
-    namedir = f"{tagname}_{stamp}"
-    out_root = storage_base / namedir
-    cfg_dir = out_root / 'cfg'
-    work_dir = out_root / 'workdir'
-    ensure_dirs([out_root, cfg_dir, work_dir])
+# ================= Split planning ==========================
+def plan_splitting_for(specs: List[Dict[str, str]], args: argparse.Namespace) -> bool:
+    """
+    Replace each spec's lumisPerJob by the planned unitsPerJob (and set its 'splitting'),
+    printing the predicted job count and tail next to the fixed lumisPerJob of the list.
+    Event counts come from --event-counts or DAS (cached). Returns False on errors.
+    """
+    import crab_split_planner as csp
 
-    lines = read_input_lines(input_list)
-    if not lines:
-        err(f"No valid dataset lines in {input_list}")
-        sys.exit(1)
-    if len(lines) > 1:
-        warn(f"Multiple dataset lines ({len(lines)}); using the first.")
+    if args.rate_log:
+        rate = csp.measure_rate(Path(args.rate_log).read_text(errors="replace"))
+        if rate is None:
+            err(f"No 'Event Throughput' / 'event loop Real/event' line in {args.rate_log}")
+            return False
+    else:
+        rate = args.rate
+    per_file = args.split_plan == "file"
 
-    spec = parse_dataset_line(lines[0])
+    das = None
+    if not args.event_counts:
+        das = csp.DASClient(ttl=args.das_ttl)
+        info(f"Fetching event counts of {len(specs)} dataset(s) from DAS...")
+        try:
+            das.query_many([csp.das_query(s['dataset'], per_file) for s in specs])
+        except csp.DASError as e:
+            err(str(e))
+            return False
+
+    info(f"Split plan: {csp.SPLITTING[args.split_plan]}, {rate:.0f} ev/s, target {args.target_hours:.2f} h/job")
+    total_jobs = 0
+    loaded: Dict[str, object] = {}
+    for spec in specs:
+        try:
+            counts = loaded.get(spec['dataset'])
+            if counts is None:
+                counts = loaded[spec['dataset']] = (
+                    csp.load_counts(args.event_counts, spec['dataset']) if args.event_counts
+                    else csp.das_counts(spec['dataset'], das, per_file))
+            if spec.get('lumiMaskFile') and counts.per_lumi:
+                sys.path.insert(0, str(CONFIGS_DIR))
+                from lumi_mask import LumiMask
+                counts = counts.select(LumiMask.from_file(spec['lumiMaskFile']).contains(counts.runs, counts.lumis))
+            plan = csp.plan_splitting(counts, rate, args.target_hours, args.split_plan,
+                                      args.job_overhead, args.tail_quantile)
+        except (OSError, ValueError, csp.DASError) as e:
+            err(f"{spec['dataset']}: {e}")
+            return False
+        current = int(spec['lumisPerJob']) if spec['lumisPerJob'].isdigit() else 0
+        base = csp.baseline(counts, current, rate, args.job_overhead) if (current and counts.per_lumi) else None
+        if spec.get('part'):
+            plan['dataset'] = f"{spec['dataset']} ({spec['part']})"
+        print(csp.format_plan(plan, base, current))
+        expected = int(spec['processedEvents']) if spec['processedEvents'].lstrip('-').isdigit() else -1
+        if expected > 0 and expected != plan['events']:
+            warn(f"{spec['dataset']}: list says {expected} events, counts have {plan['events']}")
+        spec['lumisPerJob'] = str(plan['units'])
+        spec['splitting'] = str(plan['splitting'])
+        total_jobs += int(plan['jobs'])
+    info(f"Predicted {total_jobs} job(s) in total.")
+    return True
+
+# ================= Per-dataset worker ======================
+def _fail(result: Dict[str, object], msg: str, tail: str = "") -> Dict[str, object]:
+    result["status"] = "failed"
+    result["error"] = msg
+    if tail:
+        result["tail"] = tail
+    return result
+
+def prepare_and_submit(spec: Dict[str, str], ctx: Dict[str, object]) -> Dict[str, object]:
+    """
+    Render the CMSSW + CRAB cfgs for one dataset line and optionally submit it.
+    Runs inside a worker process: never exits, never prints; everything the parent
+    needs for logging and the final summary goes into the returned dict.
+    """
     dataset = spec['dataset']
-    processed = spec['processedEvents']  # currently unused
-    lumis_per_job = spec['lumisPerJob']
+    processed = spec['processedEvents']  # only compared with the event counts by --split-plan
+    lumis_per_job = spec['lumisPerJob']  # unitsPerJob; planned by --split-plan if given
+    splitting = spec.get('splitting')
+    part = spec.get('part')
     global_tag = spec['globalTag']
     secondary = spec.get('secondaryDataset')
     era = spec.get('era')
 
+    result: Dict[str, object] = {"dataset": dataset, "era": era, "status": "prepared"}
+    if part:
+        result["part"] = part
+
     try:
         sample = dataset.split('/')[1]
         processing = dataset.split('/')[2]
         tier = dataset.split('/')[3]
     except Exception:
-        err(f"Bad dataset (expect /Primary/Processing/Tier): {dataset}")
-        sys.exit(1)
-
-    request_name = sanitize_request_name(f"{sample}__{processing}__{tier}")
-    cmssw_cfg_path = cfg_dir / f"{sample}_cmssw.py"
-    crab_cfg_path = cfg_dir / f"{sample}_crab.py"
+        return _fail(result, f"Bad dataset (expect /Primary/Processing/Tier): {dataset}")
+
+    cfg_dir = Path(ctx['cfg_dir'])
+    work_dir = Path(ctx['work_dir'])
+    # request_name (not just the primary dataset) so several eras of the same PD can share cfg_dir
+    suffix = f"__{part}" if part else ""
+    request_name = sanitize_request_name(f"{sample}__{processing}__{tier}{suffix}")
+    cmssw_cfg_path = cfg_dir / f"{request_name}_cmssw.py"
+    crab_cfg_path = cfg_dir / f"{request_name}_crab.py"
+    result["cmssw_cfg"] = str(cmssw_cfg_path)
+    result["crab_cfg"] = str(crab_cfg_path)
+    result["request"] = request_name
+    result["project"] = str(work_dir / f"crab_{request_name}")
 
     tokens = build_tokens(
         dataset=dataset,
@@ -348,13 +573,15 @@ def main() -> None:
         global_tag=global_tag,
         cfg_path=cmssw_cfg_path,
         working_area=work_dir,
-        namedir=namedir,
-        lumi_mask=lumi_mask_path,
+        namedir=str(ctx['namedir']),
+        lumi_mask=spec.get('lumiMaskFile') or ctx.get('lumi_mask'),
         secondary_dataset=secondary,
+        suffix=suffix,
+        output_profile=ctx.get('output_profile'),
     )
 
     # --------- CMSSW: patch & write ----------
-    cmssw_template_text = template_cmssw.read_text()
+    cmssw_template_text = str(ctx['cmssw_template_text'])
     tokens_cmssw = dict(tokens)
 
     if ("THISGLOBALTAG" in cmssw_template_text
@@ -367,13 +594,13 @@ def main() -> None:
             and '"THISROOTFILE"' not in cmssw_template_text):
         tokens_cmssw["THISROOTFILE"] = f"'{tokens_cmssw['THISROOTFILE']}'"
 
-    patched_text, checks = patch_cmssw_cfg_text(cmssw_template_text, era)
+    patched_text, checks = patch_cmssw_cfg_text(cmssw_template_text, era, bool(ctx.get('output_profile')))
     if not checks.get('has_token_globaltag', False):
-        err("Template must have active THISGLOBALTAG line.")
-        sys.exit(1)
+        return _fail(result, "Template must have active THISGLOBALTAG line.")
     if not checks.get('has_token_rootfile', False):
-        err("Template must have active THISROOTFILE line.")
-        sys.exit(1)
+        return _fail(result, "Template must have active THISROOTFILE line.")
+    if ctx.get('output_profile') and not checks.get('has_token_outputprofile', False):
+        return _fail(result, "Template must have an outputProfile_ = 'THISOUTPUTPROFILE' line for --output-profile.")
 
     final_cmssw = render_template_text(patched_text, tokens_cmssw)
     cmssw_cfg_path.write_text(final_cmssw)
@@ -382,71 +609,321 @@ def main() -> None:
     try:
         py_compile.compile(str(cmssw_cfg_path), doraise=True)
     except py_compile.PyCompileError as e:
-        err("CMSSW cfg syntax error.")
-        print(e.msg)
-        sys.exit(1)
+        return _fail(result, "CMSSW cfg syntax error.", e.msg)
+
+    # --------- Optional frozen cmsRun cfg (psetName points to it) ----------
+    if ctx.get('freeze'):
+        import freeze_cmssw_cfg as fz
+        try:
+            frozen = fz.freeze_and_validate(str(cmssw_cfg_path), fmt=str(ctx['freeze']))
+        except (fz.FreezeError, OSError) as e:
+            return _fail(result, "Freezing the CMSSW cfg failed.", str(e))
+        tokens["CMSSWCFG"] = str(frozen["path"])
+        result["frozen"] = f"{Path(str(frozen['path'])).name}, {fz.format_timing(frozen)}"
+        result["load_saved_s"] = float(frozen["source_s"]) - float(frozen["frozen_s"])
 
     # --------- CRAB: patch outLFNDirBase year, render & write ----------
-    crab_text = Path(template_crab).read_text()
+    crab_text = str(ctx['crab_template_text'])
 
     # Infer target year from era/dataset
     target_year = _infer_year_from(era=era, dataset=dataset, processing=processing)
 
     crab_text_patched, applied_lfn = patch_crab_outlfn_year(crab_text, target_year)
+    crab_text_patched = patch_crab_splitting(crab_text_patched, splitting)
+    crab_text_patched = patch_crab_lumimask(crab_text_patched, spec.get('lumiMaskFile'), spec.get('runRange'))
     final_crab = render_template_text(crab_text_patched, tokens)
     crab_cfg_path.write_text(final_crab)
+    result["lfn"] = applied_lfn
+    if splitting:
+        result["splitting"] = f"{splitting}, unitsPerJob = {lumis_per_job}"
+    if spec.get('lumiMaskFile'):
+        result["mask"] = f"{Path(spec['lumiMaskFile']).name} (runs {spec['runRange']})"
+        result["lumi_mask"] = spec['lumiMaskFile']
+        result["run_range"] = spec['runRange']
+
+    # --------- Optional submission ----------
+    if not ctx.get('submit'):
+        return result
 
-    # --------- Minimal, bright output ----------
-    ok(f"Prepared: {dataset}")
-    print(f"      \033[91mEra:\033[0m {era if era else '(template)'}")
-    if applied_lfn:
-        print(f"      \033[91mLFN:\033[0m .../{applied_lfn.strip('/').split('/')[-1]}/")
+    try:
+        cp = subprocess.run(
+            ['crab', 'submit', '-c', str(crab_cfg_path)],
+            text=True, capture_output=True, check=True
+        )
+        out_all = (cp.stdout or "") + (cp.stderr or "")
+        result["status"] = "submitted"
+    except subprocess.CalledProcessError as e:
+        out_all = (e.stdout or "") + (e.stderr or "")
+        _fail(result, f"CRAB submission failed (exit {e.returncode}).",
+              "\n".join(out_all.strip().splitlines()[-20:]))
+
+    task_name = re.search(r"Task name:\s*(.+)", out_all)
+    project_dir = re.search(r"Project dir:\s*(.+)", out_all)
+    log_file = re.search(r"Log file is\s*(.+)", out_all)
+    if task_name:
+        result["task"] = task_name.group(1).strip()
+    if project_dir:
+        result["workdir"] = project_dir.group(1).strip()
+    if log_file:
+        result["log"] = log_file.group(1).strip()
+    return result
+
+# ===================== Reporting ===========================
+def print_result(res: Dict[str, object]) -> None:
+    if res["status"] == "failed":
+        err(f"Failed: {res['dataset']}{' ' + str(res['part']) if res.get('part') else ''} -> {res.get('error')}")
     else:
-        print(f"      \033[91mLFN:\033[0m (unchanged)")
-    print(f"      \033[91mCMSSW:\033[0m {cmssw_cfg_path}")
-    print(f"      \033[91mCRAB:\033[0m {crab_cfg_path}")
+        ok(f"Prepared: {res['dataset']}{' ' + str(res['part']) if res.get('part') else ''}")
+    print(f"      \033[91mEra:\033[0m {res.get('era') or '(template)'}")
+    if "cmssw_cfg" in res:
+        lfn = res.get("lfn")
+        if lfn:
+            print(f"      \033[91mLFN:\033[0m .../{str(lfn).strip('/').split('/')[-1]}/")
+        else:
+            print(f"      \033[91mLFN:\033[0m (unchanged)")
+        if res.get("splitting"):
+            print(f"      \033[91mSplit:\033[0m {res['splitting']}")
+        if res.get("mask"):
+            print(f"      \033[91mMask:\033[0m {res['mask']}")
+        print(f"      \033[91mCMSSW:\033[0m {res['cmssw_cfg']}")
+        if res.get("frozen"):
+            print(f"      \033[91mFrozen:\033[0m {res['frozen']}")
+        print(f"      \033[91mCRAB:\033[0m {res['crab_cfg']}")
+    if res["status"] == "submitted":
+        ok("Delivered to CRAB3.")
+    for key, label in (("task", "Task"), ("workdir", "Workdir"), ("log", "Log")):
+        if res.get(key):
+            print(f"      \033[91m{label}:\033[0m {res[key]}")
+    if res.get("tail"):
+        print(_c("  --- output (tail) ---", C.Y))
+        print(res["tail"])
+
+def print_summary(results: List[Dict[str, object]]) -> None:
+    rows = [(str(r.get("era") or "-"), str(r["status"]),
+             str(r.get("task") or r.get("error") or "-"),
+             str(r["dataset"]) + (f" ({r['part']})" if r.get("part") else "")) for r in results]
+    head = ("Era", "Status", "Task / Error", "Dataset")
+    widths = [max(len(h), *(len(row[i]) for row in rows)) for i, h in enumerate(head)]
+    line = "-" * (sum(widths) + 3 * (len(widths) - 1))
+    print(_c("\n=== Submission summary ===", C.BOLD))
+    print(" | ".join(h.ljust(w) for h, w in zip(head, widths)))
+    print(line)
+    for row in rows:
+        text = " | ".join(c.ljust(w) for c, w in zip(row, widths))
+        print(_c(text, C.R) if row[1] == "failed" else text)
+    print(line)
+
+TASK_FIELDS = ("dataset", "era", "part", "request", "status", "task", "project", "crab_cfg", "cmssw_cfg",
+               "lumi_mask", "run_range", "splitting", "error")
+
+def write_task_list(out_root: Path, results: List[Dict[str, object]]) -> Path:
+    """
+    tasks.json next to cfg/ and workdir/: one record per task, read by crab_monitor.py.
+    """
+    path = out_root / "tasks.json"
+    records = [{k: r[k] for k in TASK_FIELDS if r.get(k) is not None} for r in results]
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(records, indent=1) + "\n")
+    os.replace(tmp, path)
+    return path
 
-    # --------- Optional submission ----------
-    if args.submit:
-        if shutil.which('crab') is None:
-            err("'crab' not found in PATH.")
+# ========================= Main ===========================
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "monitor":
+        import crab_monitor
+        sys.exit(crab_monitor.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "schedule":
+        import crab_scheduler
+        sys.exit(crab_scheduler.main(sys.argv[2:]))
+
+    parser = argparse.ArgumentParser(
+        epilog="Status of submitted tasks: createAndSubmitCrab.py monitor <output dir(s)> (see crab_monitor.py -h); "
+               "automatic resubmission: createAndSubmitCrab.py schedule <output dir(s)> (see crab_scheduler.py -h).",
+        description="Create CMSSW+CRAB cfgs (era/tokens/maxEvents), optionally submit."
+    )
+    parser.add_argument('-i', '--inputList', nargs='+', required=True,
+                        help='Input dataset list file(s); every dataset line of every list is processed.')
+    parser.add_argument('-d', '--storageDir', dest='storage_dir', required=True, help='Output base dir.')
+    parser.add_argument('-t', dest='template_crab', required=True, help='CRAB3 template cfg.')
+    parser.add_argument('-c', dest='template_cmssw', required=True, help='CMSSW template cfg.')
+    parser.add_argument('-v', dest='tagname', required=True, help='Tag prefix for output folder.')
+    parser.add_argument('--lumi-mask', dest='lumi_mask', default=None,
+                        help="Golden JSON; restricted to each dataset's runs and written per task "
+                             "(sets config.Data.lumiMask/runRange).")
+    parser.add_argument('--mask-runs', choices=['das', 'none'], default='das',
+                        help="Run range of each dataset for --lumi-mask: from DAS (cached) or none.")
+    parser.add_argument('--mask-iov-split', nargs='?', const=str(DATA_JEC_LIST), default=None,
+                        metavar='JEC_LIST',
+                        help="With --lumi-mask: one task per L2L3Residual IOV of the era "
+                             f"(default list: {DATA_JEC_LIST.relative_to(HERE.parent)}).")
+    parser.add_argument('-j', '--jobs', type=int, default=min(8, os.cpu_count() or 1),
+                        help='Max parallel workers for rendering/submission (default: min(8, ncpu)).')
+    parser.add_argument('--submit', action='store_true', default=False, help='Submit with CRAB.')
+    sys.path.insert(0, str(CONFIGS_DIR))
+    from output_profiles import OUTPUT_PROFILES
+    parser.add_argument('--output-profile', choices=list(OUTPUT_PROFILES), default=None,
+                        help="outputProfile_ of the ntuples (compression/auto-flush/baskets, "
+                             "see configs/output_profiles.py); default: the template's.")
+    parser.add_argument('--freeze-cfg', choices=['dump', 'pickle'], default=None,
+                        help='Build each CMSSW cfg once (cmsenv needed) and point psetName to the frozen, '
+                             'validated dumpPython()/pickle (freeze_cmssw_cfg.py).')
+    parser.add_argument('--das-ttl', type=int, default=24 * 3600,
+                        help='DAS cache lifetime in seconds (run ranges, event counts).')
+    plan = parser.add_argument_group('split planning (crab_split_planner.py)')
+    plan.add_argument('--split-plan', choices=['lumi', 'event-aware', 'file'], default=None,
+                      help='Plan unitsPerJob from event counts instead of the lumisPerJob column '
+                           '(LumiBased, EventAwareLumiBased or FileBased).')
+    plan.add_argument('--event-counts', default=None,
+                      help='Event-count JSON (or directory of <dataset>.json); default: DAS, cached.')
+    plan.add_argument('--rate', type=float, default=None, help='Measured ScoutingTreeMakerRun3 events/s.')
+    plan.add_argument('--rate-log', default=None, help='cmsRun log (wantSummary) to measure the rate from.')
+    plan.add_argument('--target-hours', type=float, default=3.0, help='Target job wall time (default: 3).')
+    plan.add_argument('--job-overhead', type=float, default=300.0,
+                      help='Seconds per job besides the event loop (default: 300).')
+    plan.add_argument('--tail-quantile', type=float, default=0.95,
+                      help='Job-time quantile that must fit the target (lumi/file; default: 0.95).')
+    recov = parser.add_argument_group('incremental recovery (crab_recovery.py)')
+    recov.add_argument('--incremental', action='store_true', default=False,
+                       help='Submit only the lumis missing from earlier outputs, as __recovery tasks.')
+    recov.add_argument('--scan-outputs', nargs='*', default=[], metavar='LOC',
+                       help='Locations of produced ntuples (local dirs, or listed with --storage-lister).')
+    recov.add_argument('--storage-lister', default=None,
+                       help="Recursive listing command, '{path}' = location "
+                            "(e.g. \"xrdfs root://cmseos.fnal.gov ls -R {path}\").")
+    recov.add_argument('--storage-prefix', default='', help='Prefix to open listed files (e.g. root://cmseos.fnal.gov/).')
+    recov.add_argument('--crab-reports', nargs='*', default=[], metavar='DIR',
+                       help="Earlier output/work dirs searched for CRAB results/processedLumis.json ('crab report').")
+    args = parser.parse_args()
+    if args.split_plan and (args.rate is None) == (args.rate_log is None):
+        parser.error('--split-plan needs exactly one of --rate / --rate-log')
+    if args.rate is not None and args.rate <= 0:
+        parser.error(f'--rate must be positive (got {args.rate:g})')
+    if args.mask_iov_split and not args.lumi_mask:
+        parser.error('--mask-iov-split needs --lumi-mask')
+    if args.incremental and not (args.scan_outputs or args.crab_reports):
+        parser.error('--incremental needs --scan-outputs and/or --crab-reports')
+
+    input_lists = [Path(p).resolve() for p in args.inputList]
+    template_crab = Path(args.template_crab).resolve()
+    template_cmssw = Path(args.template_cmssw).resolve()
+    storage_base = Path(args.storage_dir).resolve()
+    tagname = args.tagname
+
+    for pth, msg in [
+        *[(p, "Input list not found") for p in input_lists],
+        (template_crab, "CRAB template not found"),
+        (template_cmssw, "CMSSW template not found"),
+    ]:
+        if not pth.exists():
+            err(f"{msg}: {pth}")
             sys.exit(1)
 
-        info("Submitting...")
-        try:
-            cp = subprocess.run(
-                ['crab', 'submit', '-c', str(crab_cfg_path)],
-                text=True, capture_output=True, check=True
-            )
-            out_all = (cp.stdout or "") + (cp.stderr or "")
-            task_name = re.search(r"Task name:\s*(.+)", out_all)
-            project_dir = re.search(r"Project dir:\s*(.+)", out_all)
-            log_file = re.search(r"Log file is\s*(.+)", out_all)
-
-            ok("Delivered to CRAB3.")
-            if task_name:
-                print(f"      \033[91mTask:\033[0m {task_name.group(1).strip()}")
-            if project_dir:
-                print(f"      \033[91mWorkdir:\033[0m {project_dir.group(1).strip()}")
-            if log_file:
-                print(f"      \033[91mLog:\033[0m {log_file.group(1).strip()}")
-        except subprocess.CalledProcessError as e:
-            out_all = (e.stdout or "") + (e.stderr or "")
-            err(f"CRAB submission failed (exit {e.returncode}).")
-            m_proj = re.search(r"Project dir:\s*(.+)", out_all)
-            m_log = re.search(r"Log file is\s*(.+)", out_all)
-            if m_proj:
-                print(f"      \033[91mWorkdir:\033[0m {m_proj.group(1).strip()}")
-            if m_log:
-                print(f"      \033[91mLog:\033[0m {m_log.group(1).strip()}")
-            tail = "\n".join(out_all.strip().splitlines()[-20:])
-            if tail:
-                print(_c("  --- crab output (tail) ---", C.Y))
-                print(tail)
-            sys.exit(e.returncode)
+    lumi_mask_path: Optional[Path] = None
+    if args.lumi_mask:
+        p = Path(args.lumi_mask).expanduser().resolve()
+        if not p.exists():
+            err(f"--lumi-mask not found: {p}")
+            sys.exit(1)
+        lumi_mask_path = p
+
+    if args.submit and shutil.which('crab') is None:
+        err("'crab' not found in PATH.")
+        sys.exit(1)
+
+    # --------- Collect dataset lines from every list ----------
+    specs: List[Dict[str, str]] = []
+    seen: set = set()
+    for input_list in input_lists:
+        lines = read_input_lines(input_list)
+        if not lines:
+            warn(f"No valid dataset lines in {input_list}")
+            continue
+        for ln in lines:
+            try:
+                spec = parse_dataset_line(ln)
+            except ValueError as e:
+                err(f"{input_list.name}: {e}")
+                sys.exit(1)
+            if spec['dataset'] in seen:
+                warn(f"Duplicate dataset skipped: {spec['dataset']}")
+                continue
+            seen.add(spec['dataset'])
+            specs.append(spec)
+    if not specs:
+        err("No valid dataset lines in the given input list(s).")
+        sys.exit(1)
+
+    stamp = timestamp_label()
+    namedir = f"{tagname}_{stamp}"
+    out_root = storage_base / namedir
+    cfg_dir = out_root / 'cfg'
+    work_dir = out_root / 'workdir'
+    ensure_dirs([out_root, cfg_dir, work_dir])
+
+    if lumi_mask_path:
+        expanded = prepare_lumi_masks(specs, args, lumi_mask_path, cfg_dir / 'masks')
+        if expanded is None:
+            sys.exit(1)
+        specs = expanded
 
+    if args.incremental:
+        recovered = prepare_recovery(specs, args, cfg_dir / 'masks')
+        if recovered is None:
+            sys.exit(1)
+        if not recovered:
+            ok(f"Nothing missing; no recovery task needed. ({out_root})")
+            return
+        specs = recovered
+
+    if args.split_plan and not plan_splitting_for(specs, args):
+        sys.exit(1)
+
+    ctx: Dict[str, object] = {
+        "cfg_dir": cfg_dir,
+        "work_dir": work_dir,
+        "namedir": namedir,
+        "lumi_mask": lumi_mask_path,
+        "cmssw_template_text": template_cmssw.read_text(),
+        "crab_template_text": template_crab.read_text(),
+        "submit": args.submit,
+        "freeze": args.freeze_cfg,
+        "output_profile": args.output_profile,
+    }
+
+    # --------- Render (and submit) every dataset in a bounded pool ----------
+    n_workers = max(1, min(args.jobs, len(specs)))
+    info(f"{len(specs)} task(s), {n_workers} worker(s){' | submitting' if args.submit else ''}...")
+    results: List[Dict[str, object]] = []
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        futures = {pool.submit(prepare_and_submit, spec, ctx): spec for spec in specs}
+        for fut in as_completed(futures):
+            try:
+                res = fut.result()
+            except Exception as exc:
+                spec = futures[fut]
+                res = {"dataset": spec['dataset'], "era": spec.get('era'),
+                       "status": "failed", "error": f"{type(exc).__name__}: {exc}"}
+            print_result(res)
+            results.append(res)
+
+    # Stable order (input order) for the summary table
+    order = {spec['dataset']: i for i, spec in enumerate(specs)}
+    results.sort(key=lambda r: order.get(str(r["dataset"]), len(order)))
+    print_summary(results)
+    write_task_list(out_root, results)
+
+    saved = [float(r["load_saved_s"]) for r in results if "load_saved_s" in r]
+    if saved:
+        info(f"Frozen cfgs: {sum(saved) / len(saved):.2f} s less config processing per job on average.")
+
+    n_failed = sum(1 for r in results if r["status"] == "failed")
+    if n_failed:
+        err(f"{n_failed}/{len(results)} dataset(s) failed. Output: {out_root}")
+        sys.exit(1)
     ok(f"Done: {out_root}")
+    if args.submit:
+        info(f"Follow the tasks with: {Path(sys.argv[0]).name} monitor {out_root}")
+        info(f"Resubmit failed jobs automatically with: {Path(sys.argv[0]).name} schedule {out_root}")
 
 if __name__ == '__main__':
     main()
-
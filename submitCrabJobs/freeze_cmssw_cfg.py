@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+freeze_cmssw_cfg.py
+
+Builds a cmsRun configuration once and writes it in a form that loads without re-running it:
+
+  dump    process.dumpPython(): a flat, self-contained cfg (no process.load, no JEC list
+          parsing, no HLT_Alias construction)
+  pickle  the process pickled next to the output ('<out without .py>.pkl') plus a small
+          loader cfg
+
+The frozen cfg is validated against the source: both are loaded in fresh interpreters and
+their dumpPython() must be identical. The same loads give the per-job config processing
+time of each (imports included, interpreter start-up excluded).
+
+CRAB loads psetName once at submission and ships it pickled (PSet.pkl), so there the frozen
+cfg mainly makes that load, and local/condor cmsRun jobs, cheap and fixes the exact process
+that was validated.
+
+Needs the CMSSW python environment (cmsenv); everything runs in subprocesses of
+sys.executable, so this module itself imports nothing from CMSSW.
+
+Example:
+  python3 submitCrabJobs/freeze_cmssw_cfg.py cfg/ScoutingPFRun3__Run2024F-v1__HLTSCOUT_cmssw.py --repeat 5
+"""
+
+from __future__ import annotations
+import difflib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+FORMATS = ("dump", "pickle")
+
+# Runs in a fresh interpreter: load a cfg and write it frozen / dumped, report the load time
+_CHILD = r'''
+import json, os, pickle, runpy, sys, time
+action, src, out = sys.argv[1:4]
+t0 = time.perf_counter()
+process = runpy.run_path(src)["process"]
+seconds = time.perf_counter() - t0
+if action == "dump":
+    text = process.dumpPython()
+elif action == "freeze-dump":
+    text = "# frozen from %s\nimport FWCore.ParameterSet.Config as cms\n\n%s" % (
+        src, process.dumpPython().replace("import FWCore.ParameterSet.Config as cms\n", "", 1))
+elif action == "freeze-pickle":
+    pkl = os.path.splitext(out)[0] + ".pkl"
+    with open(pkl, "wb") as f:
+        pickle.dump(process, f, protocol=pickle.HIGHEST_PROTOCOL)
+    text = (
+        "# frozen from %s\n"
+        "import os, pickle\n"
+        "_pkl = %r\n"
+        "if not os.path.exists(_pkl):\n"
+        "    _pkl = %r\n"
+        "with open(_pkl, 'rb') as _f:\n"
+        "    process = pickle.load(_f)\n" % (src, os.path.abspath(pkl), os.path.basename(pkl)))
+else:
+    raise SystemExit("unknown action " + action)
+with open(out, "w") as f:
+    f.write(text)
+print(json.dumps({"seconds": seconds}))
+'''
+
+class FreezeError(RuntimeError):
+    pass
+
+def _child(action: str, src: str, out: str) -> float:
+    proc = subprocess.run([sys.executable, "-c", _CHILD, action, os.path.abspath(src), out],
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                          cwd=os.path.dirname(os.path.abspath(src)))
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.strip().splitlines()[-15:])
+        raise FreezeError(f"loading {src} failed:\n{tail}")
+    return float(json.loads(proc.stdout.strip().splitlines()[-1])["seconds"])
+
+def frozen_path(src: str) -> str:
+    root, ext = os.path.splitext(src)
+    return f"{root}_frozen{ext or '.py'}"
+
+def freeze(src: str, out: Optional[str] = None, fmt: str = "dump") -> Tuple[str, float]:
+    """
+    Write the frozen cfg of 'src' (format 'dump' or 'pickle'); returns (path, source load seconds).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}' (choose from {', '.join(FORMATS)})")
+    out = out or frozen_path(src)
+    return out, _child(f"freeze-{fmt}", src, out)
+
+def dump(cfg: str) -> Tuple[str, float]:
+    """
+    (dumpPython() text, load seconds) of a cfg, loaded in a fresh interpreter.
+    """
+    fd, tmp = tempfile.mkstemp(suffix=".dump.py")
+    os.close(fd)
+    try:
+        seconds = _child("dump", cfg, tmp)
+        with open(tmp) as f:
+            return f.read(), seconds
+    finally:
+        os.unlink(tmp)
+
+def validate(src: str, frozen: str, repeat: int = 1) -> Dict[str, object]:
+    """
+    Compare the processes of 'src' and 'frozen'; {'equal', 'diff', 'source_s', 'frozen_s'}
+    with the best load time of 'repeat' fresh loads each.
+    """
+    ref, t_src = dump(src)
+    got, t_frz = dump(frozen)
+    for _ in range(repeat - 1):
+        t_src = min(t_src, dump(src)[1])
+        t_frz = min(t_frz, dump(frozen)[1])
+    diff: List[str] = []
+    if ref != got:
+        diff = list(difflib.unified_diff(ref.splitlines(), got.splitlines(), "source", "frozen", lineterm="", n=1))[:40]
+    return {"equal": ref == got, "diff": diff, "source_s": t_src, "frozen_s": t_frz}
+
+def freeze_and_validate(src: str, fmt: str = "dump", repeat: int = 1) -> Dict[str, object]:
+    """
+    freeze() + validate(); raises FreezeError if the frozen process differs from the source.
+    """
+    out, _ = freeze(src, fmt=fmt)
+    res = validate(src, out, repeat)
+    res["path"] = out
+    if not res["equal"]:
+        raise FreezeError(f"frozen cfg {out} differs from {src}:\n" + "\n".join(res["diff"]))
+    return res
+
+def format_timing(res: Dict[str, object]) -> str:
+    s, f = float(res["source_s"]), float(res["frozen_s"])
+    return f"config load {s:.2f} s -> {f:.2f} s ({s / f:.1f}x, {s - f:.2f} s saved per job)" if f > 0 else ""
+
+def main(argv=None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("cfg", help="cmsRun cfg (e.g. a rendered cfg/<request>_cmssw.py)")
+    ap.add_argument("-o", "--output", default=None, help="Frozen cfg (default: <cfg>_frozen.py)")
+    ap.add_argument("--format", choices=FORMATS, default="dump")
+    ap.add_argument("--repeat", type=int, default=3, help="Fresh loads per cfg for the timing (best of)")
+    args = ap.parse_args(argv)
+
+    try:
+        out, _ = freeze(args.cfg, args.output, args.format)
+        res = validate(args.cfg, out, args.repeat)
+    except FreezeError as e:
+        print(f"[freeze_cmssw_cfg] {e}", file=sys.stderr)
+        return 1
+    if not res["equal"]:
+        print(f"[freeze_cmssw_cfg] {out} differs from {args.cfg}:", file=sys.stderr)
+        print("\n".join(res["diff"]), file=sys.stderr)
+        return 1
+    print(f"{out}: identical process; {format_timing(res)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
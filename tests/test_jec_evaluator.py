@@ -0,0 +1,68 @@
+"""
+jec_evaluator.JECChain against factors worked out by hand from the JetCorrectorParameters
+rules (first record with min <= x < max, parameter variables clamped to the record's range,
+each level applied to the pt scaled by the previous ones) for a small L1/L2/L3 set.
+"""
+
+import math, os, sys
+
+import numpy as np
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "../ScoutingNtuplizer/python/configs"))
+import jec_evaluator as J  # noqa: E402
+
+L1 = """\
+{1 JetEta 3 Rho JetPt JetA max(0.0001,1-z*([0]+[1]*x)/y) Correction L1FastJet}
+-5 0 8 0 100 10 1000 0 10 0.5 1.0
+ 0 5 8 0 100 10 1000 0 10 1.0 0.5
+"""
+L2 = """\
+{1 JetEta 1 JetPt [0]+[1]*log10(x) Correction L2Relative}
+-5 0 4 10 1000 1.2 -0.05
+ 0 5 4 10 1000 1.1 -0.02
+"""
+L3 = """\
+{1 JetEta 1 JetPt [0] Correction L3Absolute}
+-5 5 3 10 1000 1.02
+"""
+
+# pt, eta, rho (area 0.5 everywhere) -> (L1, L1*L2, L1*L2*L3)
+#   L1 = max(0.0001, 1 - 0.5*(p0 + p1*rho)/pt), rho in [0, 100], pt in [10, 1000]
+#   L2 = p0 + p1*log10(pt*L1), pt*L1 clamped to [10, 1000]
+def _hand(l1, l2):
+    return (l1, l1 * l2, l1 * l2 * 1.02)
+
+CASES = [
+    # eta on the lower edge of the second record
+    (50.0, 0.0, 20.0, _hand(1 - 0.5 * (1.0 + 0.5 * 20) / 50, 1.1 - 0.02 * math.log10(44.5))),
+    (100.0, -2.0, 20.0, _hand(1 - 0.5 * (0.5 + 1.0 * 20) / 100, 1.2 - 0.05 * math.log10(89.75))),
+    # pt below the range: clamped to 10 in both levels, the scaled pt (2.25) too
+    (5.0, 0.5, 20.0, _hand(1 - 0.5 * (1.0 + 0.5 * 20) / 10, 1.1 - 0.02 * 1)),
+    # rho above the range (clamped to 100) drives L1 below zero -> floor of max()
+    (20.0, 1.0, 200.0, _hand(0.0001, 1.1 - 0.02 * 1)),
+    # negative rho is floored at 0 like jec::evaluate
+    (50.0, -1.0, -5.0, _hand(1 - 0.5 * 0.5 / 50, 1.2 - 0.05 * math.log10(49.75))),
+    # no record in any level
+    (50.0, 6.0, 20.0, (1.0, 1.0, 1.0)),
+]
+
+@pytest.fixture
+def chain(tmp_path):
+    paths = []
+    for name, text in (("L1.txt", L1), ("L2.txt", L2), ("L3.txt", L3)):
+        p = tmp_path / name
+        p.write_text(text)
+        paths.append(str(p))
+    return J.JECChain(paths)
+
+def test_chain_matches_hand_values(chain):
+    pt, eta, rho, want = (np.array(c) for c in zip(*CASES))
+    got = chain.evaluate(pt, eta, np.full(len(pt), 0.5), rho)
+    np.testing.assert_allclose(got, want[:, 2], rtol=1e-12)
+
+def test_per_level_matches_hand_values(chain):
+    pt, eta, rho, want = (np.array(c) for c in zip(*CASES))
+    got = chain.evaluate(pt, eta, np.full(len(pt), 0.5), rho, per_level=True)
+    np.testing.assert_allclose(got, want.T, rtol=1e-12)
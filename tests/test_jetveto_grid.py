@@ -0,0 +1,75 @@
+"""
+jetveto_grid: a correctionlib map (non-zero = vetoed) and a TH2 (content < 0.5 = vetoed, as in
+jetveto::flagFromMap) describing the same vetoed cell must compile to the same '.vgrid' decisions.
+"""
+
+import json, math, os, sys
+
+import numpy as np
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "../ScoutingNtuplizer/python/configs"))
+import jetveto_grid as G  # noqa: E402
+
+ETA = [-5.0, -2.5, 0.0, 2.5, 5.0]
+PHI = [-3.2, -1.6, 0.0, 1.6, 3.2]
+HOT = (1, 2)                     # vetoed cell: eta in [-2.5, 0), phi in [0, 1.6)
+INSIDE = (-1.25, 0.8)            # its centre
+OUTSIDE = [(-1.25, -0.8), (1.25, 0.8), (-3.0, 2.0), (4.0, -3.0)]
+
+def _json_map(path):
+    content = np.zeros((len(ETA) - 1, len(PHI) - 1))
+    content[HOT] = 100.0          # JERC JSON: non-zero = vetoed
+    doc = {"schema_version": 2, "corrections": [{
+        "name": "test", "version": 1,
+        "inputs": [{"name": "type", "type": "string"}, {"name": "eta", "type": "real"},
+                   {"name": "phi", "type": "real"}],
+        "output": {"name": "vetomaps", "type": "real"},
+        "data": {"nodetype": "category", "input": "type", "content": [
+            {"key": "jetvetomap", "value": {"nodetype": "multibinning", "inputs": ["eta", "phi"],
+                                             "edges": [ETA, PHI], "content": content.ravel().tolist(),
+                                             "flow": 0.0}}]}}]}
+    with open(path, "w") as f:
+        json.dump(doc, f)
+    return path
+
+def _root_map(path, phi=PHI, hot=HOT, swap=False):
+    uproot = pytest.importorskip("uproot")
+    vals = np.ones((len(ETA) - 1, len(phi) - 1))
+    vals[hot] = 0.0               # TH2 / flagFromMap: 1 = good, 0 = vetoed
+    with uproot.recreate(path) as f:
+        f["jetvetomap"] = (vals.T.copy(), np.array(phi), np.array(ETA)) if swap else (vals, np.array(ETA), np.array(phi))
+    return path
+
+def _check(grid, hot=HOT, inside=INSIDE, outside=OUTSIDE):
+    mask = grid.mask()
+    assert mask.shape == (len(ETA) - 1, len(PHI) - 1)
+    assert mask[hot] == 1 and mask.sum() == 1
+    assert grid.is_vetoed(*inside)
+    assert not grid.is_vetoed(*zip(*outside)).any()
+    assert not grid.is_vetoed(7.0, inside[1])   # outside the eta range
+
+def test_json_map(tmp_path):
+    _check(G.load_veto_grid(_json_map(str(tmp_path / "map.json")), convert=True))
+
+def test_root_map(tmp_path):
+    path = _root_map(str(tmp_path / "map.root"))
+    _check(G.load_veto_grid(path, convert=True))
+    assert G.check_veto_grid(path) == {"jetvetomap": 0}
+
+def test_root_map_phi_eta_0_2pi(tmp_path):
+    # X = phi in [0, 2pi], Y = eta: flagFromMap swaps the roles and wraps negative phi
+    phi = np.linspace(0.0, 2 * math.pi, 5)
+    hot = (1, 2)                  # phi in [pi, 3pi/2), i.e. [-pi, -pi/2) for jets
+    path = _root_map(str(tmp_path / "map.root"), phi, hot, swap=True)
+    grid = G.load_veto_grid(path, convert=True)
+    _check(grid, hot, (-1.25, -0.75 * math.pi), [(-1.25, 0.75 * math.pi), (1.25, -0.75 * math.pi)])
+    assert G.check_veto_grid(path) == {"jetvetomap": 0}
+
+def test_json_and_root_agree(tmp_path):
+    a = G.load_veto_grid(_json_map(str(tmp_path / "map.json")), convert=True)
+    b = G.load_veto_grid(_root_map(str(tmp_path / "map.root")), convert=True)
+    np.testing.assert_array_equal(a.mask(), b.mask())
+    eta, phi = np.meshgrid(np.linspace(-4.9, 4.9, 40), np.linspace(-math.pi, math.pi, 40, endpoint=False))
+    np.testing.assert_array_equal(a.is_vetoed(eta, phi), b.is_vetoed(eta, phi))
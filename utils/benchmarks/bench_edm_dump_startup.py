@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Start-up + branch listing time of utils/edmDumpEventFields, each run in a fresh interpreter.
+
+  eager FWLite      : previous behaviour (import ROOT, load FWLite + dictionaries + Declare,
+                      then open the file and list the branches)
+  --metadata uproot : branch list and sizes through uproot, no ROOT at all
+  --metadata root   : same through plain ROOT (no FWLite, no dictionaries)
+  --what fields     : field tree; FWLite only if a branch is unsplit
+  --what both       : fields + methods (full reflection, loads FWLite)
+
+Default file is the XRootD example of the README (needs a grid proxy); a local copy can be
+given instead. Readers that are not installed are skipped. Both metadata backends must list
+the same branches.
+
+Example:
+  python3 utils/benchmarks/bench_edm_dump_startup.py --repeat 3
+  python3 utils/benchmarks/bench_edm_dump_startup.py --file local_copy.root --tree Events
+"""
+
+import argparse, json, os, subprocess, sys, time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TOOL = os.path.join(HERE, "../edmDumpEventFields")
+README_FILE = ("root://cms-xrd-global.cern.ch//store/data/Run2025C/ScoutingPFRun3/HLTSCOUT/v1/000/392/925/00000/"
+               "b95d5cc9-62b2-4b3b-a0f9-d0d79b52a85d.root")
+
+# previous start-up: everything loaded before the file is opened
+EAGER = r'''
+import runpy, sys
+ns = runpy.run_path(sys.argv[1], run_name="edmDumpEventFields")
+ROOT = ns["load_fwlite"]()
+f = ROOT.TFile.Open(sys.argv[2])
+t = ns["select_tree"](f, sys.argv[3])
+print(len([b.GetName() for b in ns["_iter_any"](t.GetListOfBranches())]))
+'''
+
+def run(cmd):
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    dt = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}")
+    return dt, proc.stdout
+
+def best_of(cmd, repeat):
+    best, out = float("inf"), ""
+    for _ in range(repeat):
+        dt, out = run(cmd)
+        best = min(best, dt)
+    return best, out
+
+def has(module):
+    return subprocess.run([sys.executable, "-c", f"import {module}"], stderr=subprocess.DEVNULL).returncode == 0
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--file", default=README_FILE)
+    ap.add_argument("--tree", default="Events")
+    ap.add_argument("--filter", default="Run3ScoutingPFJets_hltScoutingPFPacker",
+                    help="Branch filter of the --what runs (README example)")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    tool = [sys.executable, TOOL, args.file, "--tree", args.tree]
+    root, uproot = has("ROOT"), has("uproot")
+    cases = [
+        ("eager FWLite", [sys.executable, "-c", EAGER, TOOL, args.file, args.tree], root),
+        ("--metadata uproot", tool + ["--metadata", "--backend", "uproot", "--format", "json"], uproot),
+        ("--metadata root", tool + ["--metadata", "--backend", "root", "--format", "json"], root),
+        ("--what fields", tool + ["--what", "fields", "--format", "json", "--filter", args.filter], root),
+        ("--what both", tool + ["--what", "both", "--format", "json", "--filter", args.filter], root),
+    ]
+    print(f"{args.file} (best of {args.repeat}, fresh interpreter each)")
+    times, names = {}, {}
+    for label, cmd, ok in cases:
+        if not ok:
+            print(f"  {label:<18}:      n/a (reader not installed)")
+            continue
+        try:
+            times[label], out = best_of(cmd, args.repeat)
+        except RuntimeError as e:
+            print(f"  {label:<18}:   failed ({e})")
+            continue
+        if label.startswith("--metadata"):
+            names[label] = [b["name"] for b in json.loads(out)["branches"]]
+        ref = times.get("eager FWLite")
+        print(f"  {label:<18}: {times[label]:8.2f} s" + (f"  x{ref / times[label]:.1f}" if ref else ""))
+
+    if len(names) == 2:
+        a, b = names.values()
+        assert a == b, "uproot and ROOT metadata list different branches"
+        print(f"regression: both metadata backends list the same {len(a)} branches")
+
+if __name__ == "__main__":
+    main()
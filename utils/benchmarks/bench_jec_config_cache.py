@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cold vs warm timing of jec_utils.load_jec_config_text.
+
+  cold      : plain text parse (use_cache=False)
+  warm-disk : fresh process state, '<list>.cache.json' present
+  warm-mem  : in-process memo hit
+
+By default a synthetic list with many eras / residual IOVs is generated to mimic
+a grown data_jec_list.txt; pass --list to time a real file instead.
+
+Example:
+  python3 utils/benchmarks/bench_jec_config_cache.py --eras 40 --iovs 20 -n 200
+"""
+
+import argparse, os, sys, tempfile, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../ScoutingNtuplizer/python/configs"))
+import jec_utils  # noqa: E402
+
+def make_synthetic_list(path, n_eras, n_iovs):
+    base = "DijetScoutingRun3NTupleMaker/data/jec/2024"
+    with open(path, "w") as f:
+        for e in range(n_eras):
+            f.write(f"#---- Year: 20{24 + e // 26}{chr(ord('A') + e % 26)}_{e}:\n")
+            f.write(f"L1FastJet: {base}/Winter24Run3_V1_MC_L1FastJet_AK4PFPuppi.txt\n")
+            f.write(f"L2Relative: {base}/RunIII2024Summer24_V2_MC_L2Relative_AK4PUPPI.txt\n")
+            f.write(f"L3Absolute: {base}/Winter24Run3_V1_MC_L3Absolute_AK4PFPuppi.txt\n")
+            f.write("L2L3Residual: [\n")
+            first = 378000 + 1000 * e
+            for i in range(n_iovs):
+                lo = -1 if i == 0 else first + 50 * i
+                hi = -1 if i == n_iovs - 1 else first + 50 * (i + 1)
+                sep = "," if i < n_iovs - 1 else ""
+                f.write(f"  {lo}:{hi}:{base}/ReReco24_V9M/ReReco24_nib{i}_DATA_L2L3Residual_AK4PFPuppi.txt{sep}\n")
+            f.write("]\n")
+            f.write(f"Unc: {base}/Winter24Prompt24_V1_MC_Uncertainty_AK4PFPuppi.txt\n")
+            f.write(f"JetVetoMap: [ -1:-1:DijetScoutingRun3NTupleMaker/data/jetvetomap/jetvetomaps_2024BCDEFGHI.json ]\n\n")
+
+def timeit(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--list", default=None, help="Real JEC list to time (default: synthetic)")
+    ap.add_argument("--eras", type=int, default=40, help="Synthetic: number of era blocks")
+    ap.add_argument("--iovs", type=int, default=20, help="Synthetic: residual IOVs per era")
+    ap.add_argument("-n", type=int, default=200, help="Repetitions per measurement")
+    args = ap.parse_args()
+
+    tmpdir = None
+    if args.list:
+        path = os.path.abspath(args.list)
+    else:
+        tmpdir = tempfile.mkdtemp(prefix="bench_jec_")
+        path = os.path.join(tmpdir, "data_jec_list.txt")
+        make_synthetic_list(path, args.eras, args.iovs)
+
+    cache = jec_utils.jec_cache_path(path)
+    if os.path.exists(cache):
+        os.unlink(cache)
+
+    cold = timeit(lambda: jec_utils.load_jec_config_text(path, use_cache=False), args.n)
+    jec_utils.load_jec_config_text(path)  # writes the disk cache
+
+    def disk():
+        jec_utils._memo.clear()
+        jec_utils.load_jec_config_text(path)
+    warm_disk = timeit(disk, args.n)
+    warm_mem = timeit(lambda: jec_utils.load_jec_config_text(path), args.n)
+
+    db = jec_utils.load_jec_config_text(path)
+    n_res = sum(len(b.get("L2L3Residual", [])) for b in db.values())
+    print(f"file      : {path} ({os.path.getsize(path)} bytes, {len(db)} eras, {n_res} residual IOVs)")
+    print(f"cold      : {cold * 1e3:8.3f} ms")
+    print(f"warm-disk : {warm_disk * 1e3:8.3f} ms  (x{cold / warm_disk:.1f})")
+    print(f"warm-mem  : {warm_mem * 1e3:8.3f} ms  (x{cold / warm_mem:.1f})")
+
+    if tmpdir:
+        for fn in os.listdir(tmpdir):
+            os.unlink(os.path.join(tmpdir, fn))
+        os.rmdir(tmpdir)
+
+if __name__ == "__main__":
+    main()
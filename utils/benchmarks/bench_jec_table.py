@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JECLevel construction: text parse vs memory-mapped binary table (jec_table).
+
+Converts the given level files (default: the 2024F chain from data/jec/2024) into
+tables in a temp dir, checks that both paths give identical corrections, that a
+modified text file is detected as stale, and times construction.
+
+Example:
+  python3 utils/benchmarks/bench_jec_table.py --repeat 20
+"""
+
+import argparse, os, shutil, sys, tempfile, time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "../../ScoutingNtuplizer/python/configs"))
+import jec_evaluator as J  # noqa: E402
+import jec_table  # noqa: E402
+
+JEC_DIR = os.path.join(HERE, "../../data/jec/2024")
+DEFAULT = [
+    "Winter24Run3_V1_MC/Winter24Run3_V1_MC_L1FastJet_AK4PFPuppi.txt",
+    "RunIII2024Summer24_V2_MC_L2Relative_AK4PUPPI.txt",
+    "Winter24Run3_V1_MC/Winter24Run3_V1_MC_L3Absolute_AK4PFPuppi.txt",
+    "ReReco24_V9M/ReReco24_Run2024F_nib1_V9M_DATA_L2L3Residual_AK4PFPuppi.txt",
+]
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("files", nargs="*", help="Level text files (default: 2024F chain)")
+    args = ap.parse_args()
+
+    srcs = args.files or [os.path.join(JEC_DIR, p) for p in DEFAULT]
+    work = tempfile.mkdtemp(prefix="bench_jtab_")
+    try:
+        paths = []
+        for s in srcs:
+            dst = os.path.join(work, os.path.basename(s))
+            shutil.copy2(s, dst)
+            paths.append(dst)
+
+        t0 = time.perf_counter()
+        for p in paths:
+            jec_table.write_jec_table(p)
+        t_conv = time.perf_counter() - t0
+        size_txt = sum(os.path.getsize(p) for p in paths)
+        size_tab = sum(os.path.getsize(jec_table.jec_table_path(p)) for p in paths)
+        print(f"converted {len(paths)} files in {t_conv * 1e3:.1f} ms "
+              f"({size_txt / 1024:.0f} kB text -> {size_tab / 1024:.0f} kB tables)")
+
+        r = np.random.default_rng(1)
+        n = 100000
+        pt, eta, phi = r.exponential(80.0, n) + 10.0, r.uniform(-5.5, 5.5, n), r.uniform(-3.2, 3.2, n)
+        area, rho = np.full(n, 0.5), r.uniform(0.0, 60.0, n)
+        a = J.JECChain(paths).evaluate(pt, eta, area, rho, phi=phi)
+        b = J.JECChain([jec_table.load_jec_level(p) for p in paths]).evaluate(pt, eta, area, rho, phi=phi)
+        assert np.array_equal(a, b), "table-backed chain differs from the text-backed one"
+
+        # checksum: a touched-but-identical file stays fresh, an edited one is stale
+        os.utime(paths[0], ns=(0, 0))
+        assert jec_table.table_is_fresh(paths[0])
+        with open(paths[-1], "a") as f:
+            f.write("\n")
+        assert not jec_table.table_is_fresh(paths[-1])
+        jec_table.write_jec_table(paths[-1])
+        print("regression: identical corrections; stale/touched detection OK")
+
+        t_txt = best_of(lambda: [J.JECLevel(p) for p in paths], args.repeat)
+        t_tab = best_of(lambda: [jec_table.load_jec_level(p) for p in paths], args.repeat)
+        t_ver = best_of(lambda: [jec_table.load_jec_level(p, verify=True) for p in paths], args.repeat)
+        print(f"text parse        : {t_txt * 1e3:8.2f} ms")
+        print(f"table (mtime)     : {t_tab * 1e3:8.2f} ms  x{t_txt / t_tab:.1f}")
+        print(f"table (sha256)    : {t_ver * 1e3:8.2f} ms  x{t_txt / t_ver:.1f}")
+    finally:
+        shutil.rmtree(work)
+
+if __name__ == "__main__":
+    main()
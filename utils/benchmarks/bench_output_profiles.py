@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Output profiles of the 'events' tree (configs/output_profiles.py): file size, write time and
+columnar read time of the same reference ntuple written under each profile.
+
+The reference is a synthetic 'events' tree with the layout of ScoutingTreeMakerRun3 (event
+scalars + per-jet AK4 branches, Poisson jet multiplicity), or the events of an existing ntuple
+(--input, any layout of configs/ntuple_reader.py, e.g. an RNTuple skim). Writers:
+
+  uproot  compression of the profile; one basket per cluster, clusters of |autoFlush| bytes
+  root    RDataFrame::Snapshot with the profile's compression, auto-flush and basket size
+          (what outTree_ gets in the analyzer); only if ROOT is installed
+
+Profiles whose codec is not installed (lz4, zstandard for uproot) are skipped. Every profile
+must read back the same arrays as the reference.
+
+Example:
+  python3 utils/benchmarks/bench_output_profiles.py --events 200000
+  python3 utils/benchmarks/bench_output_profiles.py --input ntuple.root --writer root
+"""
+
+import argparse, os, shutil, sys, tempfile, time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "../../ScoutingNtuplizer/python/configs"))
+from output_profiles import OUTPUT_PROFILES  # noqa: E402
+from ntuple_reader import EventsReader  # noqa: E402
+
+JET_FLOATS = ["jetPtAK4", "jetRawPtAK4", "jetEtaAK4", "jetPhiAK4", "jetMassAK4", "jetEnergyAK4", "jetAreaAK4",
+              "jetChfAK4", "jetNhfAK4", "jetPhfAK4", "jetMufAK4", "jetElfAK4", "jetJECFactorAK4",
+              "jetJECUncRelAK4", "jetRapidityAK4"]
+JET_INTS = ["idTAK4", "idLAK4", "chHadMultAK4", "neHadMultAK4", "phoMultAK4", "elMultAK4", "muMultAK4"]
+
+def best_of(fn, repeat):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def synthetic(n, seed=1):
+    import awkward as ak
+    rng = np.random.default_rng(seed)
+    counts = rng.poisson(6, n).astype(np.int64)
+    tot = int(counts.sum())
+    # detector-like precision, so the codecs see realistic entropy
+    jets = {b: np.round(rng.exponential(50, tot), 2).astype(np.float32) for b in JET_FLOATS}
+    jets["jetEtaAK4"] = np.round(rng.uniform(-5, 5, tot), 3).astype(np.float32)
+    jets["jetPhiAK4"] = np.round(rng.uniform(-np.pi, np.pi, tot), 3).astype(np.float32)
+    jets.update({b: rng.poisson(3, tot).astype(np.int32) for b in JET_INTS})
+    data = {
+        "runNo": np.full(n, 392925, np.int32),
+        "lumi": np.sort(rng.integers(1, 500, n)).astype(np.int32),
+        "evtNo": np.sort(rng.integers(1, 10**9, n)).astype(np.int64),
+        "nvtx": rng.poisson(50, n).astype(np.int32),
+        "rho": np.round(rng.exponential(20, n), 2).astype(np.float32),
+        "met": np.round(rng.exponential(30, n), 2).astype(np.float32),
+        "metphi": np.round(rng.uniform(-np.pi, np.pi, n), 3).astype(np.float32),
+        "nPFJets": counts.astype(np.int32),
+        "htAK4": np.round(rng.exponential(300, n), 2).astype(np.float32),
+        "mjjAK4": np.round(rng.exponential(500, n), 2).astype(np.float32),
+    }
+    data.update({b: ak.unflatten(v, counts) for b, v in jets.items()})
+    return data
+
+def read_input(path):
+    with EventsReader(path) as ev:
+        names = [b for b in ev.keys() if not b.startswith(("trigger", "l1Name", "l1Result"))]
+        arrs = ev.arrays(names)
+    return {b: arrs[b] for b in names}
+
+def event_bytes(data):
+    import awkward as ak
+    return sum(ak.to_numpy(ak.flatten(v) if v.ndim > 1 else v).nbytes + (8 if v.ndim > 1 else 0)
+               for v in (ak.Array(x) for x in data.values())) / len(next(iter(data.values())))
+
+def uproot_codec(profile):
+    import uproot
+    alg, level = profile["algorithm"], profile["level"]
+    if not alg:
+        return uproot.ZLIB(1)   # ROOT's default setting (101)
+    return {"ZLIB": uproot.ZLIB, "LZ4": uproot.LZ4, "ZSTD": uproot.ZSTD, "LZMA": uproot.LZMA}[alg](level)
+
+def write_uproot(path, data, profile, per_event):
+    import awkward as ak
+    import uproot
+    n = len(next(iter(data.values())))
+    step = max(1, int(abs(profile["autoFlush"]) / per_event)) if profile["autoFlush"] < 0 else profile["autoFlush"]
+    with uproot.recreate(path, compression=uproot_codec(profile)) as f:
+        # mktree: assigning a dict writes an RNTuple with recent uproot
+        tree = f.mktree("events", {b: ak.type(v).content if isinstance(v, ak.Array) else v.dtype
+                                   for b, v in data.items()})
+        for i in range(0, n, step):
+            tree.extend({b: v[i:i + step] for b, v in data.items()})
+
+def write_root(path, src, profile):
+    import ROOT
+    opts = ROOT.RDF.RSnapshotOptions()
+    if profile["algorithm"]:
+        opts.fCompressionAlgorithm = getattr(ROOT.RCompressionSetting.EAlgorithm, "k" + profile["algorithm"])
+        opts.fCompressionLevel = profile["level"]
+    opts.fAutoFlush = profile["autoFlush"]
+    if profile["basketSize"] and hasattr(opts, "fBasketSize"):
+        opts.fBasketSize = profile["basketSize"]
+    ROOT.RDataFrame("events", src).Snapshot("events", path, "", opts)
+
+def read_columns(path, names):
+    import uproot
+    with uproot.open(path) as f:
+        return f["events"].arrays(names, library="ak")
+
+def same(ref, got):
+    import awkward as ak
+    return all(ak.array_equal(ak.Array(ref[b]), got[b]) for b in ref)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--events", type=int, default=200000, help="Events of the synthetic reference")
+    ap.add_argument("--input", default=None, help="Existing ntuple to use as reference instead")
+    ap.add_argument("--writer", choices=["uproot", "root", "both"], default="both")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--keep", default=None, help="Keep the written files in this directory")
+    args = ap.parse_args()
+
+    try:
+        import uproot  # noqa: F401
+        import awkward  # noqa: F401
+    except ImportError:
+        sys.exit("uproot and awkward are needed (pip install uproot awkward)")
+    try:
+        import ROOT  # noqa: F401
+        have_root = True
+    except ImportError:
+        have_root = False
+
+    data = read_input(args.input) if args.input else synthetic(args.events)
+    n = len(next(iter(data.values())))
+    per_event = event_bytes(data)
+    names = list(data)
+    out_dir = args.keep or tempfile.mkdtemp(prefix="bench_output_profiles_")
+    os.makedirs(out_dir, exist_ok=True)
+    writers = ["uproot", "root"] if args.writer == "both" else [args.writer]
+    print(f"{args.input or 'synthetic'}: {n} events, {len(names)} branches, {per_event:.0f} B/event uncompressed "
+          f"(best of {args.repeat})")
+    print(f"  {'writer':<7} {'profile':<11} {'settings':<22} {'size MB':>8} {'ratio':>6} {'write s':>8} {'read s':>7}")
+
+    try:
+        ref_file = None
+        for writer in writers:
+            if writer == "root" and not have_root:
+                print(f"  {'root':<7} {'':<11} n/a (ROOT not installed)")
+                continue
+            if writer == "root":
+                # RDataFrame needs a ROOT file to start from: the reference, written once by uproot
+                ref_file = ref_file or os.path.join(out_dir, "reference.root")
+                if not os.path.exists(ref_file):
+                    write_uproot(ref_file, data, OUTPUT_PROFILES["default"], per_event)
+            base_size = None
+            for name, profile in OUTPUT_PROFILES.items():
+                path = os.path.join(out_dir, f"{writer}_{name}.root")
+                settings = (f"{profile['algorithm'] or 'dflt'} {profile['level']}, "
+                            f"{abs(profile['autoFlush']) // (1 << 20)}MB/{profile['basketSize'] // 1000 or '-'}k")
+                write = (lambda: write_uproot(path, data, profile, per_event)) if writer == "uproot" \
+                    else (lambda: write_root(path, ref_file, profile))
+                try:
+                    t_write, _ = best_of(write, args.repeat)
+                except (ImportError, RuntimeError, ValueError, KeyError) as e:
+                    print(f"  {writer:<7} {name:<11} {settings:<22} n/a ({type(e).__name__}: {e})")
+                    continue
+                size = os.path.getsize(path)
+                base_size = base_size or size
+                t_read, got = best_of(lambda: read_columns(path, names), args.repeat)
+                assert same(data, got), f"{writer}/{name}: arrays differ from the reference"
+                print(f"  {writer:<7} {name:<11} {settings:<22} {size / 1e6:8.2f} {base_size / size:6.2f} "
+                      f"{t_write:8.2f} {t_read:7.2f}")
+        print("regression: every written profile reads back the reference arrays")
+    finally:
+        if not args.keep:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Run -> residual lookup: jec_utils.RunIntervalIndex vs the per-event linear scan
+that re-parses the 'min:max:path' strings (what jec::pickResidualForRun does).
+
+Example:
+  python3 utils/benchmarks/bench_run_interval_lookup.py -n 1000000 --iovs 30
+"""
+
+import argparse, os, random, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../ScoutingNtuplizer/python/configs"))
+import jec_utils  # noqa: E402
+
+def linear_pick(entries, run):
+    for entry in entries:
+        a, b, path = entry.split(":", 2)
+        lo = 0 if a.strip() == "-1" else int(a)
+        hi = 2**63 if b.strip() == "-1" else int(b)
+        if lo <= run < hi:
+            return path.strip()
+    return None
+
+def make_entries(n_iovs, first=378000, width=700):
+    out = []
+    for i in range(n_iovs):
+        lo = -1 if i == 0 else first + width * i
+        hi = -1 if i == n_iovs - 1 else first + width * (i + 1)
+        out.append(f"{lo}:{hi}:data/jec/ReReco24_nib{i}_DATA_L2L3Residual_AK4PFPuppi.txt")
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", type=int, default=1000000, help="Number of random runs")
+    ap.add_argument("--iovs", type=int, default=30, help="Residual IOVs in the map")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    entries = make_entries(args.iovs)
+    random.seed(args.seed)
+    runs = [random.randint(370000, 378000 + 700 * (args.iovs + 1)) for _ in range(args.n)]
+
+    t0 = time.perf_counter()
+    idx = jec_utils.RunIntervalIndex(entries)
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    ref = [linear_pick(entries, r) for r in runs]
+    t_lin = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    got = [idx.lookup(r) for r in runs]
+    t_idx = time.perf_counter() - t0
+    assert got == ref, "index lookup disagrees with linear scan"
+
+    print(f"{args.n} runs over {args.iovs} IOVs (index build {t_build * 1e3:.3f} ms)")
+    print(f"linear scan : {t_lin:8.3f} s  ({t_lin / args.n * 1e9:8.1f} ns/run)")
+    print(f"lookup()    : {t_idx:8.3f} s  ({t_idx / args.n * 1e9:8.1f} ns/run)  x{t_lin / t_idx:.1f}")
+
+    try:
+        import numpy as np
+    except ImportError:
+        return
+    arr = np.asarray(runs, dtype=np.int64)
+    t0 = time.perf_counter()
+    pos = idx.find_many(arr)
+    t_vec = time.perf_counter() - t0
+    assert [idx.paths[i] if i >= 0 else None for i in pos.tolist()] == ref
+    print(f"find_many() : {t_vec:8.3f} s  ({t_vec / args.n * 1e9:8.1f} ns/run)  x{t_lin / t_vec:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rendering of the CMSSW + CRAB cfgs in createAndSubmitCrab.py for many datasets.
+
+  per-token : previous renderer (one regex per token, applied to every line) and the
+              per-line CMSSW patch for every dataset
+  compiled  : compile_template (one alternation, split once per template and token set)
+              and the (template, era)-cached patch
+
+Token sets mimic the dataset lines (7 eras, distinct dataset/request names); both versions
+must give identical cfgs.
+
+Example:
+  python3 utils/benchmarks/bench_template_render.py --configs 1000
+"""
+
+import argparse, os, re, sys, time
+from pathlib import Path
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SUBMIT = os.path.join(HERE, "../../submitCrabJobs")
+sys.path.insert(0, SUBMIT)
+import createAndSubmitCrab as cs  # noqa: E402
+
+CMSSW_TEMPLATE = os.path.join(HERE, "../../ScoutingNtuplizer/python/ScoutingTreeMakerRun3.py")
+CRAB_TEMPLATE = os.path.join(SUBMIT, "crab3_template_data.py")
+ERAS = ("2024C", "2024D", "2024E", "2024F", "2024G", "2024H", "2024I")
+
+def render_per_token(text, tokens):
+    patterns = {k: re.compile(rf"\b{re.escape(k)}\b") for k in tokens}
+    out = []
+    for raw in text.splitlines(keepends=True):
+        line = raw
+        for k, pat in patterns.items():
+            line = pat.sub(tokens[k], line)
+        out.append(line)
+    return "".join(out)
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def token_sets(n):
+    out = []
+    for i in range(n):
+        era = ERAS[i % len(ERAS)]
+        ds = f"/ScoutingPFRun3/Run{era}-v{1 + i // len(ERAS)}/HLTSCOUT"
+        tokens = cs.build_tokens(ds, "-1", "20", "140X_dataRun3_HLT_v3", Path(f"/cfg/{i}_cmssw.py"),
+                                 Path("/work"), "bench", lumi_mask=None)
+        out.append((era, tokens))
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--configs", type=int, default=1000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    cmssw = open(CMSSW_TEMPLATE).read()
+    crab = open(CRAB_TEMPLATE).read()
+    sets = token_sets(args.configs)
+    print(f"{args.configs} configs: CMSSW template {len(cmssw.splitlines())} lines, "
+          f"CRAB template {len(crab.splitlines())} lines, {len(sets[0][1])} tokens")
+
+    def old():
+        out = []
+        for era, tok in sets:
+            patched, _ = cs._patch_cmssw_cfg_text.__wrapped__(cmssw, era)
+            out.append((render_per_token(patched, tok), render_per_token(crab, tok)))
+        return out
+
+    def new():
+        out = []
+        for era, tok in sets:
+            patched, _ = cs.patch_cmssw_cfg_text(cmssw, era)
+            out.append((cs.render_template_text(patched, tok), cs.render_template_text(crab, tok)))
+        return out
+
+    assert old() == new(), "compiled rendering differs from the per-token renderer"
+    print("regression: identical cfgs")
+
+    t_old = best_of(old, args.repeat)
+    cs.compile_template.cache_clear()
+    cs._patch_cmssw_cfg_text.cache_clear()
+    t_cold = best_of(new, 1)
+    t_new = best_of(new, args.repeat)
+    print(f"  per-token          : {t_old * 1e3:8.1f} ms  ({t_old / args.configs * 1e6:7.1f} us/config)")
+    print(f"  compiled (cold)    : {t_cold * 1e3:8.1f} ms  x{t_old / t_cold:.1f}")
+    print(f"  compiled (cached)  : {t_new * 1e3:8.1f} ms  ({t_new / args.configs * 1e6:7.1f} us/config)  x{t_old / t_new:.1f}")
+
+if __name__ == "__main__":
+    main()
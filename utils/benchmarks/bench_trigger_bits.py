@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Trigger storage: per-event vector<string>/vector<bool> vs hltBits/l1Bits masks (trigger_bits).
+
+Builds a synthetic sample with the HLT_Info/L1Info lists of ScoutingTreeMakerRun3.py (every
+selected path present in the menu with a version suffix, random decisions), checks that the
+bit decoding agrees with the string prefix match used by skim_ntuple, and compares the
+serialized size (raw and zlib) and the time of a one-path efficiency scan.
+
+Example:
+  python3 utils/benchmarks/bench_trigger_bits.py --events 1000000
+"""
+
+import argparse, ast, os, re, sys, time, zlib
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "../../ScoutingNtuplizer/python/configs"))
+from trigger_bits import TriggerBitMap, pack_bits  # noqa: E402
+
+CFG = os.path.join(HERE, "../../ScoutingNtuplizer/python/ScoutingTreeMakerRun3.py")
+
+def config_lists(path=CFG):
+    # HLT_Info / L1Info literals of the cmsRun config (no CMSSW needed)
+    text = open(path).read()
+    hlt = re.search(r"HLT_Info\s*=\s*cms\.vstring\(\*unique_paths\((\[.*?\])\)\)", text, re.S).group(1)
+    l1 = re.search(r"L1Info\s*=\s*(\[.*?\])", text, re.S).group(1)
+    hlt = ast.literal_eval(hlt)
+    alias = [s.replace("DST_", "")[:-2] if s.endswith("_v") else s.replace("DST_", "") for s in hlt]
+    return hlt, alias, ast.literal_eval(l1)
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def prefix_match(offsets, data, prefix):
+    # same vectorized byte compare as skim_ntuple
+    starts, lengths = offsets[:-1], np.diff(offsets)
+    pb = np.frombuffer(prefix.encode(), dtype=np.uint8)
+    m = lengths >= len(pb)
+    for k, byte in enumerate(pb):
+        m[m] = data[starts[m] + k] == byte
+    return m
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--events", type=int, default=1000000)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--path", default="DST_PFScouting_JetHT", help="Path used for the scan")
+    args = ap.parse_args()
+
+    hlt, alias, l1 = config_lists()
+    bm = TriggerBitMap.from_config(hlt, alias, l1)
+    n, nb = args.events, bm.nbits()
+    print(f"{len(hlt)} HLT_Info entries -> {nb} HLT bits ({-(-nb // 64)} word(s)), {bm.nbits('L1')} L1 bits")
+
+    r = np.random.default_rng(7)
+    fired = r.random((n, nb)) < 0.2
+    hlt_words = pack_bits(fired)
+    l1_words = pack_bits(r.random((n, bm.nbits("L1"))) < 0.2)
+
+    # string layout as the analyzer writes it: one versioned menu name per selection prefix
+    menu = [name + "3" for name in bm.names["HLT"]]
+    blob = np.frombuffer("".join(menu).encode(), dtype=np.uint8)
+    lens = np.array([len(m) for m in menu])
+    offsets = np.concatenate([[0], np.cumsum(np.tile(lens, n))])
+    data = np.tile(blob, n)
+    results = fired.ravel()
+
+    def scan_strings():
+        m = prefix_match(offsets, data, args.path) | prefix_match(offsets, data, "DST_" + args.path)
+        hit = m & results
+        return np.bincount(np.repeat(np.arange(n), nb)[hit], minlength=n) > 0
+
+    def scan_bits():
+        return bm.fired(hlt_words, args.path)
+
+    assert np.array_equal(scan_strings(), scan_bits()), "bit decoding disagrees with the string match"
+    print("regression: bit decoding matches the string prefix match")
+
+    # ROOT-like per-event payloads: vector<string> = count + (len byte + chars), vector<bool> = count + bytes
+    sample = min(n, 100000)
+    str_evt = 4 + int(lens.sum()) + nb
+    l1_str_evt = 4 + sum(len(s) + 1 for s in l1)
+    vec_raw = n * (str_evt + (4 + nb) + l1_str_evt + (4 + len(l1)))
+    bit_raw = hlt_words.nbytes + l1_words.nbytes
+    strings = (b"".join(len(m).to_bytes(1, "little") + m.encode() for m in menu) +
+               b"".join(len(s).to_bytes(1, "little") + s.encode() for s in l1))
+    vec_buf = b"".join(strings + fired[i].tobytes() for i in range(sample))
+    bit_buf = hlt_words[:sample].tobytes() + l1_words[:sample].tobytes()
+    vec_z = len(zlib.compress(vec_buf, 4)) * n / sample
+    bit_z = len(zlib.compress(bit_buf, 4)) * n / sample
+    print(f"size raw : strings {vec_raw / 2**20:9.1f} MiB   bits {bit_raw / 2**20:8.1f} MiB  x{vec_raw / bit_raw:.0f}")
+    print(f"size zlib: strings {vec_z / 2**20:9.1f} MiB   bits {bit_z / 2**20:8.1f} MiB  x{vec_z / bit_z:.1f}")
+
+    t_str = best_of(scan_strings, args.repeat)
+    t_bit = best_of(scan_bits, args.repeat)
+    print(f"scan '{args.path}' over {n} events:")
+    print(f"  string prefix match : {t_str * 1e3:8.1f} ms")
+    print(f"  bitmask             : {t_bit * 1e3:8.1f} ms  x{t_str / t_bit:.0f}")
+
+if __name__ == "__main__":
+    main()
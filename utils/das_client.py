@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+das_client.py
+
+dasgoclient wrapper shared by the utils scripts:
+  - queries run on a thread pool (wildcard expansion and file lists of many datasets at once)
+  - each distinct query runs at most once per process, even when requested concurrently
+  - results are cached on disk, one JSON per query string, for --ttl seconds
+    (default 6 h; DAS_CACHE_DIR overrides ~/.cache/dijet-scouting/das, ttl=0 disables)
+
+The binary is 'dasgoclient' from PATH (or $DASGOCLIENT), so a fake script on PATH is enough
+to exercise it offline.
+
+  das = DASClient(workers=8)
+  datasets = das.expand(["/QCD_*PT-*/Run*Summer*/AODSIM"])
+  files = das.files_many(datasets)              # {dataset: [lfn, ...]}
+
+Command line (prints the lines of each query; --stats reports cache hits):
+  python3 utils/das_client.py "dataset=/QCD_*PT-*/Run*Summer*/AODSIM" --stats
+"""
+
+import hashlib, json, os, subprocess, sys, tempfile, threading, time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+DEFAULT_TTL = 6 * 3600
+
+def default_cache_dir():
+    return os.environ.get("DAS_CACHE_DIR") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "dijet-scouting", "das")
+
+class DASError(RuntimeError):
+    pass
+
+class DASClient(object):
+    """
+    Cached, concurrent dasgoclient queries. Results are lists of non-empty output lines.
+    """
+    def __init__(self, cache_dir=None, ttl=DEFAULT_TTL, workers=8, retries=2, das_bin=None, refresh=False):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.ttl = ttl
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.das_bin = das_bin or os.environ.get("DASGOCLIENT", "dasgoclient")
+        self.refresh = refresh
+        self.stats = {"memory": 0, "disk": 0, "das": 0}
+        self._lock = threading.Lock()
+        self._inflight = {}  # query -> Future (also the per-process memo)
+
+    # ---------- cache ----------
+    def _cache_path(self, query):
+        return os.path.join(self.cache_dir, hashlib.sha1(query.encode()).hexdigest() + ".json")
+
+    def _load(self, query):
+        if self.ttl <= 0 or self.refresh:
+            return None
+        try:
+            with open(self._cache_path(query)) as f:
+                rec = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if rec.get("query") != query or time.time() - rec.get("time", 0) > self.ttl:
+            return None
+        return rec["lines"]
+
+    def _store(self, query, lines):
+        if self.ttl <= 0:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"query": query, "time": time.time(), "lines": lines}, f)
+            os.replace(tmp, self._cache_path(query))
+        except OSError:
+            pass  # read-only/full cache dir: results are still returned
+
+    # ---------- queries ----------
+    def _run(self, query):
+        cmd = [self.das_bin, "-limit", "0", "-query", query]
+        err = ""
+        for k in range(self.retries + 1):
+            try:
+                proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            except FileNotFoundError:
+                raise DASError(f"'{self.das_bin}' not found in PATH")
+            if proc.returncode == 0:
+                return [l.strip() for l in proc.stdout.splitlines() if l.strip()]
+            err = proc.stderr.strip() or proc.stdout.strip()
+            if k < self.retries:
+                time.sleep(0.8 * (k + 1))
+        raise DASError(f"dasgoclient failed for '{query}': {err}")
+
+    def _resolve(self, query):
+        lines = self._load(query)
+        if lines is not None:
+            with self._lock:
+                self.stats["disk"] += 1
+            return lines
+        lines = self._run(query)
+        with self._lock:
+            self.stats["das"] += 1
+        self._store(query, lines)
+        return lines
+
+    def _forget_failed(self, query, fut):
+        if fut.exception() is not None:
+            with self._lock:
+                if self._inflight.get(query) is fut:
+                    del self._inflight[query]  # let a later call retry
+
+    def _future(self, query, pool=None):
+        # one Future per distinct query: concurrent and repeated requests share it
+        with self._lock:
+            fut = self._inflight.get(query)
+            if fut is not None:
+                self.stats["memory"] += 1
+                return fut
+            fut = self._inflight[query] = pool.submit(self._resolve, query) if pool else Future()
+        if pool:
+            fut.add_done_callback(lambda f: self._forget_failed(query, f))
+            return fut
+        try:
+            fut.set_result(self._resolve(query))
+        except Exception as e:
+            fut.set_exception(e)
+            self._forget_failed(query, fut)
+        return fut
+
+    def query(self, query):
+        """
+        Output lines of one query (cached).
+        """
+        return self._future(query).result()
+
+    def query_many(self, queries):
+        """
+        {query: lines} for several queries, run concurrently; raises the first failure.
+        """
+        queries = list(dict.fromkeys(queries))
+        with ThreadPoolExecutor(max_workers=min(self.workers, max(1, len(queries)))) as pool:
+            futs = {q: self._future(q, pool) for q in queries}
+            return {q: f.result() for q, f in futs.items()}
+
+    # ---------- helpers ----------
+    def datasets(self, pattern):
+        return self.query(f"dataset={pattern}")
+
+    def files(self, dataset):
+        return self.query(f"file dataset={dataset}")
+
+    def expand(self, tokens):
+        """
+        Datasets for names/wildcard patterns, patterns expanded concurrently; order kept, dups dropped.
+        """
+        patterns = [t for t in tokens if "*" in t]
+        found = self.query_many([f"dataset={p}" for p in patterns]) if patterns else {}
+        out = []
+        for t in tokens:
+            out.extend(found[f"dataset={t}"] if "*" in t else [t])
+        return list(dict.fromkeys(out))
+
+    def files_many(self, datasets):
+        """
+        {dataset: [lfn, ...]} fetched concurrently.
+        """
+        res = self.query_many([f"file dataset={d}" for d in datasets])
+        return {d: res[f"file dataset={d}"] for d in datasets}
+
+    def clear(self, older_than=0):
+        """
+        Remove cache entries older than 'older_than' seconds; returns the number removed.
+        """
+        n = 0
+        if not os.path.isdir(self.cache_dir):
+            return n
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith((".json", ".tmp")) and now - os.path.getmtime(path) >= older_than:
+                os.unlink(path)
+                n += 1
+        return n
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Concurrent, cached dasgoclient queries.")
+    ap.add_argument("queries", nargs="*", help="DAS queries (e.g. 'file dataset=/A/B/C')")
+    ap.add_argument("--ttl", type=int, default=DEFAULT_TTL, help="Cache lifetime in seconds (0 = no cache)")
+    ap.add_argument("-j", "--workers", type=int, default=8)
+    ap.add_argument("--refresh", action="store_true", help="Ignore cached results (and overwrite them)")
+    ap.add_argument("--clear", action="store_true", help="Empty the cache first")
+    ap.add_argument("--stats", action="store_true", help="Print cache hit counts to stderr")
+    args = ap.parse_args(argv)
+
+    das = DASClient(ttl=args.ttl, workers=args.workers, refresh=args.refresh)
+    if args.clear:
+        print(f"removed {das.clear()} cache entries from {das.cache_dir}", file=sys.stderr)
+    try:
+        res = das.query_many(args.queries)
+    except DASError as e:
+        print(f"[das_client] {e}", file=sys.stderr)
+        return 1
+    for q in args.queries:
+        if len(args.queries) > 1:
+            print(f"# {q}")
+        print("\n".join(res[q]))
+    if args.stats:
+        s = das.stats
+        print(f"[das_client] das={s['das']} disk={s['disk']} memory={s['memory']}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os, re, shlex, subprocess, sys
+import hashlib, json, math, os, re, shlex, subprocess, sys, tempfile, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import FWCore.ParameterSet.Config as cms
 from FWCore.ParameterSet.VarParsing import VarParsing
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from das_client import DEFAULT_TTL, DASClient  # noqa: E402
+
 # -------------------------------
 # ANSI color helpers (red prefix only)
 # -------------------------------
@@ -51,17 +55,15 @@ def _store_path(s):
     return m.group(1) if m else s
 
 # -------------------------------
-# DAS wrappers (portable flags)
+# DAS wrappers (thread pool + on-disk cache shared by parent and child, see das_client.py)
 # -------------------------------
+das = None  # DASClient, set once the options are parsed
+
 def das_datasets(pattern):
-    cmd = ["dasgoclient", "-limit", "0", "-query", f"dataset={pattern}"]
-    _, out, _ = _run(cmd)
-    return [l.strip() for l in out.splitlines() if l.strip()]
+    return das.datasets(pattern)
 
 def das_files(dataset):
-    cmd = ["dasgoclient", "-limit", "0", "-query", f"file dataset={dataset}"]
-    _, out, _ = _run(cmd)
-    return [l.strip() for l in out.splitlines() if l.strip()]
+    return das.files(dataset)
 
 # -------------------------------
 # Dataset argument parsing/expansion
@@ -72,19 +74,8 @@ def parse_dataset_arg(ds_arg):
     return [tok.strip() for tok in ds_arg.split(",") if tok.strip()]
 
 def expand_datasets(tokens):
-    out = []
-    for t in tokens:
-        if "*" in t:
-            out.extend(das_datasets(t))
-        else:
-            out.append(t)
-    # preserve order, drop dups
-    seen, uniq = set(), []
-    for ds in out:
-        if ds not in seen:
-            seen.add(ds)
-            uniq.append(ds)
-    return uniq
+    # wildcards expanded concurrently; order preserved, dups dropped
+    return das.expand(tokens)
 
 # -------------------------------
 # GenXsec parsing from logs
@@ -108,17 +99,164 @@ def parse_xsec_from_log(text):
 # -------------------------------
 # Child-runner (for multi-dataset summary path)
 # -------------------------------
-def run_one_dataset_with_cmsrun(cfg_path, dataset, maxEvents, redirector):
+def dataset_log_name(dataset):
+    # /A/B/C -> A__B__C.log
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", dataset.strip("/").replace("/", "__")) + ".log"
+
+def run_one_dataset_with_cmsrun(cfg_path, dataset, maxEvents, redirector, dasCacheTTL=DEFAULT_TTL, log_path=None):
+    """Run one child cmsRun; its output is streamed to 'log_path' (if given) and returned."""
     args = [
         "cmsRun", cfg_path,
         f"dataset={dataset}",
         f"maxEvents={maxEvents}",
         f"redirector={redirector}",
+        f"dasCacheTTL={dasCacheTTL}",   # child reuses the file list the parent cached
         "childMode=True",   # ensures the child actually runs the CMSSW Process
     ]
+    rc, text = run_cmsrun_logged(args, log_path)
+    x, dx = parse_xsec_from_log(text)
+    return rc, x, dx, text
+
+def run_cmsrun_logged(args, log_path=None):
+    """Run a child cmsRun, streaming its output to 'log_path' (if given); returns (rc, output)."""
+    if log_path:
+        with open(log_path, "w") as log:
+            proc = subprocess.run(args, stdout=log, stderr=subprocess.STDOUT, text=True)
+        with open(log_path) as log:
+            return proc.returncode, log.read()
     proc = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-    x, dx = parse_xsec_from_log(proc.stdout)
-    return proc.returncode, x, dx, proc.stdout
+    return proc.returncode, proc.stdout
+
+# -------------------------------
+# File-level shards (nShards=K): one child per shard, per-shard JSON records, merged result
+# -------------------------------
+_ACCEPT_RE = re.compile(
+    r"Filter\s+efficiency\s*\(event-level\)\s*=\s*\(\s*([0-9.+\-Ee]+)\s*\)\s*/\s*\(\s*([0-9.+\-Ee]+)\s*\)",
+    re.IGNORECASE)
+
+def parse_accepted_from_log(text):
+    """(passed, total) of GenXSecAnalyzer's event-level filter efficiency line, or (None, None)."""
+    m = _ACCEPT_RE.search(text)
+    return (float(m.group(1)), float(m.group(2))) if m else (None, None)
+
+def split_shards(files, nshards):
+    """Contiguous, near-equal shards of the file list sorted by /store path (stable across DAS calls)."""
+    files = sorted(files, key=_store_path)
+    k = max(1, min(nshards, len(files)))
+    q, r = divmod(len(files), k)
+    out, start = [], 0
+    for i in range(k):
+        n = q + (1 if i < r else 0)
+        out.append(files[start:start + n])
+        start += n
+    return out
+
+def merge_shard_xsecs(records):
+    """
+    One cross section from per-shard records ({'xsec', 'err', 'accepted'}).
+    Every shard estimates the same cross section from its own events, so shards are weighted by
+    accepted events: x = sum(N_i x_i) / sum(N_i), err = sqrt(sum((N_i err_i)^2)) / sum(N_i).
+    If a shard has no event count, inverse-variance weights are used instead.
+    Returns (xsec, err, accepted, method).
+    """
+    recs = [r for r in records if r.get("xsec") is not None]
+    if not recs:
+        return None, None, 0, None
+    has_err = all(r.get("err") is not None for r in recs)
+    if all(r.get("accepted") for r in recs):
+        n = [r["accepted"] for r in recs]
+        tot = sum(n)
+        x = sum(ni * r["xsec"] for ni, r in zip(n, recs)) / tot
+        err = math.sqrt(sum((ni * r["err"]) ** 2 for ni, r in zip(n, recs))) / tot if has_err else None
+        return x, err, tot, "accepted events"
+    acc = sum(r.get("accepted") or 0 for r in recs)
+    if has_err and all(r["err"] > 0 for r in recs):
+        w = [1.0 / r["err"] ** 2 for r in recs]
+        x = sum(wi * r["xsec"] for wi, r in zip(w, recs)) / sum(w)
+        return x, 1.0 / math.sqrt(sum(w)), acc, "inverse variance"
+    return sum(r["xsec"] for r in recs) / len(recs), None, acc, "mean"
+
+def _read_json(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+def _write_json(path, obj):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    with os.fdopen(fd, "w") as fh:
+        json.dump(obj, fh, indent=1)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+def run_sharded(cfg_path, file_names, nshards, njobs, shard_dir, maxEvents, redirector):
+    """
+    Run GenXSecAnalyzer on K file shards in parallel and merge them. Each finished shard leaves
+    shard_NNN.json (+ .files, .log) in 'shard_dir'; a rerun skips shards whose record is done
+    for the same files and maxEvents. Returns the exit code (1 if any shard is missing).
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    shards = split_shards(file_names, nshards)
+    per_max = maxEvents if maxEvents < 0 else -(-maxEvents // len(shards))
+    records, todo = {}, []
+    for i, files in enumerate(shards):
+        rec = _read_json(os.path.join(shard_dir, f"shard_{i:03d}.json"))
+        if (rec and rec.get("status") == "done" and rec.get("files") == files
+                and rec.get("maxEvents") == per_max and rec.get("xsec") is not None):
+            records[i] = rec
+        else:
+            todo.append(i)
+    print(f"{ANSI_RED}[genXsec]{ANSI_RESET} {len(file_names)} file(s) in {len(shards)} shard(s) "
+          f"(maxEvents={per_max} each), {len(records)} already done; records in {shard_dir}/")
+
+    def _shard(i):
+        base = os.path.join(shard_dir, f"shard_{i:03d}")
+        with open(base + ".files", "w") as fh:
+            fh.write("\n".join(shards[i]) + "\n")
+        args = ["cmsRun", cfg_path, f"fileList={base}.files", f"maxEvents={per_max}",
+                f"redirector={redirector}", "childMode=True"]
+        t0 = time.time()
+        rc, text = run_cmsrun_logged(args, base + ".log")
+        x, dx = parse_xsec_from_log(text)
+        passed, total = parse_accepted_from_log(text)
+        rec = {"shard": i, "nshards": len(shards), "files": shards[i], "maxEvents": per_max,
+               "rc": rc, "status": "done" if (rc == 0 and x is not None) else "failed",
+               "xsec": x, "err": dx, "accepted": passed, "processed": total,
+               "seconds": round(time.time() - t0, 1), "log": base + ".log"}
+        _write_json(base + ".json", rec)
+        return rec
+
+    if todo:
+        print(f"[genXsec] Running {len(todo)} shard(s), {max(1, min(njobs, len(todo)))} at a time...")
+        with ThreadPoolExecutor(max_workers=max(1, min(njobs, len(todo)))) as pool:
+            futs = {pool.submit(_shard, i): i for i in todo}
+            for k, fut in enumerate(as_completed(futs), 1):
+                rec = records[futs[fut]] = fut.result()
+                print(f"  [{k}/{len(todo)}] shard {rec['shard']:3d}  {rec['status']:<7} {rec['seconds']:7.0f} s")
+
+    print(f"\n{'shard':>5}  {'files':>5}  {'accepted':>10}  {'xsec [pb]':>14}  {'stat err [pb]':>14}  status")
+    print("-" * 66)
+    for i in range(len(shards)):
+        r = records[i]
+        acc = f"{r['accepted']:.0f}" if r.get("accepted") is not None else "-"
+        xs = f"{r['xsec']:.6g}" if r.get("xsec") is not None else "-"
+        dxs = f"{r['err']:.6g}" if r.get("err") is not None else "-"
+        print(f"{i:>5}  {len(r['files']):>5}  {acc:>10}  {xs:>14}  {dxs:>14}  {r['status']}")
+    print("-" * 66)
+
+    done = [records[i] for i in range(len(shards)) if records[i]["status"] == "done"]
+    x, dx, acc, method = merge_shard_xsecs(done)
+    _write_json(os.path.join(shard_dir, "merged.json"),
+                {"nshards": len(shards), "done": len(done), "xsec": x, "err": dx, "accepted": acc, "method": method})
+    if x is None:
+        print("[genXsec] No shard produced a cross section.")
+        return 1
+    dxs = f" ± {dx:.6g}" if dx is not None else ""
+    tag = "" if len(done) == len(shards) else f"  [INCOMPLETE: {len(shards) - len(done)} shard(s) failed; rerun to resume]"
+    print(f"[genXsec] Final cross section = {x:.6g}{dxs} pb ({len(done)}/{len(shards)} shards, "
+          f"{acc:.0f} accepted events, weighted by {method}){tag}")
+    return 0 if len(done) == len(shards) else 1
 
 # -------------------------------
 # Stream a child cmsRun and reformat fileAction messages with [i/N]
@@ -185,9 +323,24 @@ options.register('childMode', False, VarParsing.multiplicity.singleton, VarParsi
                  "INTERNAL: run the CMSSW Process (do not orchestrate)")
 options.register('fileList', '', VarParsing.multiplicity.singleton, VarParsing.varType.string,
                  "Path to a newline-delimited list of files (internal; used by wrapper)")
+options.register('dasCacheTTL', DEFAULT_TTL, VarParsing.multiplicity.singleton, VarParsing.varType.int,
+                 "Seconds a cached DAS answer stays valid (0 = always query DAS)")
+options.register('dasWorkers', 8, VarParsing.multiplicity.singleton, VarParsing.varType.int,
+                 "Concurrent dasgoclient queries")
+options.register('dasRefresh', False, VarParsing.multiplicity.singleton, VarParsing.varType.bool,
+                 "Ignore cached DAS answers (and overwrite them)")
+options.register('nJobs', 0, VarParsing.multiplicity.singleton, VarParsing.varType.int,
+                 "Child cmsRun processes run at the same time (per dataset, or per shard); unset (0): 1 dataset / all shards")
+options.register('logDir', 'genxsec_logs', VarParsing.multiplicity.singleton, VarParsing.varType.string,
+                 "Directory for the per-dataset child logs (multi-dataset mode)")
+options.register('nShards', 0, VarParsing.multiplicity.singleton, VarParsing.varType.int,
+                 "Split the input files into this many shards run in parallel (nJobs caps them) and merge")
+options.register('shardDir', '', VarParsing.multiplicity.singleton, VarParsing.varType.string,
+                 "Shard records/logs (default: genxsec_shards/<dataset>); reruns skip finished shards")
 
 options.parseArguments()
 cfg_abspath = os.path.abspath(__file__)
+das = DASClient(ttl=options.dasCacheTTL, workers=options.dasWorkers, refresh=options.dasRefresh)
 
 # -------------------------------
 # Multi-dataset orchestration (separate runs, summary table)
@@ -199,28 +352,55 @@ if options.dataset and not options.combineSamples and not options.childMode:
 
     if ds_list and len(ds_list) > 1:
         print(f"[genXsec] Found {len(ds_list)} dataset(s). Running GenXsecAnalyzer per dataset...\n")
-        rows = []
+        # all file lists in parallel; the cached answers are what the children read
+        try:
+            nfiles = {ds: len(fl) for ds, fl in das.files_many(ds_list).items()}
+        except Exception as e:
+            print(f"[genXsec] DAS file lookup failed ({e}); children will query DAS themselves.\n")
+            nfiles = {}
+        os.makedirs(options.logDir, exist_ok=True)
+        logs = {ds: os.path.join(options.logDir, dataset_log_name(ds)) for ds in ds_list}
         for i, ds in enumerate(ds_list, 1):
             print(f"{red_prefix(i, len(ds_list))} {ds}")
-            # count files quickly
-            try:
-                nf = len(das_files(ds))
-                print(f"  -> {nf} file(s) in this dataset")
-            except Exception:
-                pass
-
-            # Run a child job
-            rc, x, dx, logtxt = run_one_dataset_with_cmsrun(
-                cfg_abspath, ds, options.maxEvents, options.redirector
-            )
+            if ds in nfiles:
+                print(f"  -> {nfiles[ds]} file(s) in this dataset")
+            print(f"  -> log: {logs[ds]}")
+
+        # Run the child jobs, nJobs at a time (each mostly waits on XRootD)
+        def _child(ds):
+            t0 = time.time()
+            res = run_one_dataset_with_cmsrun(cfg_abspath, ds, options.maxEvents, options.redirector,
+                                              options.dasCacheTTL, logs[ds])
+            return res + (time.time() - t0,)
+
+        njobs = max(1, min(options.nJobs, len(ds_list)))
+        print(f"\n[genXsec] Running {len(ds_list)} cmsRun job(s), {njobs} at a time...")
+        t_start = time.time()
+        results = {}
+        with ThreadPoolExecutor(max_workers=njobs) as pool:
+            futs = {pool.submit(_child, ds): ds for ds in ds_list}
+            for k, fut in enumerate(as_completed(futs), 1):
+                ds = futs[fut]
+                results[ds] = fut.result()
+                rc, x, _, _, sec = results[ds]
+                status = "ok" if (rc == 0 and x is not None) else (f"rc={rc}" if rc != 0 else "no xsec")
+                print(f"  [{k}/{len(ds_list)}] {status:<8} {sec:7.0f} s  {ds}")
+        wall = time.time() - t_start
+
+        # Report in dataset order, whatever the completion order
+        rows = []
+        for ds in ds_list:
+            rc, x, dx, logtxt, _ = results[ds]
             if rc != 0:
-                print(f"  -> cmsRun failed for {ds} (rc={rc}). Skipping.\n")
+                print(f"\n  -> cmsRun failed for {ds} (rc={rc}, log: {logs[ds]}). Skipping.")
                 continue
             if x is None:
-                print("  -> Could not parse cross section from log. Tail follows:\n")
+                print(f"\n  -> Could not parse cross section for {ds} (log: {logs[ds]}). Tail follows:\n")
                 print("\n".join(logtxt.splitlines()[-30:]), "\n")
                 continue
             rows.append((ds, x, dx))
+        busy = sum(r[-1] for r in results.values())
+        print(f"\n[genXsec] {len(ds_list)} job(s) in {wall:.0f} s wall ({busy:.0f} s of cmsRun, x{busy / wall if wall else 1:.1f})")
 
         if rows:
             print("\n=== GenXsec per dataset ===")
@@ -251,8 +431,8 @@ if (not file_names) and options.dataset:
         if not ds_list:
             raise RuntimeError(f"No datasets matched any token in: {options.dataset}")
         files = []
-        for ds in ds_list:
-            files.extend(das_files(ds))
+        for fl in das.files_many(ds_list).values():
+            files.extend(fl)
         file_names = files
         print(f"[genXsec] Combining {len(ds_list)} datasets, total files: {len(file_names)}")
     else:
@@ -273,6 +453,19 @@ if not file_names:
 redir = options.redirector
 file_names = [_to_xrootd(f, redir) for f in file_names]
 
+# -------------------------------
+# Sharded run: K children over slices of the file list, merged result
+# -------------------------------
+if not options.childMode and options.nShards > 1:
+    name = (dataset_log_name(options.dataset)[:-4] if options.dataset else
+            "files_" + hashlib.sha1("\n".join(sorted(file_names)).encode()).hexdigest()[:12])
+    if options.combineSamples:
+        name = "combined_" + hashlib.sha1(options.dataset.encode()).hexdigest()[:12]
+    shard_dir = options.shardDir or os.path.join("genxsec_shards", name)
+    njobs = options.nJobs if options.nJobs > 0 else options.nShards  # nJobs=1 runs the shards one by one
+    sys.exit(run_sharded(cfg_abspath, file_names, options.nShards, njobs, shard_dir,
+                         options.maxEvents, options.redirector))
+
 # -------------------------------
 # Orchestrate pretty progress for single/combined run (parent)
 # -------------------------------
@@ -281,7 +474,6 @@ if not options.childMode:
     print(f"{ANSI_RED}[genXsec]{ANSI_RESET} Total input files: {nfiles}")
 
     # Write file list for the child (avoids giant command lines)
-    import tempfile
     tmp_path = None
     if file_names:
         tf = tempfile.NamedTemporaryFile('w', delete=False, prefix='genxsec_files_', suffix='.txt')